@@ -0,0 +1,60 @@
+# Payroll dashboard aggregation three ways: GROUP BY pushed down to the database, NumPy over
+# the columnar cache and a plain Python loop over the same rows, plus one incremental update.
+#
+#   python -m benchmarks.bench_analytics --sizes 100000 1000000
+import argparse
+import os
+import tempfile
+
+from benchmarks.timing import SUMMARY_HEADER, sample, summarize, summary_line
+from columnar_store import ColumnarTable
+from database import EMPLOYEE_COLUMNS, PUBLIC_EMPLOYEE_SCHEMA, connect_sqlite
+import payroll_analytics
+from payroll_analytics import aggregate_cache, aggregate_server
+from synthetic_data import seed_database
+
+
+def run(size, repeats):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, size)
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {EMPLOYEE_COLUMNS} FROM Current_Employee")
+    rows = cursor.fetchall()
+    connection.close()
+    public = ColumnarTable.from_rows(PUBLIC_EMPLOYEE_SCHEMA, [row[:7] for row in rows])
+    sensitive = ColumnarTable.from_rows([("ID", "int"), ("Annual_Salary", "float"), ("Hourly_Rate", "float")],
+                                        [(row[0],) + tuple(row[7:]) for row in rows])
+    connect = lambda: connect_sqlite(path)
+
+    results = [("server GROUP BY", sample(lambda: aggregate_server(connect, True), repeats)),
+               ("numpy", sample(lambda: aggregate_cache(public, sensitive), repeats))]
+    numpy_module, payroll_analytics.np = payroll_analytics.np, None
+    results.append(("python loop", sample(lambda: aggregate_cache(public, sensitive), max(1, repeats // 5))))
+    payroll_analytics.np = numpy_module
+
+    report = aggregate_cache(public, sensitive)
+    old, new = public.get(1), (1, "X Y", "CLERK", "LAW", "F", "HOURLY", 40)
+    results.append(("incremental update", sample(
+        lambda: report.apply_change(old, (None, None), new, (None, 25.0)), repeats)))
+    os.remove(path)
+    return [(name, summarize(samples)) for name, samples in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payroll aggregation benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    if payroll_analytics.np is None:
+        print("numpy is not installed, the numpy row falls back to the Python loop")
+
+    for size in args.sizes:
+        print(f"\n{size} rows")
+        print(SUMMARY_HEADER)
+        for name, summary in run(size, args.repeats):
+            print(summary_line(name, summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Duplicate detection with blocking and sorted neighbourhood against comparing every pair.
+# Synthetic employees get near-duplicates added the ways they arise in the app: the name typed
+# "First Last" in mixed case by an update, a vowel mistyped, and a consonant mistyped (which can
+# change the Soundex code and so escape the blocks). Reports the time to group every row and how
+# many of the added duplicates ended up in their original's group. All pairs is only timed on the
+# smallest size and projected, it grows with the square of the rows.
+#
+#   python -m benchmarks.bench_duplicates --sizes 10000 100000 1000000
+import argparse
+import difflib
+import random
+import time
+
+from duplicates import DEFAULT_THRESHOLD, find_duplicates, stored_name
+from synthetic_data import generate_employees
+
+VOWELS = "AEIOU"
+CONSONANTS = "BCDFGKLMNPRST"
+
+
+# The name as update_data() would store "First Last" typed in title case
+def typed(name):
+    return " ".join(name.split()[::-1]).title()
+
+
+# Replace one letter after the first with another from the same class
+def mistype(name, letters, rng):
+    positions = [index for index, letter in enumerate(name) if index and letter in letters]
+    if not positions:
+        return None
+    index = rng.choice(positions)
+    return name[:index] + rng.choice(letters.replace(name[index], "")) + name[index + 1:]
+
+
+# Synthetic rows plus count near-duplicates of each kind, returns (rows, {kind: [(original, copy)]})
+def with_duplicates(size, count, seed=0):
+    rng = random.Random(seed)
+    rows = [(index + 1,) + row for index, row in enumerate(generate_employees(size, seed))]
+    added = {"typed": [], "vowel": [], "consonant": []}
+    next_id = size + 1
+    for kind in added:
+        for original in rng.sample(rows[:size], count):
+            name = (typed(original[1]) if kind == "typed" else
+                    mistype(original[1], VOWELS if kind == "vowel" else CONSONANTS, rng))
+            if name is None:
+                continue
+            rows.append((next_id, name) + original[2:])
+            added[kind].append((original[0], next_id))
+            next_id += 1
+    return rows, added
+
+
+# Every pair in the same department, what blocking avoids
+def all_pairs(rows, threshold=DEFAULT_THRESHOLD):
+    names = [(row[0], row[3], " ".join(sorted(stored_name(row[1]).split()))) for row in rows]
+    pairs = 0
+    for index, (key, department, name) in enumerate(names):
+        for other_key, other_department, other in names[index + 1:]:
+            if department == other_department and (
+                    name == other or difflib.SequenceMatcher(None, name, other).ratio() >= threshold):
+                pairs += 1
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate employee detection benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--duplicates", type=int, default=500, help="near-duplicates added of each kind")
+    parser.add_argument("--pairs-size", type=int, default=3000, help="rows to time comparing all pairs on")
+    args = parser.parse_args()
+
+    rows, _ = with_duplicates(args.pairs_size, 0)
+    started = time.perf_counter()
+    all_pairs(rows)
+    seconds = time.perf_counter() - started
+    print(f"All pairs on {args.pairs_size} rows: {seconds:.2f} s")
+
+    print(f"\n{'rows':>9} {'groups':>8} {'seconds':>8} {'all pairs (projected)':>22}  found: typed / vowel / consonant")
+    for size in args.sizes:
+        rows, added = with_duplicates(size, args.duplicates)
+        started = time.perf_counter()
+        groups = find_duplicates(rows)
+        elapsed = time.perf_counter() - started
+        group_of = {key: index for index, group in enumerate(groups) for key in group.keys}
+        found = [sum(1 for original, copy in pairs if copy in group_of and group_of.get(original) == group_of[copy])
+                 / len(pairs) for pairs in added.values()]
+        projected = seconds * (len(rows) / args.pairs_size) ** 2
+        print(f"{len(rows):>9} {len(groups):>8} {elapsed:>8.2f} {projected:>20.0f} s  "
+              + " / ".join(f"{share:.0%}" for share in found))
+
+
+if __name__ == "__main__":
+    main()
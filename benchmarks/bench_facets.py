@@ -0,0 +1,91 @@
+# Filter panel queries three ways: a WHERE ... IN plus GROUP BY counts on the database, a Python
+# scan of the cached rows and the FacetIndex bitmaps, each returning the matching IDs and the
+# count for every facet value.
+#
+#   python -m benchmarks.bench_facets --sizes 100000 1000000
+import argparse
+import os
+import tempfile
+
+from benchmarks.timing import SUMMARY_HEADER, sample, summarize, summary_line
+from database import PUBLIC_EMPLOYEE_COLUMN_NAMES, connect_sqlite
+from facets import FACET_COLUMNS, FacetIndex, keys_of
+from synthetic_data import seed_database
+
+SELECTION = {"Department": {"POLICE", "FIRE", "AVIATION"}, "Full_or_Part_Time": {"F"},
+             "Salary_or_Hourly": {"HOURLY"}}
+
+
+def _where(selection, skip=None):
+    conditions, params = [], []
+    for column, values in selection.items():
+        if column != skip and values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(sorted(values))
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def server(cursor):
+    where, params = _where(SELECTION)
+    cursor.execute(f"SELECT ID FROM Current_Employee{where} ORDER BY ID", params)
+    keys = [row[0] for row in cursor.fetchall()]
+    counts = {}
+    for column in FACET_COLUMNS:
+        where, params = _where(SELECTION, skip=column)
+        cursor.execute(f"SELECT {column}, COUNT(*) FROM Current_Employee{where} GROUP BY {column}", params)
+        counts[column] = dict(cursor.fetchall())
+    return keys, counts
+
+
+def scan(rows):
+    def matches(row, skip=None):
+        return all(not values or row[FACET_COLUMNS[column]] in values
+                   for column, values in SELECTION.items() if column != skip)
+
+    keys = [row[0] for row in rows if matches(row)]
+    counts = {column: {} for column in FACET_COLUMNS}
+    for row in rows:
+        for column, position in FACET_COLUMNS.items():
+            if matches(row, skip=column):
+                counts[column][row[position]] = counts[column].get(row[position], 0) + 1
+    return keys, counts
+
+
+def bitmaps(index):
+    return keys_of(index.match(SELECTION)), index.counts(SELECTION)
+
+
+def run(size, repeats):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, size)
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {', '.join(PUBLIC_EMPLOYEE_COLUMN_NAMES)} FROM Current_Employee")
+    rows = cursor.fetchall()
+    index = FacetIndex.build(rows)
+    results = [("server", sample(lambda: server(cursor), repeats)),
+               ("python scan", sample(lambda: scan(rows), max(1, repeats // 5))),
+               ("bitmaps", sample(lambda: bitmaps(index), repeats)),
+               ("build", sample(lambda: FacetIndex.build(rows), max(1, repeats // 5)))]
+    updated = [(row[0],) + tuple(row[1:3]) + ("LAW",) + tuple(row[4:]) for row in rows[:1000]]
+    results.append(("incremental update", sample(lambda: [index.add(row) for row in updated], 1)))
+    connection.close()
+    os.remove(path)
+    return [(name, summarize(samples)) for name, samples in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Facet filtering and counts benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n{size} rows (incremental update is 1000 rows)")
+        print(SUMMARY_HEADER)
+        for name, summary in run(size, args.repeats):
+            print(summary_line(name, summary))
+
+
+if __name__ == "__main__":
+    main()
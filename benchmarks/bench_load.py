@@ -0,0 +1,292 @@
+# Load test: N simulated clerks run the app's mix of operations concurrently (show the table
+# and scroll two pages, search, add, update, delete and revealing salaries) against a
+# temporary SQLite stand-in, for a fixed time at each client count. Reports throughput,
+# p50/p95/p99 latency and errors per operation, plus lock contention: SQLite "database is
+# locked" failures and how often and how long clerks waited for a pooled connection.
+#
+# --connections per-action opens and closes a connection for every operation instead of
+# sharing a pool. --target service runs the same clerks through employee_service (started
+# in-process, or --url for one already running). --json saves the results with the git
+# revision, --compare prints the change against results saved earlier.
+#
+#   python -m benchmarks.bench_load --clients 1 8 32 --seconds 20 --json load.json
+#   python -m benchmarks.bench_load --clients 1 8 32 --seconds 20 --compare load.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.bench_repository import QUERIES, form_fields
+from benchmarks.timing import SUMMARY_HEADER, summarize, summary_line
+from database import MASKED_EMPLOYEE_COLUMNS, SENSITIVE_COLUMN_NAMES, ConnectionPool, connect_sqlite
+from employee_repository import EmployeeRepository
+from employee_service import EmployeeService
+from paged_view import KeysetPageSource
+from sensitive_store import SensitiveStore
+from service_client import ServiceClient, ServicePageSource, ServiceRepository, ServiceSensitiveStore
+from synthetic_data import seed_database
+
+# Relative weight of each operation in a clerk's session
+MIX = {"display": 30, "search": 30, "add": 8, "update": 12, "delete": 6, "reveal": 4}
+CREDENTIALS = ("load", "test")
+
+
+# The data access one clerk uses, built the way the app builds it for the chosen target
+class Backend:
+    def __init__(self, repository, page_source, sensitive_store):
+        self.repository = repository
+        self.page_source = page_source
+        self.sensitive_store = sensitive_store
+
+
+def direct_backend(path, pool):
+    connect = pool.acquire if pool else lambda: connect_sqlite(path)
+    return Backend(EmployeeRepository(connect, "sqlite"),
+                   KeysetPageSource(connect, MASKED_EMPLOYEE_COLUMNS, "Current_Employee", dialect="sqlite"),
+                   SensitiveStore(connect, "Current_Employee", SENSITIVE_COLUMN_NAMES))
+
+
+def service_backend(url):
+    client = ServiceClient(url, *CREDENTIALS)
+    return Backend(ServiceRepository(client), ServicePageSource(client), ServiceSensitiveStore(client))
+
+
+# Run an EmployeeService over pool on a background event loop, returns (url, stop)
+def start_service(pool, cache_seconds):
+    repository = EmployeeRepository(pool.acquire, "sqlite")
+    service = EmployeeService(repository, SensitiveStore(pool.acquire, repository.table, SENSITIVE_COLUMN_NAMES),
+                              CREDENTIALS, cache_seconds)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(service.handle, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, name="service", daemon=True)
+    thread.start()
+
+    def stop():
+        loop.call_soon_threadsafe(server.close)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}", stop
+
+
+# One simulated clerk: picks operations from MIX until the deadline, pausing think_ms on average
+class Clerk:
+    def __init__(self, index, backend, size, think_ms):
+        self.rng = random.Random(index)
+        self.backend = backend
+        self.size = size
+        self.think_ms = think_ms
+        self.fields = form_fields(1000000, seed=1000 + index)
+        self.added = []  # IDs this clerk added and has not deleted yet
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(Counter)  # Operation -> error type -> count
+        self.lock_errors = 0
+
+    def run(self, deadline):
+        operations, weights = list(MIX), list(MIX.values())
+        while time.monotonic() < deadline:
+            operation = self.rng.choices(operations, weights)[0]
+            if operation == "delete" and not self.added:
+                operation = "add"
+            started = time.perf_counter()
+            try:
+                getattr(self, operation)()
+            except Exception as e:
+                self.errors[operation][type(e).__name__] += 1
+                if "locked" in str(e):
+                    self.lock_errors += 1
+            else:
+                self.samples[operation].append(time.perf_counter() - started)
+            if self.think_ms:
+                time.sleep(self.rng.expovariate(1000 / self.think_ms))
+
+    # First page of the table, then scroll down two pages
+    def display(self):
+        source = self.backend.page_source
+        rows = source.fetch("after", None, 200)
+        for _ in range(2):
+            if rows:
+                rows = source.fetch("after", source.key(rows[-1]), 200)
+
+    def search(self):
+        self.backend.repository.search(self.rng.choice(QUERIES), True)
+
+    def add(self):
+        self.added.append(self.backend.repository.add(*next(self.fields))[0])
+
+    def update(self):
+        self.backend.repository.update(self.rng.randint(1, self.size), *next(self.fields))
+
+    def delete(self):
+        self.backend.repository.delete(self.added.pop())
+
+    # Log in to reveal salaries (one two-column read of the table), then mask again
+    def reveal(self):
+        store = self.backend.sensitive_store
+        store.apply(store.fetch())
+        store.wipe()
+
+
+def run(path, size, clients, seconds, think_ms, args):
+    pool = None
+    if args.target == "service" or args.connections == "pool":
+        pool = ConnectionPool(lambda: connect_sqlite(path), size=args.pool_size,
+                              acquire_timeout=args.acquire_timeout, dialect="sqlite")
+    stop = None
+    url = args.url
+    if args.target == "service" and not url:
+        url, stop = start_service(pool, args.cache_seconds)
+    backends = [service_backend(url) if args.target == "service" else direct_backend(path, pool)
+                for _ in range(clients)]
+    clerks = [Clerk(index, backend, size, think_ms) for index, backend in enumerate(backends)]
+    service_before = backends[0].repository.client.get("/stats") if args.target == "service" else None
+
+    started = time.monotonic()
+    deadline = started + seconds
+    threads = [threading.Thread(target=clerk.run, args=(deadline,)) for clerk in clerks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    # Put back what the clerks added so every client count starts from the same table
+    for clerk in clerks:
+        for key in clerk.added:
+            clerk.backend.repository.delete(key)
+
+    result = {"clients": clients, "seconds": elapsed, "operations": {}, "errors": {}}
+    for operation in MIX:
+        samples = [value for clerk in clerks for value in clerk.samples[operation]]
+        errors = sum((clerk.errors[operation] for clerk in clerks), Counter())
+        if samples:
+            summary = summarize(samples)
+            summary["ops"] = len(samples) / elapsed  # Completed per second across all clerks
+            summary["errors"] = sum(errors.values())
+            summary["error_rate"] = summary["errors"] / (len(samples) + summary["errors"])
+            result["operations"][operation] = summary
+        if errors:
+            result["errors"][operation] = dict(errors)
+    completed = sum(summary["count"] for summary in result["operations"].values())
+    failed = sum(sum(errors.values()) for errors in result["errors"].values())
+    result["throughput"] = completed / elapsed
+    result["error_rate"] = failed / (completed + failed) if completed + failed else 0.0
+    result["lock_errors"] = sum(clerk.lock_errors for clerk in clerks)
+    if pool is not None:
+        stats = pool.stats()
+        result["pool"] = {name: stats[name] for name in
+                          ("size", "hits", "misses", "waits", "avg_wait_time", "max_wait_time")}
+    if service_before is not None:
+        after = backends[0].repository.client.get("/stats")
+        result["service"] = {name: after[name] - service_before[name]
+                             for name in ("requests", "cache_hits", "coalesced", "reads", "writes", "errors")}
+    if stop:
+        stop()
+    if pool is not None:
+        pool.close()
+    return result
+
+
+def print_result(result):
+    print(f"\n{result['clients']} clients, {result['seconds']:.1f} s: {result['throughput']:.0f} ops/s, "
+          f"{result['error_rate']:.2%} errors, {result['lock_errors']} lock errors")
+    print(f"{SUMMARY_HEADER} {'errors':>7}")
+    for operation, summary in result["operations"].items():
+        print(f"{summary_line(operation, summary)} {summary['errors']:>7}")
+    for operation, errors in result["errors"].items():
+        print(f"  {operation} failed: " + ", ".join(f"{name} x{count}" for name, count in errors.items()))
+    pool = result.get("pool")
+    if pool:
+        print(f"  pool of {pool['size']}: {pool['waits']} waits for a connection, "
+              f"average {pool['avg_wait_time'] * 1000:.1f} ms, max {pool['max_wait_time'] * 1000:.1f} ms")
+    service = result.get("service")
+    if service:
+        print(f"  service: {service['requests']} requests, {service['reads']} database reads, "
+              f"{service['cache_hits']} cache hits, {service['coalesced']} coalesced")
+
+
+# Print the change in p95 latency and throughput against a report saved by an earlier run.
+# Changes for the worse beyond tolerance are marked as regressions.
+def compare(report, baseline, tolerance):
+    print(f"\nCompared with {baseline.get('revision', 'unknown')} ({baseline.get('created', '')})")
+    for name in ("rows", "target", "connections", "pool_size", "think_ms", "cache_seconds"):
+        if baseline["settings"].get(name) != report["settings"].get(name):
+            print(f"  note: {name} was {baseline['settings'].get(name)}, now {report['settings'].get(name)}")
+    print(f"{'clients':>7} {'operation':<10} {'p95 ms':>9} {'was':>9} {'ops/s':>9} {'was':>9}")
+    earlier = {result["clients"]: result for result in baseline["results"]}
+    regressions = 0
+    for result in report["results"]:
+        old = earlier.get(result["clients"])
+        if old is None:
+            continue
+        for operation, summary in result["operations"].items():
+            before = old["operations"].get(operation)
+            if before is None:
+                continue
+            worse = (summary["p95"] > before["p95"] * (1 + tolerance) or
+                     summary["ops"] < before["ops"] * (1 - tolerance))
+            regressions += worse
+            print(f"{result['clients']:>7} {operation:<10} {summary['p95']:>9.2f} {before['p95']:>9.2f} "
+                  f"{summary['ops']:>9.0f} {before['ops']:>9.0f}" + ("  regression" if worse else ""))
+    print(f"{regressions} regressions beyond {tolerance:.0%}")
+    return regressions
+
+
+def revision():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test of the app's database operations")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--think-ms", type=float, default=0, help="average pause between a clerk's operations")
+    parser.add_argument("--target", choices=("direct", "service"), default="direct")
+    parser.add_argument("--connections", choices=("pool", "per-action"), default="pool",
+                        help="share a connection pool, or connect for every operation (direct target)")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--acquire-timeout", type=float, default=30)
+    parser.add_argument("--url", help="employee service to load instead of starting one (its database "
+                                      "must be --sqlite PATH, seeded with at least --rows employees)")
+    parser.add_argument("--sqlite", help="existing SQLite file to use instead of a temporary one")
+    parser.add_argument("--cache-seconds", type=float, default=5, help="service response cache")
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--compare", help="results saved earlier to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    path = args.sqlite or os.path.join(tempfile.mkdtemp(), "load.db")
+    connection = connect_sqlite(path)
+    if connection.execute("SELECT COUNT(*) FROM Current_Employee").fetchone()[0] == 0:
+        seed_database(connection, args.rows)
+    connection.close()
+
+    report = {"revision": revision(), "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "settings": vars(args), "mix": MIX, "results": []}
+    for clients in args.clients:
+        result = run(path, args.rows, clients, args.seconds, args.think_ms, args)
+        report["results"].append(result)
+        print_result(result)
+    if not args.sqlite:
+        os.remove(path)
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(report, json.load(handle), args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Memory held by the employee cache: a dict of ID -> row tuple as fetched by the driver versus
+# the ColumnarTable (typed arrays plus dictionary-encoded text). Rows are read back from a
+# temporary SQLite stand-in so every value is a separate object, as they are from pypyodbc.
+#
+#   python -m benchmarks.bench_memory --sizes 100000 300000
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.timing import sample, summarize
+from columnar_store import ColumnarTable
+from database import EMPLOYEE_COLUMNS, EMPLOYEE_SCHEMA, connect_sqlite
+from synthetic_data import seed_database
+
+
+def fetch_rows(path):
+    connection = connect_sqlite(path)
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {EMPLOYEE_COLUMNS} FROM Current_Employee")
+    rows = [tuple(row) for row in cursor.fetchall()]
+    connection.close()
+    return rows
+
+
+# Bytes still allocated after build() returns, and how long it took (fetch included)
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def run(size, lookups):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, size)
+    connection.close()
+
+    tuples, tuple_bytes, tuple_seconds = measure(lambda: {row[0]: row for row in fetch_rows(path)})
+    columnar, columnar_bytes, columnar_seconds = measure(
+        lambda: ColumnarTable.from_rows(EMPLOYEE_SCHEMA, fetch_rows(path)))
+    _, fetch_bytes, _ = measure(lambda: fetch_rows(path))
+    os.remove(path)
+
+    rng = random.Random(1)
+    keys = [rng.randint(1, size) for _ in range(lookups)]
+    results = {}
+    for name, store in (("tuples", tuples), ("columnar", columnar)):
+        lookup = summarize(sample(lambda: [store.get(key)[3] for key in keys], 5))
+        scan = summarize(sample(lambda: sum(1 for row in store.values() if row[4] == "F"), 3))
+        results[name] = (lookup["p50"] / lookups * 1000, scan["p50"])
+    return {
+        "tuples": (tuple_bytes, tuple_seconds) + results["tuples"],
+        "columnar": (columnar_bytes, columnar_seconds) + results["columnar"],
+        "fetched_rows": fetch_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tuple rows vs. ColumnarTable memory benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 300000])
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        report = run(size, args.lookups)
+        print(f"\n{size} rows (a fetched row list alone holds {report['fetched_rows'] / 2 ** 20:.1f} MiB)")
+        print(f"{'store':<10} {'MiB':>8} {'bytes/row':>10} {'build s':>8} {'get us':>8} {'scan ms':>9}")
+        for name in ("tuples", "columnar"):
+            held, build, get_us, scan_ms = report[name]
+            print(f"{name:<10} {held / 2 ** 20:>8.1f} {held / size:>10.0f} {build:>8.2f} "
+                  f"{get_us:>8.2f} {scan_ms:>9.1f}")
+        print(f"columnar uses {report['columnar'][0] / report['tuples'][0]:.0%} of the tuple store's memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Latency percentiles and throughput of every EmployeeRepository operation (list, get, search,
+# add, update, delete and the masked variants) against a temporary SQLite stand-in seeded with
+# synthetic employees. Connections come from a ConnectionPool, as in the app.
+#
+#   python -m benchmarks.bench_repository --sizes 10000 100000 1000000 --json results.json
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+
+from benchmarks.timing import SUMMARY_HEADER, sample, summarize, summary_line
+from database import ConnectionPool, connect_sqlite
+from employee_repository import EmployeeRepository
+from synthetic_data import generate_employees, seed_database
+
+QUERIES = ["smith", "pol", "police officer", "kowalski james", "librarian", "zzz"]
+
+
+# Synthetic records as the strings typed into the form, names in "FIRST LAST" order
+def form_fields(count, seed):
+    for row in generate_employees(count, seed):
+        last, first = row[0].split(" ", 1)
+        yield (f"{first} {last}",) + tuple("0" if value is None else str(value) for value in row[1:])
+
+
+def run(size, repeats, writes):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, size)
+    connection.close()
+    pool = ConnectionPool(lambda: connect_sqlite(path), dialect="sqlite")
+    repository = EmployeeRepository(pool.acquire, "sqlite")
+    rng = random.Random(1)
+    keys = lambda: rng.randint(1, size)
+    queries = itertools.cycle(QUERIES)
+
+    results = [
+        ("list first page", sample(lambda: repository.list(limit=200), repeats)),
+        ("list page at random", sample(lambda: repository.list("after", keys(), 200), repeats)),
+        ("list page unmasked", sample(lambda: repository.list("after", keys(), 200, masked=False), repeats)),
+        ("list page backwards", sample(lambda: repository.list("before", keys(), 200), repeats)),
+        ("get by id", sample(lambda: repository.get(keys()), repeats)),
+        ("search", sample(lambda: repository.search(next(queries)), repeats)),
+        ("search masked", sample(lambda: repository.search(next(queries), masked=True), repeats)),
+    ]
+    added = []
+    fields = form_fields(writes, seed=size)
+    results.append(("add", sample(lambda: added.append(repository.add(*next(fields))[0]), writes)))
+    updates = form_fields(writes, seed=size + 1)
+    ids = iter(added)
+    results.append(("update", sample(lambda: repository.update(next(ids), *next(updates)), writes)))
+    ids = iter(added)
+    results.append(("delete", sample(lambda: repository.delete(next(ids)), writes)))
+
+    pool.close()
+    os.remove(path)
+    return [(name, summarize(samples)) for name, samples in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EmployeeRepository latency and throughput benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=200, help="calls per read operation")
+    parser.add_argument("--writes", type=int, default=500, help="records added, updated and deleted")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for size in args.sizes:
+        results = run(size, args.repeats, args.writes)
+        report[size] = dict(results)
+        print(f"\n{size} rows")
+        print(SUMMARY_HEADER)
+        for name, summary in results:
+            print(summary_line(name, summary))
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Before and after schema_migrations on a temporary SQLite stand-in: times the queries the app
+# issues (keyset pages in ID order and sorted on a heading, get, search, filtered export and
+# the payroll groupings), then shows the query plan SQLite picks for each after migrating and
+# checks it uses the index meant for it.
+#
+#   python -m benchmarks.bench_schema --rows 1000000
+import argparse
+import os
+import tempfile
+
+from benchmarks.timing import SUMMARY_HEADER, sample, summarize, summary_line
+from database import MASKED_EMPLOYEE_COLUMNS, connect_sqlite
+from employee_repository import EmployeeRepository
+from export import build_export_query
+from paged_view import KeysetPageSource
+from payroll_analytics import aggregate_server
+from schema_migrations import TABLE, migrate
+from sorting import sql_sort_expression
+from synthetic_data import seed_database
+
+
+# Connection that remembers the statements run on it, to explain them afterwards
+class RecordingConnection:
+    def __init__(self, connection, log):
+        self.connection = connection
+        self.log = log
+
+    def cursor(self):
+        return RecordingCursor(self.connection.cursor(), self.log)
+
+    def close(self):
+        pass  # Reused by every query of the benchmark
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+class RecordingCursor:
+    def __init__(self, cursor, log):
+        self.cursor = cursor
+        self.log = log
+
+    def execute(self, query, params=()):
+        self.log.append((query, tuple(params)))
+        return self.cursor.execute(query, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+# (name, function, index its plan should use after migrating or None) for each query
+def app_queries(connection, log):
+    connect = lambda: RecordingConnection(connection, log)
+    repository = EmployeeRepository(connect, "sqlite")
+    middle = connection.execute(f"SELECT MAX(ID) / 2 FROM {TABLE}").fetchone()[0]
+
+    def page(column):
+        order_by = [] if column is None else [(sql_sort_expression(column), False)]
+        source = KeysetPageSource(connect, MASKED_EMPLOYEE_COLUMNS, TABLE, dialect="sqlite", order_by=order_by)
+
+        def fetch():
+            rows = source.fetch("after", None, 200)
+            return source.fetch("after", source.key(rows[-1]), 200)
+        return fetch
+
+    def export():
+        query, params = build_export_query(filters={"Department": ["POLICE", "FIRE"], "Full_or_Part_Time": "P"})
+        cursor = connect().cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    return [
+        ("page by ID", page(None), "PRIMARY KEY"),
+        ("get by ID", lambda: repository.get(middle), "PRIMARY KEY"),
+        ("page by Name", page(1), f"IX_{TABLE}_Name_Sort"),
+        ("page by Job Title", page(2), f"IX_{TABLE}_Job_Titles_Sort"),
+        ("page by Department", page(3), f"IX_{TABLE}_Department_Sort"),
+        ("page by Typical Hours", page(6), f"IX_{TABLE}_Typical_Hours_Sort"),
+        ("search one word", lambda: repository.search("smith", True), f"IX_{TABLE}_Search_Text"),
+        ("search two words", lambda: repository.search("kowalski pol", True), f"IX_{TABLE}_Search_Text"),
+        ("export by department", export, f"IX_{TABLE}_Department"),
+        ("payroll groupings", lambda: aggregate_server(connect, True), None),
+    ]
+
+
+def run_queries(connection, repeats):
+    results = []
+    for name, fn, _ in app_queries(connection, []):
+        fn()  # Warm the page cache
+        results.append((name, summarize(sample(fn, repeats))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query timings and plans before and after the schema migrations")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "schema.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, args.rows)
+    before = run_queries(connection, args.repeats)
+    for migration, seconds in migrate(connection, "sqlite"):
+        print(f"Applied {migration.version}: {migration.description} ({seconds:.1f} s)")
+    after = run_queries(connection, args.repeats)
+
+    print(f"\n{args.rows} rows, before / after migrating (p50 ms)")
+    print(f"{'query':<22} {'before':>9} {'after':>9} {'speedup':>8}")
+    for (name, old), (_, new) in zip(before, after):
+        print(f"{name:<22} {old['p50']:>9.2f} {new['p50']:>9.2f} {old['p50'] / new['p50']:>7.1f}x")
+    print("\nAfter migrating")
+    print(SUMMARY_HEADER)
+    for name, summary in after:
+        print(summary_line(name, summary))
+
+    print("\nQuery plans")
+    missing = 0
+    for name, fn, expected in app_queries(connection, log := []):
+        del log[:]
+        fn()
+        plan = [detail for query, params in log
+                for *_, detail in connection.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        uses = expected is None or any(expected in detail for detail in plan)
+        missing += not uses
+        print(f"{name}: {'ok' if uses else 'MISSING ' + expected}")
+        for detail in plan:
+            print(f"    {detail}")
+    print(f"\n{missing} queries not using their index")
+    connection.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Compare the SQL search path (LOWER(col) LIKE '%kw%' on every row) with the in-process
+# trigram SearchIndex on a synthetic Current_Employee table in a temporary SQLite stand-in.
+#
+#   python -m benchmarks.bench_search --sizes 100000 1000000
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from database import connect_sqlite
+from search_index import SearchIndex
+from synthetic_data import EMPLOYEE_FIELDS, seed_database
+
+SQL_SEARCH = f"""SELECT ID, {', '.join(EMPLOYEE_FIELDS)} FROM Current_Employee
+                 WHERE LOWER(Name) LIKE ? OR LOWER(Job_Titles) LIKE ? OR LOWER(Department) LIKE ?"""
+QUERIES = ["smith", "pol", "police officer", "kowalski james", "ee", "librarian", "zzz"]
+
+
+def median_ms(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def run(size, repeats):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, size)
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT ID, {', '.join(EMPLOYEE_FIELDS)} FROM Current_Employee")
+    rows = cursor.fetchall()
+
+    started = time.perf_counter()
+    index = SearchIndex.build(rows)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = []
+    for query in QUERIES:
+        def sql():
+            pattern = f"%{query}%"
+            cursor.execute(SQL_SEARCH, (pattern, pattern, pattern))
+            return cursor.fetchall()
+
+        results.append((query, len(sql()), len(index.search(query)),
+                        median_ms(sql, repeats), median_ms(lambda: index.search(query), repeats)))
+
+    # Incremental maintenance, as done for every synced or edited record
+    sample = rows[:1000]
+    started = time.perf_counter()
+    for row in sample:
+        index.add((row[0], row[1] + " X") + tuple(row[2:]))
+    update_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    connection.close()
+    os.remove(path)
+    return build_ms, update_us, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL LIKE vs. trigram index search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        build_ms, update_us, results = run(size, args.repeats)
+        print(f"\n{size} rows: index build {build_ms:.0f} ms, incremental update {update_us:.1f} us/row")
+        print(f"{'query':<18} {'sql rows':>9} {'idx rows':>9} {'sql ms':>9} {'index ms':>9} {'speed-up':>9}")
+        for query, sql_rows, index_rows, sql_ms, index_ms in results:
+            # Multi-word queries match each word anywhere, so they can find more than one LIKE
+            print(f"{query:<18} {sql_rows:>9} {index_rows:>9} {sql_ms:>9.2f} {index_ms:>9.3f} "
+                  f"{sql_ms / max(index_ms, 1e-6):>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
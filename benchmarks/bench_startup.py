@@ -0,0 +1,87 @@
+# Startup costs: importing the app module in a fresh interpreter (and which heavy modules that
+# leaves unloaded until needed), and the time from a successful login to the first page with a
+# cold connection pool and with one prewarmed while the login window was up. connect_ms adds a
+# delay to every connect to stand in for the network handshake to Azure SQL.
+#
+#   python -m benchmarks.bench_startup --connect-ms 150
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.timing import SUMMARY_HEADER, summarize, summary_line
+from database import MASKED_EMPLOYEE_COLUMNS, ConnectionPool, connect_sqlite
+from paged_view import KeysetPageSource
+from synthetic_data import seed_database
+
+# Modules the app only imports once they are used
+DEFERRED_MODULES = ("sv_ttk", "payroll_analytics", "numpy", "pypyodbc", "pyarrow")
+
+IMPORT_SCRIPT = f"""
+import sys, time
+started = time.perf_counter()
+import employment_management
+print(time.perf_counter() - started)
+print(",".join(name for name in {DEFERRED_MODULES!r} if name in sys.modules))
+"""
+
+
+# Import employment_management in a new interpreter, returns (seconds, deferred modules loaded)
+def import_app():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=root, check=True,
+                            capture_output=True, text=True).stdout.splitlines()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+def first_page(path, connect_ms, prewarm, page_size):
+    def connect():
+        time.sleep(connect_ms / 1000)
+        return connect_sqlite(path)
+
+    pool = ConnectionPool(connect, size=5, dialect="sqlite")
+    if prewarm:
+        pool.prewarm(2)  # Done while the login window is showing
+    source = KeysetPageSource(pool.acquire, MASKED_EMPLOYEE_COLUMNS, "Current_Employee", dialect="sqlite")
+    started = time.perf_counter()
+    source.fetch("after", None, page_size)
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--connect-ms", type=float, default=150)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    imports = [import_app() for _ in range(args.repeats)]
+    loaded = {name for _, modules in imports for name in modules.split(",") if name}
+    print(f"Deferred modules loaded by importing the app: {', '.join(sorted(loaded)) or 'none'}")
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, args.rows)
+    connection.close()
+    results = [
+        ("import app", summarize([seconds for seconds, _ in imports])),
+        ("first page, cold", summarize([first_page(path, args.connect_ms, False, args.page_size)
+                                        for _ in range(args.repeats)])),
+        ("first page, prewarmed", summarize([first_page(path, args.connect_ms, True, args.page_size)
+                                             for _ in range(args.repeats)])),
+    ]
+    os.remove(path)
+
+    print(f"\n{args.rows} rows, {args.connect_ms:.0f} ms per connect")
+    print(SUMMARY_HEADER)
+    for name, summary in results:
+        print(summary_line(name, summary))
+
+
+if __name__ == "__main__":
+    main()
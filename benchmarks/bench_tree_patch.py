@@ -0,0 +1,115 @@
+# Compare the two ways of showing a change in the Treeview after add/update/delete:
+# reloading the whole table (the old display_data() path) versus patching the one row.
+# Runs against a temporary SQLite stand-in and needs a display for Tk.
+#
+#   python -m benchmarks.bench_tree_patch --sizes 1000 10000 100000
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from database import connect_sqlite, insert_returning_id
+from synthetic_data import EMPLOYEE_FIELDS, generate_employees, seed_database
+
+SELECT_ALL = f"SELECT ID, {', '.join(EMPLOYEE_FIELDS)} FROM Current_Employee"
+UPDATE = f"UPDATE Current_Employee SET {', '.join(f'{c} = ?' for c in EMPLOYEE_FIELDS)} WHERE ID = ?"
+DELETE = "DELETE FROM Current_Employee WHERE ID = ?"
+
+
+# Old path: re-read every row and rebuild the Treeview
+def full_reload(connection, tree):
+    cursor = connection.cursor()
+    cursor.execute(SELECT_ALL)
+    rows = cursor.fetchall()
+    tree.delete(*tree.get_children())
+    for row in rows:
+        tree.insert("", tk.END, iid=str(row[0]), values=row)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run(size, repeats):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, size)
+    root = tk.Tk()
+    root.withdraw()
+    tree = ttk.Treeview(root, columns=("ID",) + EMPLOYEE_FIELDS, show="headings")
+    full_reload(connection, tree)
+    cursor = connection.cursor()
+    insert = insert_returning_id("sqlite", "Current_Employee", EMPLOYEE_FIELDS)
+    samples = {("insert", "reload"): [], ("insert", "patch"): [],
+               ("update", "reload"): [], ("update", "patch"): [],
+               ("delete", "reload"): [], ("delete", "patch"): []}
+    new_rows = generate_employees(repeats * 4, seed=size)
+
+    for _ in range(repeats):
+        for mode in ("reload", "patch"):
+            row = next(new_rows)
+
+            def do_insert():
+                cursor.execute(insert, row)
+                new_id = cursor.fetchone()[0]
+                connection.commit()
+                if mode == "reload":
+                    full_reload(connection, tree)
+                else:
+                    tree.insert("", tk.END, iid=str(new_id), values=(new_id,) + row)
+                return new_id
+
+            started = time.perf_counter()
+            new_id = do_insert()
+            samples[("insert", mode)].append(time.perf_counter() - started)
+
+            changed = next(new_rows)
+
+            def do_update():
+                cursor.execute(UPDATE, changed + (new_id,))
+                connection.commit()
+                if mode == "reload":
+                    full_reload(connection, tree)
+                else:
+                    tree.item(str(new_id), values=(new_id,) + changed)
+
+            samples[("update", mode)].append(timed(do_update))
+
+            def do_delete():
+                cursor.execute(DELETE, (new_id,))
+                connection.commit()
+                if mode == "reload":
+                    full_reload(connection, tree)
+                else:
+                    tree.delete(str(new_id))
+
+            samples[("delete", mode)].append(timed(do_delete))
+
+    root.destroy()
+    connection.close()
+    os.remove(path)
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treeview reload vs. patch benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'operation':<9} {'reload ms':>10} {'patch ms':>10} {'speed-up':>9}")
+    for size in args.sizes:
+        results = run(size, args.repeats)
+        for operation in ("insert", "update", "delete"):
+            reload = results[(operation, "reload")] * 1000
+            patch = results[(operation, "patch")] * 1000
+            print(f"{size:>8}  {operation:<9} {reload:>10.2f} {patch:>10.2f} {reload / patch:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
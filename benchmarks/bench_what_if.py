@@ -0,0 +1,65 @@
+# Salary what-if scenarios over the whole workforce: loading the salaries from the columnar cache
+# once, then pricing scenarios of one to a few rules with NumPy, a cached repeat, and the same
+# scenario priced by the plain Python loop used when NumPy is missing.
+#
+#   python -m benchmarks.bench_what_if --sizes 100000 1000000
+import argparse
+
+from benchmarks.timing import SUMMARY_HEADER, sample, summarize, summary_line
+from columnar_store import ColumnarTable
+from database import PUBLIC_EMPLOYEE_SCHEMA
+import salary_scenarios
+from salary_scenarios import Rule, Scenario, load_cache
+from synthetic_data import generate_employees
+
+SCENARIOS = [
+    Scenario("3% for everyone", [Rule("percent", 3)]),
+    Scenario("3% hourly, floor 20", [Rule("percent", 3, salary_or_hourly="HOURLY"),
+                                     Rule("floor", 20, salary_or_hourly="HOURLY")]),
+    Scenario("police raise, capped", [Rule("percent", 5, department="POLICE"),
+                                      Rule("cap", 150000, department="POLICE", salary_or_hourly="SALARY"),
+                                      Rule("floor", 50000, full_or_part_time="F", salary_or_hourly="SALARY")]),
+]
+
+
+def run(size, repeats):
+    rows = [(index + 1,) + row for index, row in enumerate(generate_employees(size))]
+    public = ColumnarTable.from_rows(PUBLIC_EMPLOYEE_SCHEMA, [row[:7] for row in rows])
+    sensitive = ColumnarTable.from_rows([("ID", "int"), ("Annual_Salary", "float"), ("Hourly_Rate", "float")],
+                                        [(row[0],) + tuple(row[7:]) for row in rows])
+    del rows
+
+    results = [("load salaries", sample(lambda: load_cache(public, sensitive), max(1, repeats // 2)))]
+    model = load_cache(public, sensitive)
+    for scenario in SCENARIOS:
+        def price(scenario=scenario):
+            model._results.clear()  # Price it every time rather than hitting the cache
+            return model.evaluate(scenario)
+        results.append((scenario.name, sample(price, repeats)))
+    model.evaluate(SCENARIOS[-1])
+    results.append(("cached repeat", sample(lambda: model.evaluate(SCENARIOS[-1]), repeats)))
+
+    numpy_module, salary_scenarios.np = salary_scenarios.np, None
+    slow = load_cache(public, sensitive)
+    results.append(("python loop", sample(lambda: slow._evaluate_python(SCENARIOS[-1]), max(1, repeats // 5))))
+    salary_scenarios.np = numpy_module
+    return [(name, summarize(samples)) for name, samples in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Salary what-if scenario benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    if salary_scenarios.np is None:
+        print("numpy is not installed, every row falls back to the Python loop")
+
+    for size in args.sizes:
+        print(f"\n{size} rows")
+        print(SUMMARY_HEADER)
+        for name, summary in run(size, args.repeats):
+            print(summary_line(name, summary))
+
+
+if __name__ == "__main__":
+    main()
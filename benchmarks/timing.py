@@ -0,0 +1,41 @@
+# Shared timing helpers for the benchmark scripts
+import statistics
+import time
+
+
+# Run fn() repeats times and return the duration of each call in seconds
+def sample(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# Value below which the given fraction of the sorted samples fall (nearest rank)
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+# Latency percentiles in ms and throughput in operations per second
+def summarize(samples):
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "p50": percentile(ordered, 0.50) * 1000,
+        "p95": percentile(ordered, 0.95) * 1000,
+        "p99": percentile(ordered, 0.99) * 1000,
+        "max": ordered[-1] * 1000,
+        "mean": statistics.fmean(ordered) * 1000,
+        "ops": len(ordered) / total if total else 0.0,
+    }
+
+
+SUMMARY_HEADER = f"{'operation':<22} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'ops/s':>9}"
+
+
+def summary_line(name, summary):
+    return (f"{name:<22} {summary['count']:>6} {summary['p50']:>9.3f} {summary['p95']:>9.3f} "
+            f"{summary['p99']:>9.3f} {summary['max']:>9.3f} {summary['ops']:>9.0f}")
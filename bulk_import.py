@@ -0,0 +1,153 @@
+import argparse  # Headless command line
+import csv  # Streamed CSV input
+import logging  # For logging to file and console
+import time  # Throughput
+
+from validation import ValidationError, prepare_new_employee
+
+INSERT_COLUMNS = ("Name", "Job_Titles", "Department", "Full_or_Part_Time",
+                  "Salary_or_Hourly", "Typical_Hours", "Annual_Salary", "Hourly_Rate")
+INSERT_QUERY = (f"INSERT INTO Current_Employee ({', '.join(INSERT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})")
+
+# CSV headers accepted for each column: database names and the headings shown in the app
+HEADER_ALIASES = {
+    "name": "Name",
+    "job_titles": "Job_Titles", "job_title": "Job_Titles", "job titles": "Job_Titles",
+    "job title": "Job_Titles",
+    "department": "Department",
+    "full_or_part_time": "Full_or_Part_Time", "full/part-time": "Full_or_Part_Time",
+    "salary_or_hourly": "Salary_or_Hourly", "salary/hourly": "Salary_or_Hourly",
+    "typical_hours": "Typical_Hours", "typical hours": "Typical_Hours",
+    "annual_salary": "Annual_Salary", "annual salary": "Annual_Salary",
+    "hourly_rate": "Hourly_Rate", "hourly rate": "Hourly_Rate",
+}
+
+
+# Outcome of a bulk import
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.errors = []  # (CSV line number, error title, message)
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"Read {self.read} rows, inserted {self.inserted}, rejected {len(self.errors)} "
+                f"in {self.elapsed:.1f} s ({self.rows_per_second:.0f} rows/s)")
+
+
+# Stream (line number, record) pairs from a CSV file, mapping its headers to column names
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        columns = {}
+        for header in reader.fieldnames or []:
+            column = HEADER_ALIASES.get(header.strip().lower())
+            if column:
+                columns[header] = column
+        missing = set(INSERT_COLUMNS) - set(columns.values())
+        if missing:
+            raise ValueError(f"CSV file is missing columns: {', '.join(sorted(missing))}")
+        for record in reader:
+            yield reader.line_num, {column: record[header] or "" for header, column in columns.items()}
+
+
+# Validate records with the same rules as add_data and insert them in batches with executemany.
+# Each batch is one transaction. Rows that fail validation, or that the database rejects when
+# the batch is retried row by row, are reported without stopping the import. With
+# single_transaction everything is committed at the end and any database error rolls it all back.
+def import_employees(records, connect, batch_size=1000, single_transaction=False, on_progress=None):
+    report = ImportReport()
+    started = time.perf_counter()
+    connection = connect()
+    try:
+        cursor = connection.cursor()
+        batch = []  # (line number, parameters)
+        for line_number, record in records:
+            report.read += 1
+            try:
+                batch.append((line_number, prepare_new_employee(*(record[c] for c in INSERT_COLUMNS))))
+            except ValidationError as e:
+                report.errors.append((line_number, e.title, e.message))
+            if len(batch) >= batch_size:
+                _insert_batch(connection, cursor, batch, report, single_transaction)
+                batch = []
+                report.elapsed = time.perf_counter() - started
+                if on_progress:
+                    on_progress(report)
+        if batch:
+            _insert_batch(connection, cursor, batch, report, single_transaction)
+        if single_transaction:
+            connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    report.elapsed = time.perf_counter() - started
+    if on_progress:
+        on_progress(report)
+    return report
+
+
+def _insert_batch(connection, cursor, batch, report, single_transaction):
+    report.batches += 1
+    try:
+        cursor.executemany(INSERT_QUERY, [params for _, params in batch])
+    except Exception as e:
+        if single_transaction:
+            raise
+        logging.error(f"Bulk import batch failed, retrying row by row: {e}")
+        connection.rollback()
+        # Find the offending rows so the rest of the batch still goes in
+        for line_number, params in batch:
+            try:
+                cursor.execute(INSERT_QUERY, params)
+                connection.commit()
+                report.inserted += 1
+            except Exception as row_error:
+                connection.rollback()
+                report.errors.append((line_number, "Insert Error", str(row_error)))
+        return
+    if not single_transaction:
+        connection.commit()
+    report.inserted += len(batch)
+
+
+# Headless entry point: python bulk_import.py employees.csv
+def main():
+    from dotenv import load_dotenv  # To load environment variables from a .env file
+    from database import create_pool
+
+    parser = argparse.ArgumentParser(description="Bulk import employees from a CSV file.")
+    parser.add_argument("csv_file")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--single-transaction", action="store_true",
+                        help="commit once at the end and roll everything back on a database error")
+    args = parser.parse_args()
+
+    load_dotenv()
+    pool = create_pool()
+    try:
+        report = import_employees(read_csv(args.csv_file), pool.acquire, args.batch_size,
+                                  args.single_transaction,
+                                  on_progress=lambda r: print(r.summary(), flush=True))
+    except Exception as e:
+        logging.error(f"Bulk import of {args.csv_file} failed: {e}")
+        print(f"Import failed, nothing was committed from the failing batch on: {e}")
+        return 2
+    finally:
+        pool.close()
+    for line_number, title, message in report.errors:
+        print(f"line {line_number}: {title}: {message}")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+import time  # Chunk timing
+
+from instrumentation import metrics
+
+
+# Fills a Treeview with a large result set a chunk at a time so Tk keeps painting.
+#
+# The first chunk is inserted straight away so the first screen shows at once, the rest are
+# scheduled with after(). Each chunk is timed and the next chunk is resized to fit in budget_ms.
+# A new render() cancels the one in progress, and rows still waiting to be inserted can be
+# dropped or replaced so edits made meanwhile are not overwritten. project turns a row into
+# the values shown and tags, when given, into its Treeview tags, both applied as each row is inserted.
+class ChunkedTreeRenderer:
+    def __init__(self, tree, budget_ms=16, first_chunk=200, min_chunk=50, max_chunk=5000,
+                 operation="search", project=tuple, tags=None):
+        self.tree = tree
+        self.project = project
+        self.tags = tags
+        self.budget = budget_ms / 1000
+        self.first_chunk = first_chunk
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.operation = operation  # Name the chunks are recorded under in the metrics
+        self.chunk_size = first_chunk  # Carries over between renders
+        self.renders = 0
+        self.chunks = 0
+        self.cancelled = 0
+        self.last_first_chunk = 0.0  # Seconds until the first rows were on screen
+        self.last_duration = 0.0  # Seconds from render() to the last row
+        self._rows = []
+        self._next = 0
+        self._pending = None
+        self._started = 0.0
+        self._on_done = None
+
+    @property
+    def rendering(self):
+        return self._pending is not None
+
+    # Replace the Treeview contents with rows, on_done() runs once the last row is in
+    def render(self, rows, on_done=None):
+        self.cancel()
+        self.renders += 1
+        self._rows = list(rows)
+        self._next = 0
+        self._on_done = on_done
+        self._started = time.perf_counter()
+        self.tree.delete(*self.tree.get_children())
+        self._step(first=True)
+
+    # Stop inserting, the rows already in the Treeview stay
+    def cancel(self):
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+            self.cancelled += 1
+        self._rows = []
+        self._next = 0
+        self._on_done = None
+
+    # Drop rows that have not been inserted yet, e.g. when a narrowed search no longer shows them
+    def discard(self, keys):
+        if self._next < len(self._rows):
+            keys = {str(key) for key in keys}
+            self._rows = [row for row in self._rows[self._next:] if str(row[0]) not in keys]
+            self._next = 0
+
+    # Use the latest values for a row that has not been inserted yet
+    def update(self, row):
+        iid = str(row[0])
+        for index in range(self._next, len(self._rows)):
+            if str(self._rows[index][0]) == iid:
+                self._rows[index] = tuple(row)
+                return
+
+    def _step(self, first=False):
+        self._pending = None
+        end = min(self._next + self.chunk_size, len(self._rows))
+        with metrics.span("render", self.operation) as span:
+            tags = self.tags
+            for row in self._rows[self._next:end]:
+                self.tree.insert("", "end", iid=str(row[0]), values=self.project(row),
+                                 tags=tags(row) if tags else ())
+            span.rows = end - self._next
+        self.chunks += 1
+        if first:
+            self.last_first_chunk = time.perf_counter() - self._started
+        self._resize(span.duration, span.rows)
+        self._next = end
+        if self._next < len(self._rows):
+            self._pending = self.tree.after(1, self._step)  # Let Tk repaint and handle input first
+            return
+        self.last_duration = time.perf_counter() - self._started
+        self._rows = []
+        self._next = 0
+        on_done, self._on_done = self._on_done, None
+        if on_done:
+            on_done()
+
+    # Aim the next chunk at the frame budget, moving halfway there to smooth out noisy timings
+    def _resize(self, duration, count):
+        if count < self.chunk_size or duration <= 0:
+            return
+        target = int(count * self.budget / duration)
+        self.chunk_size = max(self.min_chunk, min(self.max_chunk, (self.chunk_size + target) // 2))
+
+    def stats(self):
+        return {"renders": self.renders, "chunks": self.chunks, "cancelled": self.cancelled,
+                "chunk_size": self.chunk_size, "last_first_chunk": self.last_first_chunk,
+                "last_duration": self.last_duration}
@@ -0,0 +1,276 @@
+import threading  # Rows are read from worker threads while the Tk thread applies changes
+from array import array
+from bisect import bisect_left
+
+NULL_INT = -2 ** 63  # Stands for None in nullable integer columns, floats use NaN
+
+
+# Whole numbers; nullable ones keep None as NULL_INT
+class IntColumn:
+    def __init__(self, nullable=False, data=None):
+        self.nullable = nullable
+        self.data = array("q") if data is None else data
+
+    def append(self, value):
+        self.data.append(NULL_INT if value is None else int(value))
+
+    def get(self, position):
+        value = self.data[position]
+        return None if value == NULL_INT and self.nullable else value
+
+    def take(self, positions):
+        return IntColumn(self.nullable, array("q", map(self.data.__getitem__, positions)))
+
+    def copy(self):
+        return IntColumn(self.nullable, self.data[:])
+
+    def nbytes(self):
+        return self.data.buffer_info()[1] * self.data.itemsize
+
+
+# Floating point numbers, None is kept as NaN
+class FloatColumn:
+    def __init__(self, data=None):
+        self.data = array("d") if data is None else data
+
+    def append(self, value):
+        self.data.append(float("nan") if value is None else float(value))
+
+    def get(self, position):
+        value = self.data[position]
+        return None if value != value else value
+
+    def take(self, positions):
+        return FloatColumn(array("d", map(self.data.__getitem__, positions)))
+
+    def copy(self):
+        return FloatColumn(self.data[:])
+
+    def nbytes(self):
+        return self.data.buffer_info()[1] * self.data.itemsize
+
+
+# Dictionary-encoded strings: each distinct value is stored once and rows hold a 4-byte code
+class CategoryColumn:
+    def __init__(self, values=None, codes=None):
+        self.values = [] if values is None else values  # Code -> value
+        self.lookup = {value: code for code, value in enumerate(self.values)}
+        self.codes = array("I") if codes is None else codes
+
+    def append(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def get(self, position):
+        return self.values[self.codes[position]]
+
+    def take(self, positions):
+        return CategoryColumn(self.values, array("I", map(self.codes.__getitem__, positions)))
+
+    def copy(self):
+        return CategoryColumn(list(self.values), self.codes[:])
+
+    def nbytes(self):
+        return (self.codes.buffer_info()[1] * self.codes.itemsize +
+                sum(len(value) + 49 for value in self.values if isinstance(value, str)))
+
+
+# Free text such as names, kept as a plain list of strings
+class TextColumn:
+    def __init__(self, data=None):
+        self.data = [] if data is None else data
+
+    def append(self, value):
+        self.data.append(value)
+
+    def get(self, position):
+        return self.data[position]
+
+    def take(self, positions):
+        return TextColumn(list(map(self.data.__getitem__, positions)))
+
+    def copy(self):
+        return TextColumn(list(self.data))
+
+    def nbytes(self):
+        return 8 * len(self.data) + sum(len(value) + 49 for value in self.data if isinstance(value, str))
+
+
+COLUMN_KINDS = {
+    "int": lambda: IntColumn(),
+    "nullable_int": lambda: IntColumn(nullable=True),
+    "float": FloatColumn,
+    "category": CategoryColumn,
+    "text": TextColumn,
+}
+
+
+# Read-only view of one stored row, indexable like the tuple it replaces.
+# Rows are never changed in place, so a view keeps showing the row it was created for.
+class RowView:
+    __slots__ = ("_columns", "_position")
+
+    def __init__(self, columns, position):
+        self._columns = columns
+        self._position = position
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(column.get(self._position) for column in self._columns[index])
+        return self._columns[index].get(self._position)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __iter__(self):
+        position = self._position
+        return (column.get(position) for column in self._columns)
+
+    def __eq__(self, other):
+        if not isinstance(other, (RowView, tuple)):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"RowView{tuple(self)!r}"
+
+
+# Column-oriented table of rows keyed by their first column, a compact stand-in for a
+# dict of ID -> row tuple. schema lists (column name, kind) pairs, kinds are the keys of
+# COLUMN_KINDS. Rows are appended and never changed in place: replacing or removing a row
+# leaves the old copy behind until compact() rebuilds the columns, which happens on its own
+# once more than half the stored rows are stale. The key index is a sorted array of keys with
+# a parallel array of positions, -1 marking a removed key.
+class ColumnarTable:
+    def __init__(self, schema):
+        self.schema = list(schema)
+        self.names = [name for name, _ in self.schema]
+        self._columns = [COLUMN_KINDS[kind]() for _, kind in self.schema]
+        self._keys = array("q")
+        self._positions = array("q")
+        self._live = 0
+        self._stored = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, schema, rows):
+        table = cls(schema)
+        rows = sorted(rows, key=lambda row: row[0])
+        for row in rows:
+            table._append_row(row)
+        table._keys = array("q", (row[0] for row in rows))
+        table._positions = array("q", range(len(rows)))
+        table._live = len(rows)
+        return table
+
+    def _append_row(self, row):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self._stored += 1
+        return self._stored - 1
+
+    def _find(self, key):
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return index
+        return -1
+
+    def get(self, key, default=None):
+        with self._lock:
+            index = self._find(key)
+            if index < 0 or self._positions[index] < 0:
+                return default
+            return RowView(self._columns, self._positions[index])
+
+    def put(self, row):
+        key = row[0]
+        with self._lock:
+            position = self._append_row(row)
+            index = self._find(key)
+            if index >= 0:
+                if self._positions[index] < 0:
+                    self._live += 1
+                self._positions[index] = position
+            else:
+                index = bisect_left(self._keys, key)
+                self._keys.insert(index, key)
+                self._positions.insert(index, position)
+                self._live += 1
+        self._maybe_compact()
+
+    def __setitem__(self, key, row):
+        if row[0] != key:
+            raise KeyError(f"Row key {row[0]} does not match {key}")
+        self.put(row)
+
+    # Remove a row and return it, or default when the key is not stored
+    def pop(self, key, default=None):
+        with self._lock:
+            index = self._find(key)
+            if index < 0 or self._positions[index] < 0:
+                return default
+            row = RowView(self._columns, self._positions[index])
+            self._positions[index] = -1
+            self._live -= 1
+        self._maybe_compact()
+        return row
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self._live
+
+    # Keys in ascending order
+    def __iter__(self):
+        with self._lock:
+            keys, positions = self._keys, self._positions
+            return iter([key for key, position in zip(keys, positions) if position >= 0])
+
+    def keys(self):
+        return iter(self)
+
+    # Views of every row in key order
+    def values(self):
+        with self._lock:
+            columns = self._columns
+            return [RowView(columns, position) for position in self._positions if position >= 0]
+
+    # Values of one column for every row in key order
+    def column(self, name):
+        with self._lock:
+            column = self._columns[self.names.index(name)]
+            return [column.get(position) for position in self._positions if position >= 0]
+
+    # Consistent copies of the key index and of the named columns, for bulk work such as
+    # vectorised aggregation on another thread: (keys, positions, {name: column}). keys and
+    # positions are arrays in key order with -1 positions for removed keys.
+    def export_columns(self, names):
+        with self._lock:
+            return (self._keys[:], self._positions[:],
+                    {name: self._columns[self.names.index(name)].copy() for name in names})
+
+    # Rebuild the columns with only the live rows. Views taken before keep the old columns.
+    def compact(self):
+        with self._lock:
+            live = [(key, position) for key, position in zip(self._keys, self._positions) if position >= 0]
+            positions = [position for _, position in live]
+            self._columns = [column.take(positions) for column in self._columns]
+            self._keys = array("q", (key for key, _ in live))
+            self._positions = array("q", range(len(live)))
+            self._stored = len(live)
+
+    def _maybe_compact(self):
+        if self._stored > 1024 and self._stored > 2 * self._live:
+            self.compact()
+
+    # Approximate bytes held by the columns and the key index
+    def memory_usage(self):
+        return (sum(column.nbytes() for column in self._columns) +
+                (self._keys.buffer_info()[1] + self._positions.buffer_info()[1]) * 8)
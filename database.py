@@ -0,0 +1,409 @@
+import os  # For environment variables
+import sqlite3  # Local stand-in for Azure SQL
+import threading  # Pool lock and condition variable
+import time  # Idle timeout, recycling and wait-time stats
+import logging  # For logging to file and console
+import zlib  # CRC used to emulate SQL Server checksums on SQLite
+
+
+# Employee columns, with the sensitive ones replaced by '****' when masked
+EMPLOYEE_COLUMN_NAMES = ["ID", "Name", "Job_Titles", "Department", "Full_or_Part_Time",
+                         "Salary_or_Hourly", "Typical_Hours", "Annual_Salary", "Hourly_Rate"]
+EMPLOYEE_COLUMNS = ", ".join(EMPLOYEE_COLUMN_NAMES)
+MASKED_EMPLOYEE_COLUMNS = "ID, Name, Job_Titles, Department, Full_or_Part_Time, Salary_or_Hourly, Typical_Hours, '****' AS Annual_Salary, '****' AS Hourly_Rate"
+
+# Columns that are only read after login, and the rest of the row
+SENSITIVE_COLUMN_NAMES = ["Annual_Salary", "Hourly_Rate"]
+PUBLIC_EMPLOYEE_COLUMN_NAMES = EMPLOYEE_COLUMN_NAMES[:7]
+
+# How each column is held in a columnar_store.ColumnarTable: low-cardinality text is
+# dictionary-encoded, numbers go in typed arrays
+EMPLOYEE_SCHEMA = [("ID", "int"), ("Name", "text"), ("Job_Titles", "category"),
+                   ("Department", "category"), ("Full_or_Part_Time", "category"),
+                   ("Salary_or_Hourly", "category"), ("Typical_Hours", "nullable_int"),
+                   ("Annual_Salary", "float"), ("Hourly_Rate", "float")]
+PUBLIC_EMPLOYEE_SCHEMA = EMPLOYEE_SCHEMA[:7]
+
+
+# Raised when a database connection cannot be obtained
+class DatabaseConnectionError(Exception):
+    pass
+
+
+# Raised when a connection is requested from a pool that has been shut down
+class PoolClosedError(DatabaseConnectionError):
+    pass
+
+
+# Raised when no connection became free before the acquire timeout
+class PoolTimeoutError(DatabaseConnectionError):
+    pass
+
+
+# Connect to Azure SQL through ODBC
+def connect_odbc():
+    import pypyodbc as pyodbc  # Use pypyodbc for compatibility with ARM64
+
+    return pyodbc.connect(
+        f"DRIVER={{ODBC Driver 18 for SQL Server}};"
+        f"SERVER={os.getenv('DB_SERVER')};"
+        f"DATABASE={os.getenv('DB_NAME')};"
+        f"UID={os.getenv('DB_USER')};"
+        f"PWD={os.getenv('DB_PASSWORD')};"
+        f"Encrypt=yes;"  # Encrypt connection
+    )
+
+
+# SQLite stand-in for SQL Server's BINARY_CHECKSUM(col, ...)
+def _binary_checksum(*values):
+    return zlib.crc32(repr(values).encode("utf-8")) - 2 ** 31
+
+
+# SQLite stand-in for SQL Server's CHECKSUM_AGG(...), an order-independent XOR
+class _ChecksumAgg:
+    def __init__(self):
+        self.total = 0
+
+    def step(self, value):
+        if value is not None:
+            self.total ^= value
+
+    def finalize(self):
+        return self.total
+
+
+# Connect to a local SQLite database laid out like Current_Employee
+def connect_sqlite(path="employees.db"):
+    # Pooled connections are handed between threads, the pool serialises their use
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.create_function("BINARY_CHECKSUM", -1, _binary_checksum, deterministic=True)
+    connection.create_aggregate("CHECKSUM_AGG", 1, _ChecksumAgg)
+    connection.execute(
+        """CREATE TABLE IF NOT EXISTS Current_Employee (
+               ID INTEGER PRIMARY KEY AUTOINCREMENT,
+               Name TEXT,
+               Job_Titles TEXT,
+               Department TEXT,
+               Full_or_Part_Time TEXT,
+               Salary_or_Hourly TEXT,
+               Typical_Hours INTEGER,
+               Annual_Salary REAL,
+               Hourly_Rate REAL
+           )"""
+    )
+    connection.commit()
+    return connection
+
+
+# A raw connection plus the bookkeeping the pool needs to expire it
+class _PoolEntry:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+# Connection handed out by the pool, close() returns it instead of disconnecting
+class PooledConnection:
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def cursor(self):
+        return self._entry.raw.cursor()
+
+    def commit(self):
+        self._entry.raw.commit()
+
+    def rollback(self):
+        self._entry.raw.rollback()
+
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise AttributeError(f"Connection already returned to the pool: {name}")
+        return getattr(self._entry.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Fixed-size pool of long-lived connections
+class ConnectionPool:
+    def __init__(self, factory, size=5, idle_timeout=300.0, max_lifetime=1800.0,
+                 acquire_timeout=30.0, health_check_interval=5.0,
+                 health_check_query="SELECT 1", dialect="mssql"):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.size = size
+        self.idle_timeout = idle_timeout  # Close connections unused for this long
+        self.max_lifetime = max_lifetime  # Recycle connections older than this
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval  # Re-check after this much idle time
+        self.health_check_query = health_check_query
+        self.dialect = dialect
+        self._factory = factory
+        self._idle = []  # LIFO so the most recently used connection is reused first
+        self._open = 0  # Idle plus checked out
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {
+            "hits": 0,  # Served from an idle connection
+            "misses": 0,  # Had to open a new connection
+            "waits": 0,  # Had to wait for another caller to release one
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "acquire_time": 0.0,  # Total time spent inside acquire(), including connects
+            "connect_time": 0.0,
+            "health_check_failures": 0,
+            "idle_expired": 0,
+            "recycled": 0,
+            "prewarmed": 0,  # Opened ahead of demand by prewarm()
+            "prewarm_time": 0.0,
+        }
+
+    # Take a connection from the pool, opening a new one if below size
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        while True:
+            entry = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Connection pool has been shut down.")
+                    entry = self._take_idle()
+                    if entry is not None or self._open < self.size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection became free within {timeout} seconds.")
+                    waited = True
+                    self._condition.wait(remaining)
+                if entry is None:
+                    self._open += 1  # Reserve the slot before connecting outside the lock
+
+            if entry is not None:
+                if self._is_healthy(entry):
+                    self._record_acquire("hits", started, waited)
+                    return PooledConnection(self, entry)
+                self._discard(entry, "health_check_failures")
+                continue  # Try the next idle connection or open a fresh one
+
+            connect_started = time.monotonic()
+            try:
+                entry = _PoolEntry(self._factory())
+            except Exception as e:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise DatabaseConnectionError(e) from e
+            with self._condition:
+                self._stats["connect_time"] += time.monotonic() - connect_started
+            self._record_acquire("misses", started, waited)
+            return PooledConnection(self, entry)
+
+    # Open connections ahead of demand until count (at most size) are open, e.g. while the login
+    # window is showing, so the first queries find them idle. Returns how many were opened.
+    def prewarm(self, count=1):
+        opened = 0
+        while True:
+            with self._condition:
+                if self._closed or self._open >= min(count, self.size):
+                    return opened
+                self._open += 1  # Reserve the slot before connecting outside the lock
+            connect_started = time.monotonic()
+            try:
+                entry = _PoolEntry(self._factory())
+            except Exception as e:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise DatabaseConnectionError(e) from e
+            with self._condition:
+                if not self._closed:
+                    self._stats["prewarmed"] += 1
+                    self._stats["prewarm_time"] += time.monotonic() - connect_started
+                    self._idle.append(entry)
+                    self._condition.notify()
+                    entry = None
+                else:
+                    self._open -= 1
+            if entry is not None:
+                self._close_raw(entry)
+                return opened
+            opened += 1
+
+    # Shut the pool down, closing idle connections now and busy ones on release
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            self._close_raw(entry)
+
+    # Close idle connections that have passed their idle timeout or lifetime
+    def prune(self):
+        expired = []
+        with self._condition:
+            now = time.monotonic()
+            keep = []
+            for entry in self._idle:
+                reason = self._expiry_reason(entry, now)
+                if reason:
+                    self._stats[reason] += 1
+                    expired.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._open -= len(expired)
+            if expired:
+                self._condition.notify_all()
+        for entry in expired:
+            self._close_raw(entry)
+        return len(expired)
+
+    # Snapshot of pool counters for diagnostics
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / requests if requests else 0.0
+        stats["avg_acquire_time"] = stats["acquire_time"] / requests if requests else 0.0
+        stats["avg_wait_time"] = stats["wait_time"] / stats["waits"] if stats["waits"] else 0.0
+        stats["avg_connect_time"] = stats["connect_time"] / stats["misses"] if stats["misses"] else 0.0
+        return stats
+
+    # Return a connection handed out by acquire()
+    def _release(self, entry):
+        try:
+            entry.raw.rollback()  # Never hand the next caller an open transaction
+        except Exception as e:
+            logging.error(f"Discarding pooled connection after failed rollback: {e}")
+            self._discard(entry)
+            return
+        with self._condition:
+            now = time.monotonic()
+            if not self._closed and now - entry.created_at < self.max_lifetime:
+                entry.last_used = now
+                self._idle.append(entry)
+                self._condition.notify()
+                return
+            if not self._closed:
+                self._stats["recycled"] += 1
+            self._open -= 1
+            self._condition.notify()
+        self._close_raw(entry)
+
+    # Pop the most recently used idle connection that has not expired
+    def _take_idle(self):
+        now = time.monotonic()
+        while self._idle:
+            entry = self._idle.pop()
+            reason = self._expiry_reason(entry, now)
+            if not reason:
+                return entry
+            self._stats[reason] += 1
+            self._open -= 1
+            # Closing can block on the network, so hand it to a short-lived thread
+            threading.Thread(target=self._close_raw, args=(entry,), daemon=True).start()
+        return None
+
+    def _expiry_reason(self, entry, now):
+        if now - entry.last_used > self.idle_timeout:
+            return "idle_expired"
+        if now - entry.created_at > self.max_lifetime:
+            return "recycled"
+        return None
+
+    def _is_healthy(self, entry):
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = entry.raw.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logging.error(f"Pooled connection failed health check: {e}")
+            return False
+
+    def _discard(self, entry, reason=None):
+        with self._condition:
+            if reason:
+                self._stats[reason] += 1
+            self._open -= 1
+            self._condition.notify()
+        self._close_raw(entry)
+
+    def _record_acquire(self, outcome, started, waited):
+        elapsed = time.monotonic() - started
+        with self._condition:
+            self._stats[outcome] += 1
+            self._stats["acquire_time"] += elapsed
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time"] += elapsed
+                self._stats["max_wait_time"] = max(self._stats["max_wait_time"], elapsed)
+
+    @staticmethod
+    def _close_raw(entry):
+        try:
+            entry.raw.close()
+        except Exception as e:
+            logging.error(f"Error closing pooled connection: {e}")
+
+
+# Build a "first N rows" query in the dialect's syntax (TOP for SQL Server, LIMIT for SQLite)
+def select_top(dialect, select_list, rest, limit):
+    if dialect == "sqlite":
+        return f"SELECT {select_list} {rest} LIMIT {int(limit)}"
+    return f"SELECT TOP {int(limit)} {select_list} {rest}"
+
+
+# Build an INSERT that returns the new identity value as a one-row result set
+def insert_returning_id(dialect, table, columns, key_column="ID"):
+    placeholders = ", ".join("?" for _ in columns)
+    column_list = ", ".join(columns)
+    if dialect == "sqlite":
+        return f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}) RETURNING {key_column}"
+    return f"INSERT INTO {table} ({column_list}) OUTPUT INSERTED.{key_column} VALUES ({placeholders})"
+
+
+# Build the application pool from environment variables
+def create_pool():
+    backend = os.getenv("DB_BACKEND", "mssql").lower()
+    if backend == "sqlite":
+        path = os.getenv("DB_SQLITE_PATH", "employees.db")
+        factory = lambda: connect_sqlite(path)
+        dialect = "sqlite"
+    else:
+        factory = connect_odbc
+        dialect = "mssql"
+    return ConnectionPool(
+        factory,
+        size=int(os.getenv("DB_POOL_SIZE", "5")),
+        idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+        max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        acquire_timeout=float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30")),
+        dialect=dialect,
+    )
@@ -0,0 +1,130 @@
+import difflib  # Similarity of names that are not spelled the same
+import re  # Punctuation in names
+from collections import defaultdict
+
+DEFAULT_WINDOW = 5  # Neighbouring names compared in each block
+DEFAULT_THRESHOLD = 0.85  # Similarity at which two differently spelled names count as one
+
+_SOUNDEX_CODES = {letter: str(digit) for digit, letters in
+                  enumerate(("AEIOUYHW", "BFPV", "CGJKQSXZ", "DT", "L", "MN", "R")) for letter in letters}
+
+
+# Name as add_data() stores it: "LAST FIRST", upper-cased. Upper-case names are taken to be stored
+# that way already. update_data() stores what was typed, so names in any other case are taken to
+# be typed "First Last" and reversed.
+def stored_name(name):
+    name = name or ""
+    parts = name.split()
+    if name == name.upper():
+        return " ".join(parts)
+    return " ".join(parts[::-1]).upper()
+
+
+# American Soundex code of a word: first letter and three digits for the consonant sounds after it
+def soundex(word):
+    word = re.sub(r"[^A-Z]", "", word.upper())
+    if not word:
+        return ""
+    code, previous = word[0], _SOUNDEX_CODES.get(word[0], "")
+    for letter in word[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit not in ("0", previous):
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "HW":  # H and W do not separate letters with the same code
+            previous = digit
+    return code.ljust(4, "0")
+
+
+# A group of rows that look like the same employee: same department and names that sound alike
+# and are spelled the same or nearly so. score is 1.0 when every name normalises the same.
+class DuplicateGroup:
+    def __init__(self, rows, score):
+        self.rows = sorted(rows, key=lambda row: row[0])
+        self.score = score
+
+    @property
+    def department(self):
+        return self.rows[0][3]
+
+    @property
+    def keys(self):
+        return [row[0] for row in self.rows]
+
+
+# Find groups of likely duplicate employees in rows of (ID, Name, Job_Titles, Department, ...).
+#
+# Comparing every pair is quadratic. Instead rows are split by department, and rows whose names
+# normalise the same are grouped outright. The distinct names of a department are then compared
+# in two sorted-neighbourhood passes, each name only with the next window - 1 names, joining
+# groups whose names are at least threshold similar:
+#   1. within blocks of the same sorted Soundex codes, which puts "SMITH JOHN", "John Smith" and
+#      "SMYTH JOHN" together however far apart they sort,
+#   2. in alphabetical order, for typos that change a Soundex code but not the start of the name.
+def find_duplicates(rows, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    names = {}  # Name as stored -> (match name, phonetic key), most names repeat
+    departments = defaultdict(lambda: defaultdict(list))  # Department -> match name -> rows
+    phonetic = {}  # Match name -> phonetic key
+    for row in rows:
+        name = row[1]
+        known = names.get(name)
+        if known is None:
+            words = sorted(re.sub(r"[^A-Z ]", "", stored_name(name)).split())
+            known = names[name] = (" ".join(words), tuple(sorted(map(soundex, words))))
+            phonetic[known[0]] = known[1]
+        if known[0]:
+            departments[" ".join((row[3] or "").upper().split())][known[0]].append(row)
+
+    groups = []
+    for department in departments.values():
+        ordered = sorted(department)
+        parent = {name: name for name in ordered}
+        scores = {}  # Group root -> lowest similarity that joined it
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        def compare(sorted_names):
+            for index, name in enumerate(sorted_names):
+                for other in sorted_names[index + 1:index + window]:
+                    root, other_root = find(name), find(other)
+                    if root == other_root:
+                        continue
+                    score = difflib.SequenceMatcher(None, name, other).ratio()
+                    if score >= threshold:
+                        parent[other_root] = root
+                        scores[root] = min(score, scores.get(root, 1.0), scores.pop(other_root, 1.0))
+
+        blocks = defaultdict(list)
+        for name in ordered:
+            blocks[phonetic[name]].append(name)
+        for block in blocks.values():
+            compare(block)
+        compare(ordered)
+        members = defaultdict(list)
+        for name in ordered:
+            members[find(name)].extend(department[name])
+        for root, matched in members.items():
+            if len(matched) > 1:
+                groups.append(DuplicateGroup(matched, scores.get(root, 1.0)))
+    groups.sort(key=lambda group: (-group.score, -len(group.rows), group.rows[0][0]))
+    return groups
+
+
+# (updates, deletes) for EmployeeRepository.apply_changes() that merge a group into the row with
+# ID survivor: it is normalised the way add_data() stores a new record and the others are deleted.
+# pay is the survivor's (Annual_Salary, Hourly_Rate).
+def merge_changes(group, survivor, pay):
+    _, name, job_title, department, full_or_part_time, salary_or_hourly, hours = next(
+        row for row in group.rows if row[0] == survivor)[:7]
+    update = (survivor, stored_name(name), _upper(job_title), _upper(department), _upper(full_or_part_time),
+              salary_or_hourly, hours) + tuple(pay)
+    return [update], [key for key in group.keys if key != survivor]
+
+
+def _upper(value):
+    return value if value is None else value.strip().upper()
@@ -0,0 +1,79 @@
+from sensitive_store import MASKED_VALUES
+
+# Treeview tags for rows with a staged change
+PENDING_UPDATE_TAG = "pending_update"
+PENDING_DELETE_TAG = "pending_delete"
+
+
+# Updates and deletes staged locally during an edit session, to be written together by
+# EmployeeRepository.apply_changes() in one transaction instead of one commit per record.
+#
+# Stands in for the MaskProjection it wraps: rows with a staged update show the staged values,
+# including pay while unmasked, so pages and search results loaded later still show them.
+# tags(row) marks the rows with a staged change for the Treeview.
+class EditSession:
+    def __init__(self, project):
+        self.project = project  # MaskProjection for rows without a staged update
+        self.active = False
+        self.updates = {}  # ID -> row waiting to be written, as from EmployeeRepository.prepare_update
+        self.deletes = set()  # IDs waiting to be deleted
+
+    def __len__(self):
+        return len(self.updates) + len(self.deletes)
+
+    # Stage an update, replacing anything staged for the same ID
+    def stage_update(self, row):
+        self.deletes.discard(row[0])
+        self.updates[row[0]] = tuple(row)
+
+    def stage_delete(self, key):
+        self.updates.pop(key, None)
+        self.deletes.add(key)
+
+    # "update", "delete" or None
+    def pending(self, key):
+        if key in self.deletes:
+            return "delete"
+        return "update" if key in self.updates else None
+
+    # Copies of the staged (updates, deletes), e.g. to hand to a worker thread
+    def snapshot(self):
+        return list(self.updates.values()), sorted(self.deletes)
+
+    # Forget the changes that were written, leaving any staged again while they were being written
+    def written(self, updates, deletes):
+        for row in updates:
+            if self.updates.get(row[0]) == tuple(row):
+                del self.updates[row[0]]
+        self.deletes.difference_update(deletes)
+
+    # Drop every staged change. Returns the IDs that had one.
+    def discard(self):
+        keys = list(self.updates) + list(self.deletes)
+        self.updates.clear()
+        self.deletes.clear()
+        return keys
+
+    @property
+    def masked(self):
+        return self.project.masked
+
+    def sensitive(self, key):
+        staged = self.updates.get(key)
+        if staged is None:
+            return self.project.sensitive(key)
+        return MASKED_VALUES if self.project.masked else tuple(staged[7:])
+
+    def __call__(self, row):
+        staged = self.updates.get(row[0])
+        if staged is None:
+            return self.project(row)
+        return tuple(staged[:7]) + self.sensitive(row[0])
+
+    def tags(self, row):
+        pending = self.pending(row[0])
+        if pending == "update":
+            return (PENDING_UPDATE_TAG,)
+        if pending == "delete":
+            return (PENDING_DELETE_TAG,)
+        return ()
@@ -0,0 +1,353 @@
+import time  # Staleness and sync timing
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from columnar_store import ColumnarTable
+from facets import FacetIndex, bitmap_of, is_active, keys_of
+from instrumentation import metrics, payload_size
+from search_index import SearchIndex
+
+
+# Changes found by EmployeeCache.fetch_delta() on a worker thread, applied by EmployeeCache.apply()
+class CacheDelta:
+    def __init__(self, probe, blocks=None, rows=(), cleared_blocks=(), full=False):
+        self.probe = probe  # (row count, max ID, table checksum) when the delta was read
+        self.blocks = blocks  # Block number -> (row count, checksum), None if unchanged
+        self.rows = rows  # Fresh copies of every row in the cleared blocks
+        self.cleared_blocks = cleared_blocks  # Blocks whose cached rows are replaced by rows
+        self.full = full  # First load, rows is the whole table
+        self.index = None  # SearchIndex built off the Tk thread on a full load
+        self.facets = None  # FacetIndex, likewise
+        self.table = None  # Row store, also built off the Tk thread on a full load
+        self.source = "server"  # Or "snapshot" when restored from a SnapshotStore
+        self.fetched_at = time.time()  # For a snapshot, when it was last in sync with the server
+        self.duration = 0.0
+
+
+# Client-side copy of an employee table kept in step with the server by delta sync.
+#
+# A one-row probe (COUNT, MAX(ID), CHECKSUM_AGG(BINARY_CHECKSUM(...))) tells whether anything
+# changed at all. When it did, per-block checksums over ID ranges of block_size rows are compared
+# with the ones seen last time and only the blocks that differ are fetched again, which picks up
+# inserts, updates and deletes without re-reading the whole table.
+#
+# With a schema of (column, kind) pairs the rows are held in a ColumnarTable instead of a
+# dict of tuples, which takes a fraction of the memory for large tables.
+class EmployeeCache:
+    def __init__(self, connect, columns, table="Current_Employee", block_size=1000, schema=None):
+        self.connect = connect
+        self.columns = columns  # Key column first
+        self.table = table
+        self.block_size = block_size
+        self.schema = schema
+        self.rows = self._new_rows(())  # ID -> row
+        self.index = SearchIndex()  # Name/Job_Titles/Department search, kept in step with rows
+        self.facets = FacetIndex()  # Department/Full_or_Part_Time/Salary_or_Hourly bitmaps, likewise
+        self.loaded = False
+        self._ordered = []  # Sorted IDs, replaced rather than mutated so readers can hold on to it
+        self.version = 0  # Bumped on every change to rows, lets sort keys be reused until then
+        self._probe = None
+        self._blocks = {}
+        self.hits = 0  # Views served from the cache
+        self.misses = 0  # Views that had to go to the server because the cache was not loaded yet
+        self.syncs = 0  # Delta syncs that found changes
+        self.probes = 0  # Delta syncs in total
+        self.rows_synced_last = 0
+        self.rows_synced_total = 0
+        self.last_sync_at = None
+        self.last_sync_duration = 0.0
+        self.snapshot_rows = 0  # Rows restored from the on-disk snapshot at startup
+
+    @property
+    def key_column(self):
+        return self.columns[0]
+
+    # Work out what changed on the server since the last sync (runs on a worker thread)
+    def fetch_delta(self):
+        started = time.perf_counter()
+        select_list = ", ".join(self.columns)
+        checksum = f"CHECKSUM_AGG(BINARY_CHECKSUM({', '.join(self.columns[1:])}))"
+        key = self.key_column
+        with metrics.span("connect", "cache_sync"):
+            connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", "cache_probe"):
+                cursor.execute(f"SELECT COUNT(*), MAX({key}), {checksum} FROM {self.table}")
+                probe = tuple(cursor.fetchone())
+            if self.loaded and probe == self._probe:
+                delta = CacheDelta(probe)
+            else:
+                cursor.execute(
+                    f"SELECT {key} / {self.block_size}, COUNT(*), {checksum} "
+                    f"FROM {self.table} GROUP BY {key} / {self.block_size}")
+                blocks = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+                if not self.loaded:
+                    with metrics.span("execute", "cache_load"):
+                        cursor.execute(f"SELECT {select_list} FROM {self.table}")
+                    with metrics.span("fetch", "cache_load") as span:
+                        rows = [tuple(row) for row in cursor.fetchall()]
+                        span.rows = len(rows)
+                        span.bytes = payload_size(rows)
+                    delta = self._full_delta(probe, blocks, rows)
+                else:
+                    known = self._blocks
+                    stale = sorted(block for block in set(blocks) | set(known)
+                                   if blocks.get(block) != known.get(block))
+                    rows = []
+                    with metrics.span("fetch", "cache_sync") as span:
+                        for first, last in _runs(stale):
+                            cursor.execute(
+                                f"SELECT {select_list} FROM {self.table} WHERE {key} >= ? AND {key} < ?",
+                                (first * self.block_size, (last + 1) * self.block_size))
+                            rows.extend(tuple(row) for row in cursor.fetchall())
+                        span.rows = len(rows)
+                        span.bytes = payload_size(rows)
+                    delta = CacheDelta(probe, blocks, rows, stale)
+        finally:
+            connection.close()
+        delta.duration = time.perf_counter() - started
+        return delta
+
+    # Rebuild the cache from a snapshot_store.SnapshotStore (runs on a worker thread). The probe
+    # and block checksums the snapshot was saved with come back too, so the next fetch_delta()
+    # only downloads what changed on the server since. Returns a CacheDelta for apply(), or None
+    # when there is no usable snapshot.
+    def load_snapshot(self, store):
+        started = time.perf_counter()
+        with metrics.span("fetch", "snapshot") as span:
+            snapshot = store.read(self.block_size)
+            if snapshot is None:
+                return None
+            rows, probe, blocks, synced_at = snapshot
+            span.rows = len(rows)
+        delta = self._full_delta(probe, blocks, rows)
+        delta.source = "snapshot"
+        delta.fetched_at = synced_at
+        delta.duration = time.perf_counter() - started
+        return delta
+
+    # First load of rows, with the search index, facets and row store built on the calling thread
+    def _full_delta(self, probe, blocks, rows):
+        delta = CacheDelta(probe, blocks, rows, full=True)
+        delta.index = SearchIndex.build(delta.rows)
+        delta.facets = FacetIndex.build(delta.rows)
+        delta.table = self._new_rows(delta.rows)
+        return delta
+
+    # Apply a fetched delta. Returns (inserted rows, updated rows, deleted IDs).
+    def apply(self, delta):
+        self.last_sync_at = delta.fetched_at
+        self.last_sync_duration = delta.duration
+        self._probe = delta.probe
+        if delta.source == "snapshot":
+            self.snapshot_rows = len(delta.rows)
+        else:
+            self.probes += 1
+            if delta.blocks is None:
+                self.rows_synced_last = 0
+                return [], [], []
+            self.syncs += 1
+            self.rows_synced_last = len(delta.rows)
+            self.rows_synced_total += len(delta.rows)
+        self._blocks = delta.blocks
+
+        if delta.full:
+            self.rows = delta.table if delta.table is not None else self._new_rows(delta.rows)
+            self.index = delta.index or SearchIndex.build(delta.rows)
+            self.facets = delta.facets or FacetIndex.build(delta.rows)
+            self._ordered = sorted(self.rows)
+            self.loaded = True
+            self.version += 1
+            return [], [], []
+
+        previous = {}
+        for block in delta.cleared_blocks:
+            for key in range(block * self.block_size, (block + 1) * self.block_size):
+                row = self.rows.pop(key, None)
+                if row is not None:
+                    previous[key] = row
+        inserted, updated = [], []
+        for row in delta.rows:
+            self.rows[row[0]] = row
+            old = previous.pop(row[0], None)
+            if old is None:
+                inserted.append(row)
+                self.index.add(row)
+                self.facets.add(row)
+            elif old != row:
+                updated.append(row)
+                self.index.add(row)
+                self.facets.add(row)
+        deleted = list(previous)
+        for key in deleted:
+            self.index.remove(key)
+            self.facets.remove(key)
+        if inserted or deleted:
+            self._ordered = sorted(self.rows)
+        if inserted or updated or deleted:
+            self.version += 1
+        return inserted, updated, deleted
+
+    # Row store keyed by ID: columnar when a schema was given, a dict of tuples otherwise
+    def _new_rows(self, rows):
+        if self.schema is not None:
+            return ColumnarTable.from_rows(self.schema, rows)
+        return {row[0]: row for row in rows}
+
+    # Record a change the app made itself so it shows up before the next sync
+    def upsert(self, row):
+        if not self.loaded:
+            return
+        row = tuple(row)
+        if row[0] not in self.rows:
+            ordered = list(self._ordered)
+            insort(ordered, row[0])
+            self._ordered = ordered
+        self.rows[row[0]] = row
+        self.index.add(row)
+        self.facets.add(row)
+        self.version += 1
+
+    def remove(self, key):
+        if not self.loaded or self.rows.pop(key, None) is None:
+            return
+        self.index.remove(key)
+        self.facets.remove(key)
+        ordered = list(self._ordered)
+        del ordered[bisect_left(ordered, key)]
+        self._ordered = ordered
+        self.version += 1
+
+    # (IDs, values of the column at position) for every cached row, both in ID order
+    def column_values(self, position):
+        rows = self.rows
+        if isinstance(rows, ColumnarTable):
+            keys, positions, columns = rows.export_columns([rows.names[position]])
+            column = columns[rows.names[position]]
+            live = [index for index, stored in enumerate(positions) if stored >= 0]
+            return [keys[index] for index in live], [column.get(positions[index]) for index in live]
+        ids = list(self._ordered)
+        return ids, [None if row is None else row[position] for row in map(rows.get, ids)]
+
+    # Up to limit rows after or before key in ID order, like KeysetPageSource.fetch
+    def page(self, direction, key, limit):
+        ordered = self._ordered
+        if direction == "after":
+            start = 0 if key is None else bisect_right(ordered, key)
+            keys = ordered[start:start + limit]
+        else:
+            end = bisect_left(ordered, key)
+            keys = ordered[max(end - limit, 0):end]
+        return [row for row in map(self.rows.get, keys) if row is not None]
+
+    # Rows, in ID order, where every word of keyword appears in Name, Job_Titles or Department
+    def search(self, keyword):
+        keys = sorted(self.index.search(keyword))
+        return [row for row in map(self.rows.get, keys) if row is not None]
+
+    # Rows, in ID order, matching keyword like search() and the facet selection
+    # (column -> ticked values), the text matches intersected with the facet bitmaps
+    def filter(self, keyword, selection):
+        if not is_active(selection):
+            return self.search(keyword)
+        matches = self.facets.match(selection)
+        if keyword.split():
+            matches &= bitmap_of(self.index.search(keyword))
+        return [row for row in map(self.rows.get, keys_of(matches)) if row is not None]
+
+    # Rows per facet value for the current search and selection, see FacetIndex.counts
+    def facet_counts(self, keyword, selection):
+        base = bitmap_of(self.index.search(keyword)) if keyword.split() else None
+        return self.facets.counts(selection, base)
+
+    # Seconds since the cache last heard from the server
+    def staleness(self):
+        if self.last_sync_at is None:
+            return None
+        return time.time() - self.last_sync_at
+
+    def stats(self):
+        return {
+            "loaded": self.loaded,
+            "rows": len(self.rows),
+            "columnar": self.schema is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "probes": self.probes,
+            "syncs": self.syncs,
+            "rows_synced_last": self.rows_synced_last,
+            "rows_synced_total": self.rows_synced_total,
+            "last_sync_duration": self.last_sync_duration,
+            "snapshot_rows": self.snapshot_rows,
+            "staleness": self.staleness(),
+        }
+
+
+# Page source for PagedTreeview that reads from an EmployeeCache instead of the database.
+# project turns a cached row into what the Treeview shows, e.g. masking salary columns.
+class CachePageSource:
+    sorted = False
+
+    def __init__(self, cache, project=None):
+        self.cache = cache
+        self.project = project
+
+    @staticmethod
+    def key(row):
+        return row[0]
+
+    def fetch(self, direction, key, limit):
+        rows = self.cache.page(direction, key, limit)
+        if self.project is not None:
+            rows = [self.project(row) for row in rows]
+        return rows
+
+
+# Page source over an EmployeeCache in a sorted order. order() returns the IDs in display
+# order and is only called on the first fetch, so the sort runs on a worker thread. Keys are
+# positions in that order, which PagedTreeview only compares and hands back to fetch().
+class SortedCachePageSource:
+    sorted = True
+
+    def __init__(self, cache, order):
+        self.cache = cache
+        self._order_function = order
+        self._order = None
+        self._rank = None  # ID -> position in _order
+
+    def _prepare(self):
+        if self._order is not None:
+            return
+        order = self._order_function()
+        if order and max(order) <= 4 * len(order):
+            rank = array("q", [-1]) * (max(order) + 1)  # IDs are dense enough for a flat table
+        else:
+            rank = {}
+        for position, key in enumerate(order):
+            rank[key] = position
+        self._order, self._rank = order, rank
+
+    def key(self, row):
+        return self._rank[row[0]]
+
+    def fetch(self, direction, key, limit):
+        with metrics.span("execute", "sort"):
+            self._prepare()
+        if direction == "after":
+            start = 0 if key is None else key + 1
+            keys = self._order[start:start + limit]
+        else:
+            keys = self._order[max(key - limit, 0):key]
+        return [row for row in map(self.cache.rows.get, keys) if row is not None]
+
+
+# Collapse sorted block numbers into (first, last) runs of consecutive blocks
+def _runs(blocks):
+    runs = []
+    for block in blocks:
+        if runs and block == runs[-1][1] + 1:
+            runs[-1][1] = block
+        else:
+            runs.append([block, block])
+    return [tuple(run) for run in runs]
@@ -0,0 +1,176 @@
+from database import EMPLOYEE_COLUMNS, MASKED_EMPLOYEE_COLUMNS, insert_returning_id, select_top
+from instrumentation import metrics, payload_size
+from schema_migrations import SEARCH_TEXT_VERSION, applied_version
+from validation import check_employee_fields, prepare_new_employee
+
+# Columns written by add and update, in Current_Employee order after ID
+EDITABLE_COLUMNS = ["Name", "Job_Titles", "Department", "Full_or_Part_Time",
+                    "Salary_or_Hourly", "Typical_Hours", "Annual_Salary", "Hourly_Rate"]
+
+
+# Replace the sensitive columns of a full employee row with '****'
+def mask_row(row):
+    return tuple(row[:7]) + ("****", "****")
+
+
+# Data access for Current_Employee without any Tk widgets, so it can be called from the app,
+# command line tools and benchmarks alike. connect() returns a connection whose close() ends
+# its use (a pooled connection goes back to the pool). Every method opens and closes its own
+# connection, raises ValidationError for bad input and lets database errors propagate.
+# Connect, execute and fetch times are recorded in instrumentation.metrics under the method name.
+class EmployeeRepository:
+    def __init__(self, connect, dialect="mssql", table="Current_Employee"):
+        self.connect = connect
+        self.dialect = dialect
+        self.table = table
+        self.search_text = None  # Whether the table has Search_Text (schema_migrations), checked on the first search
+
+    # Select list for the full or the masked view of the table
+    @staticmethod
+    def columns(masked=True):
+        return MASKED_EMPLOYEE_COLUMNS if masked else EMPLOYEE_COLUMNS
+
+    # Up to limit rows in ID order after (direction "after") or before ("before") key,
+    # a key of None meaning the start of the table
+    def list(self, direction="after", key=None, limit=200, masked=True):
+        params = ()
+        if direction == "after":
+            where = ""
+            if key is not None:
+                where = "WHERE ID > ?"
+                params = (key,)
+            order = "ORDER BY ID"
+        else:
+            where = "WHERE ID < ?"
+            params = (key,)
+            order = "ORDER BY ID DESC"
+        rows = self._fetch("list", select_top(self.dialect, self.columns(masked),
+                                              f"FROM {self.table} {where} {order}", limit), params)
+        if direction == "before":
+            rows.reverse()
+        return rows
+
+    # One employee by ID, or None
+    def get(self, employee_id, masked=True):
+        rows = self._fetch("get", f"SELECT {self.columns(masked)} FROM {self.table} WHERE ID = ?",
+                           (employee_id,))
+        return rows[0] if rows else None
+
+    # Employees where every word of keyword appears in Name, Job_Titles or Department
+    def search(self, keyword, masked=False):
+        words = keyword.lower().split() or [""]
+        if self.search_text is None:
+            self.search_text = self._schema_version() >= SEARCH_TEXT_VERSION
+        if self.search_text:
+            # Find the IDs by scanning the narrow Search_Text index, then read only those rows.
+            # Search_Text >= '' holds for every row, it is there so SQLite picks the index.
+            query = (f"SELECT {self.columns(masked)} FROM {self.table} WHERE ID IN "
+                     f"(SELECT ID FROM {self.table} WHERE Search_Text >= '' AND "
+                     f"{' AND '.join('Search_Text LIKE ?' for _ in words)}) ORDER BY ID")
+            return self._fetch("search", query, tuple(f"%{word}%" for word in words))
+        condition = "(LOWER(Name) LIKE ? OR LOWER(Job_Titles) LIKE ? OR LOWER(Department) LIKE ?)"
+        query = (f"SELECT {self.columns(masked)} FROM {self.table} "
+                 f"WHERE {' AND '.join(condition for _ in words)}")
+        return self._fetch("search", query, tuple(f"%{word}%" for word in words for _ in range(3)))
+
+    # Validate and insert a new employee from the raw form fields, returns the stored row
+    def add(self, name, job_title, department, full_or_part_time, salary_or_hourly,
+            typical_hours, annual_salary, hourly_rate):
+        params = prepare_new_employee(name, job_title, department, full_or_part_time,
+                                      salary_or_hourly, typical_hours, annual_salary, hourly_rate)
+        query = insert_returning_id(self.dialect, self.table, EDITABLE_COLUMNS)
+        connection = self._connect("add")
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", "add"):
+                cursor.execute(query, params)
+                new_id = cursor.fetchone()[0]
+                connection.commit()
+        finally:
+            connection.close()
+        return (new_id,) + params
+
+    # Validate the raw form fields of an update without writing anything, returns the row
+    # update() would store
+    @staticmethod
+    def prepare_update(employee_id, name, job_title, department, full_or_part_time, salary_or_hourly,
+                       typical_hours, annual_salary, hourly_rate):
+        hours, salary, rate = check_employee_fields(
+            name, job_title, department, full_or_part_time, salary_or_hourly,
+            typical_hours, annual_salary, hourly_rate)
+        return (employee_id, name, job_title, department, full_or_part_time, salary_or_hourly,
+                hours, salary, rate)
+
+    # Validate and overwrite an employee from the raw form fields, returns the stored row
+    def update(self, employee_id, *fields):
+        row = self.prepare_update(employee_id, *fields)
+        self._write("update", self._update_query(), row[1:] + (employee_id,))
+        return row
+
+    def delete(self, employee_id):
+        self._write("delete", f"DELETE FROM {self.table} WHERE ID = ?", (employee_id,))
+
+    # Write many updated rows (as returned by prepare_update) and delete many IDs with one
+    # executemany each, in a single transaction that is rolled back if any statement fails.
+    # Returns (rows updated, rows deleted).
+    def apply_changes(self, updates=(), deletes=()):
+        updates, deletes = list(updates), list(deletes)
+        connection = self._connect("edit_session")
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", "edit_session") as span:
+                if updates:
+                    cursor.executemany(self._update_query(), [tuple(row[1:]) + (row[0],) for row in updates])
+                if deletes:
+                    cursor.executemany(f"DELETE FROM {self.table} WHERE ID = ?", [(key,) for key in deletes])
+                connection.commit()
+                span.rows = len(updates) + len(deletes)
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return len(updates), len(deletes)
+
+    # Masked copies of full rows, for results that were fetched unmasked
+    @staticmethod
+    def mask(rows):
+        return [mask_row(row) for row in rows]
+
+    def _update_query(self):
+        return f"UPDATE {self.table} SET {', '.join(f'{c} = ?' for c in EDITABLE_COLUMNS)} WHERE ID = ?"
+
+    def _schema_version(self):
+        connection = self._connect("schema_version")
+        try:
+            return applied_version(connection)
+        finally:
+            connection.close()
+
+    def _connect(self, operation):
+        with metrics.span("connect", operation):
+            return self.connect()
+
+    def _fetch(self, operation, query, params):
+        connection = self._connect(operation)
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", operation):
+                cursor.execute(query, params)
+            with metrics.span("fetch", operation) as span:
+                rows = [tuple(row) for row in cursor.fetchall()]
+                span.rows = len(rows)
+                span.bytes = payload_size(rows)
+            return rows
+        finally:
+            connection.close()
+
+    def _write(self, operation, query, params):
+        connection = self._connect(operation)
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", operation):
+                cursor.execute(query, params)  # Parameters in a tuple
+                connection.commit()
+        finally:
+            connection.close()
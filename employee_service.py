@@ -0,0 +1,364 @@
+import argparse  # Command line
+import asyncio  # One event loop serves every client connection
+import base64  # HTTP Basic credentials
+import hmac  # Constant-time credential comparison
+import json  # Request and response bodies
+import logging  # For logging to file and console
+import os  # For environment variables
+import time  # Response cache expiry
+from collections import OrderedDict
+from decimal import Decimal
+from urllib.parse import parse_qs, unquote
+
+from database import MASKED_EMPLOYEE_COLUMNS, DatabaseConnectionError
+from employee_repository import EmployeeRepository
+from paged_view import KeysetPageSource
+from sensitive_store import SensitiveStore
+from sorting import SENSITIVE_COLUMNS, sql_sort_expression
+from validation import ValidationError
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+MAX_BODY = 16 * 1024 * 1024  # Largest request body accepted, enough for a big edit session
+
+
+# Sent back as an error response with this status
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Shared data access for many desktop clients over HTTP/JSON.
+#
+# Every request runs its repository call on a worker thread with one shared connection pool.
+# Reads go through a response cache that keeps results for cache_seconds. Identical reads
+# arriving while one is already running wait for that one instead of querying again. Any write
+# clears the cache and starts a new generation, so reads begun before a write are neither cached
+# nor shared with requests that arrive after it. Unmasked reads, the sensitive columns and all
+# writes need HTTP Basic credentials matching SEN_USER / SEN_PASSWORD.
+class EmployeeService:
+    def __init__(self, repository, sensitive_store, credentials=None, cache_seconds=5.0, cache_size=1024):
+        self.repository = repository
+        self.sensitive_store = sensitive_store
+        self.credentials = credentials  # (user, password), None refuses every request that needs them
+        self.cache_seconds = cache_seconds
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # Read key -> (expires at, result)
+        self._inflight = {}  # (generation, read key) -> future of the running read
+        self._generation = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.reads = 0  # Reads that reached the database
+        self.writes = 0
+        self.errors = 0
+
+    # Result of fn(*args) for a read, from the cache, a running identical read or the database
+    async def read(self, key, fn, *args):
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > now:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached[1]
+        generation = self._generation
+        running = self._inflight.get((generation, key))
+        if running is not None:
+            self.coalesced += 1
+            return await asyncio.shield(running)
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        self._inflight[(generation, key)] = future
+        self.reads += 1
+        try:
+            result = await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[(generation, key)]
+        future.set_result(result)
+        if generation == self._generation and self.cache_seconds > 0:
+            self._cache[key] = (time.monotonic() + self.cache_seconds, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    # Run a write and forget every cached read
+    async def write(self, fn, *args):
+        self.writes += 1
+        try:
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            self._generation += 1
+            self._cache.clear()
+
+    def stats(self):
+        return {"requests": self.requests, "cache_hits": self.cache_hits, "coalesced": self.coalesced,
+                "reads": self.reads, "writes": self.writes, "errors": self.errors,
+                "cached": len(self._cache), "generation": self._generation}
+
+    def _authorised(self, headers):
+        if self.credentials is None:
+            return False  # Without configured credentials nothing sensitive is served
+        scheme, _, encoded = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "basic":
+            return False
+        try:
+            user, _, password = base64.b64decode(encoded).decode("utf-8").partition(":")
+        except ValueError:
+            return False
+        return (hmac.compare_digest(user, self.credentials[0] or "") and
+                hmac.compare_digest(password, self.credentials[1] or ""))
+
+    def _require_auth(self, headers):
+        if not self._authorised(headers):
+            raise HTTPError(401, "Credentials are needed for sensitive data and changes." if self.credentials else
+                        "The service has no SEN_USER / SEN_PASSWORD configured for sensitive data and changes.")
+
+    # Route one request, returns (status, JSON-able body)
+    async def dispatch(self, method, target, headers, body):
+        self.requests += 1
+        path, _, query = target.partition("?")
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        try:
+            return 200, await self._route(method, parts, params, headers, body)
+        except HTTPError as e:
+            return e.status, {"error": REASONS[e.status], "message": e.message}
+        except ValidationError as e:
+            return 400, {"error": e.title, "message": e.message}
+        except DatabaseConnectionError as e:
+            self.errors += 1
+            logging.error(f"Employee service cannot reach the database: {e}")
+            return 503, {"error": "Database Unavailable", "message": str(e)}
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"Employee service error on {method} {path}: {e}")
+            return 500, {"error": "Server Error", "message": str(e)}
+
+    async def _route(self, method, parts, params, headers, body):
+        if parts == ["stats"] and method == "GET":
+            return self.stats()
+        if not parts or parts[0] != "employees":
+            raise HTTPError(404, f"No such resource: /{'/'.join(parts)}")
+        masked = params.get("masked", "1") != "0"
+        if not masked:
+            self._require_auth(headers)
+        rest = parts[1:]
+
+        if rest == [] and method == "GET":
+            limit = _int(params.get("limit", "200"))
+            key = _int(params["key"]) if "key" in params else None
+            direction = params.get("direction", "after")
+            return await self.read(("list", direction, key, limit, masked),
+                                   self.repository.list, direction, key, limit, masked)
+        if rest == [] and method == "POST":
+            self._require_auth(headers)
+            return await self.write(self.repository.add, *_form(_json(body)))
+        if rest == ["page"] and method == "GET":
+            return await self._page(params)
+        if rest == ["search"] and method == "GET":
+            keyword = params.get("q", "").strip().lower()
+            return await self.read(("search", keyword, masked), self.repository.search, keyword, masked)
+        if rest == ["batch"] and method == "POST":
+            self._require_auth(headers)
+            changes = _json(body)
+            updates = []
+            for row in changes.get("updates", []):
+                if not isinstance(row, list) or len(row) != 1 + len(FORM_FIELDS):
+                    raise HTTPError(400, "Each update must be [ID, " + ", ".join(FORM_FIELDS) + "].")
+                # Checked again here, the client's validation is not trusted
+                updates.append(self.repository.prepare_update(
+                    _int(row[0]), *("" if value is None else str(value) for value in row[1:])))
+            deletes = [_int(key) for key in changes.get("deletes", [])]
+            return list(await self.write(self.repository.apply_changes, updates, deletes))
+        if rest == ["sensitive"] and method == "GET":
+            self._require_auth(headers)
+            _, probe, table = await self.read(("sensitive",), self.sensitive_store.fetch)
+            return {"probe": probe, "rows": [tuple(row) for row in table.values()]}
+        if rest == ["sensitive", "probe"] and method == "GET":
+            self._require_auth(headers)
+            return {"probe": await self.read(("sensitive_probe",), self.sensitive_store.read_probe)}
+        if len(rest) == 1:
+            employee_id = _int(rest[0])
+            if method == "GET":
+                row = await self.read(("get", employee_id, masked), self.repository.get, employee_id, masked)
+                if row is None:
+                    raise HTTPError(404, f"No employee with ID {employee_id}.")
+                return row
+            self._require_auth(headers)
+            if method == "PUT":
+                return await self.write(self.repository.update, employee_id, *_form(_json(body)))
+            if method == "DELETE":
+                await self.write(self.repository.delete, employee_id)
+                return {"deleted": employee_id}
+        raise HTTPError(405 if parts else 404, f"{method} is not supported on /{'/'.join(parts)}")
+
+    # A page of the masked table in the given sort, with keyset pagination like the desktop app
+    async def _page(self, params):
+        try:
+            sort = [(int(column), bool(descending)) for column, descending in json.loads(params.get("sort", "[]"))]
+            key = json.loads(params["key"]) if "key" in params else None
+        except (TypeError, ValueError):
+            raise HTTPError(400, "sort must be a JSON list of [column, descending] pairs and key JSON.")
+        if any(column not in range(9) or column in SENSITIVE_COLUMNS for column, _ in sort):
+            raise HTTPError(400, "Pages can only be sorted by the non-sensitive columns.")
+        direction = params.get("direction", "after")
+        if direction not in ("after", "before"):
+            raise HTTPError(400, "direction must be after or before.")
+        limit = _int(params.get("limit", "200"))
+        key = tuple(key) if isinstance(key, list) else key
+        source = KeysetPageSource(self.repository.connect, MASKED_EMPLOYEE_COLUMNS, self.repository.table,
+                                  "ID", self.repository.dialect,
+                                  order_by=[(sql_sort_expression(column), descending) for column, descending in sort])
+        return await self.read(("page", tuple(sort), direction, key, limit), source.fetch, direction, key, limit)
+
+    # Serve one client connection, with keep-alive
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _respond(writer, 400, {"error": "Bad Request", "message": "Malformed request line."}, True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await _respond(writer, 400, {"error": "Bad Request", "message": "Invalid Content-Length."}, True)
+                    break
+                if length > MAX_BODY:
+                    await _respond(writer, 400, {"error": "Bad Request", "message": "Request body too large."}, True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                status, payload = await self.dispatch(method.upper(), target, headers, body)
+                await _respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+# Form fields of add and update, the body keys of POST and PUT requests
+FORM_FIELDS = ("name", "job_title", "department", "full_or_part_time", "salary_or_hourly",
+               "typical_hours", "annual_salary", "hourly_rate")
+
+
+async def _respond(writer, status, payload, close):
+    data = json.dumps(payload, default=_json_default).encode("utf-8")
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                 f"Content-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n"
+                 f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + data)
+    await writer.drain()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "__iter__"):  # e.g. columnar_store.RowView
+        return list(value)
+    raise TypeError(f"Cannot send {type(value).__name__} as JSON")
+
+
+# Form fields from a JSON body as the strings add and update expect, missing ones empty
+def _form(fields):
+    return tuple("" if fields.get(name) is None else str(fields[name]) for name in FORM_FIELDS)
+
+
+def _json(body):
+    try:
+        value = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "The request body is not valid JSON.")
+    if not isinstance(value, dict):
+        raise HTTPError(400, "The request body must be a JSON object.")
+    return value
+
+
+def _int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"Not a whole number: {text}")
+
+
+def _retrieve_exception(future):
+    if not future.cancelled():
+        future.exception()  # Nobody may be waiting, do not warn about it being unread
+
+
+# Build the service over a connection pool, credentials from SEN_USER / SEN_PASSWORD.
+# Both must be set, without them the service only serves masked reads.
+def create_service(pool, cache_seconds=5.0):
+    repository = EmployeeRepository(pool.acquire, pool.dialect)
+    sensitive = SensitiveStore(pool.acquire, repository.table)
+    user, password = os.getenv("SEN_USER"), os.getenv("SEN_PASSWORD")
+    credentials = (user, password) if user and password else None
+    if credentials is None:
+        logging.warning("SEN_USER / SEN_PASSWORD are not set, the employee service refuses unmasked reads, "
+                        "the sensitive columns and all changes")
+    return EmployeeService(repository, sensitive, credentials, cache_seconds)
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Employee service listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+# Headless entry point: python employee_service.py --port 8765
+# With --sqlite the service runs against a local SQLite stand-in, --seed fills an empty one.
+def main():
+    from dotenv import load_dotenv  # To load environment variables from a .env file
+    from database import connect_sqlite, create_pool
+
+    parser = argparse.ArgumentParser(description="HTTP/JSON service over the employee table.")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8765")))
+    parser.add_argument("--cache-seconds", type=float, default=float(os.getenv("SERVICE_CACHE_SECONDS", "5")))
+    parser.add_argument("--sqlite", help="serve this SQLite file instead of the configured database")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic employees to add to an empty SQLite file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.sqlite:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["DB_SQLITE_PATH"] = args.sqlite
+        if args.seed:
+            from synthetic_data import seed_database
+            connection = connect_sqlite(args.sqlite)
+            if connection.execute("SELECT COUNT(*) FROM Current_Employee").fetchone()[0] == 0:
+                seed_database(connection, args.seed)
+            connection.close()
+    pool = create_pool()
+    try:
+        asyncio.run(serve(create_service(pool, args.cache_seconds), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
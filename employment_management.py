@@ -1,10 +1,32 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import pypyodbc as pyodbc  # Use pypyodbc for compatibility with ARM64
-import sv_ttk  # Sun Valley theme for ttk
+from tkinter import ttk, messagebox, filedialog
 import os  # For environment variables
 from dotenv import load_dotenv  # To load environment variables from a .env file
 import logging  # For logging to file and console
+import threading  # Export cancellation flag and connection prewarming
+import time  # Slow operation timestamps in the diagnostics panel
+from database import create_pool, DatabaseConnectionError  # Pooled, long-lived database connections
+from database import PUBLIC_EMPLOYEE_COLUMN_NAMES, PUBLIC_EMPLOYEE_SCHEMA, SENSITIVE_COLUMN_NAMES
+from employee_repository import EmployeeRepository  # All Current_Employee SQL, without widgets
+from sensitive_store import MaskProjection, SensitiveStore  # Salary columns, only read after login
+from query_executor import QueryExecutor  # Runs database work off the Tk main thread
+from paged_view import KeysetPageSource, PagedTreeview  # Only fetch the rows near the scroll position
+from employee_cache import CachePageSource, EmployeeCache, SortedCachePageSource  # Client-side copy of Current_Employee
+from snapshot_store import SnapshotStore  # On-disk copy of the cache for warm starts and offline use
+from sorting import SENSITIVE_COLUMNS, CacheSorter, SortSpec, sort_rows  # Sorting on the Treeview headings
+from live_search import LiveSearch  # Search-as-you-type
+from facets import FACET_COLUMNS, is_active  # Filter panel over the cache's bitmap indexes
+from edit_session import PENDING_DELETE_TAG, PENDING_UPDATE_TAG, EditSession  # Batched edits
+from duplicates import find_duplicates, merge_changes  # Near-duplicate employees for review
+from chunked_render import ChunkedTreeRenderer  # Insert large result sets without freezing the window
+from validation import ValidationError  # Raised by the repository for invalid records
+from bulk_import import import_employees, read_csv  # Batched CSV import
+from export import ExportCancelled, export_employees  # Streaming export
+from service_client import (ServiceClient, ServicePageSource, ServiceRepository,
+                            ServiceSensitiveStore)  # Optional shared employee_service
+from instrumentation import configure_slow_log, metrics  # Timing spans, slow log and metrics dump
+# sv_ttk and payroll_analytics (which loads NumPy) are imported where they are first needed,
+# so the login window comes up without waiting for them
 
 # Configure logging
 logging.basicConfig(
@@ -16,173 +38,368 @@ logging.basicConfig(
 # Load environment variables from a .env file
 load_dotenv()
 
+# Shared pool of long-lived connections, sized by DB_POOL_SIZE
+db_pool = create_pool()
 
-# Connect to the database
+
+# Connect to the database (borrowed from the pool, close() hands it back).
+# Runs on worker threads, so failures are raised and reported by report_db_error.
 def connect_to_db():
-    try:
-        connection = pyodbc.connect(
-            f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-            f"SERVER={os.getenv('DB_SERVER')};"
-            f"DATABASE={os.getenv('DB_NAME')};"
-            f"UID={os.getenv('DB_USER')};"
-            f"PWD={os.getenv('DB_PASSWORD')};"
-            f"Encrypt=yes;"  # Encrypt connection)
-        )
-
-        return connection
-    except Exception as e:
+    return db_pool.acquire()
+
+
+# With EMPLOYEE_SERVICE_URL set the app goes through a shared employee_service instead of
+# connecting to the database itself
+service_url = os.getenv("EMPLOYEE_SERVICE_URL")
+service = ServiceClient(service_url, os.getenv("SEN_USER"), os.getenv("SEN_PASSWORD")) if service_url else None
+
+# List, search, add, update and delete employees through the pool, or the service
+repository = ServiceRepository(service) if service else EmployeeRepository(connect_to_db, db_pool.dialect)
+
+
+# Report a failed background database operation on the Tk thread. Without a server the app
+# carries on read-only from the cache when it has one (or is restoring it from the snapshot).
+def report_db_error(title, message, e):
+    if isinstance(e, DatabaseConnectionError):
         logging.error(f"Error connecting to the database: {e}")
+        if employee_cache.loaded or snapshot_loading:
+            go_offline(e)
+            return
         messagebox.showerror("Connection Error", f"Error connecting to the database:\n{e}")
         root.quit()  # Stop the application
+        return
+    messagebox.showerror(title, f"{message}:\n{e}")
+
+
+# True while the server is unreachable and the app shows the cached rows read-only
+offline = False
+
+
+# Switch to read-only offline mode, the cache refresh timer keeps trying the server
+def go_offline(e):
+    global offline
+    if offline:
+        return
+    offline = True
+    synced = employee_cache.last_sync_at
+    as_of = time.strftime("%d %b %H:%M", time.localtime(synced)) if synced else "an earlier session"
+    root.title(f"Employee Data (offline, data as of {as_of})")
+    messagebox.showwarning("Offline", f"The database cannot be reached:\n{e}\n\n"
+                                      f"Showing the saved copy from {as_of}, read-only. "
+                                      f"The app reconnects when the database is back.")
+    if employee_cache.loaded:
+        display_data()
+
+
+def go_online():
+    global offline
+    if offline:
+        offline = False
+        root.title('Employee Data')
+
+
+# Writes and anything else that needs the server are refused while offline
+def require_online(action):
+    if offline:
+        messagebox.showerror("Offline", f"Cannot {action} while the database is unreachable. "
+                                        f"The data shown is a read-only copy.")
+        return False
+    return True
+
+
+# Bulk and reporting features that read or write the database directly are not offered through the service
+def require_direct(action):
+    if service is not None:
+        messagebox.showerror("Service Mode", f"Cannot {action} through the employee service. "
+                                             f"Run without EMPLOYEE_SERVICE_URL to use it.")
+        return False
+    return True
+
+
+# Show or hide the busy indicator while background queries are running
+def set_busy(busy):
+    if busy:
+        busy_bar.start(10)
+        root.config(cursor="watch")
+    else:
+        busy_bar.stop()
+        root.config(cursor="")
+
+
+# Open DB_POOL_PREWARM pooled connections (default 2: the cache load and the first page) while
+# the user types their credentials. There is no result to deliver, so this runs on its own
+# thread rather than the query executor. A failure is left for the first real query to report.
+def prewarm_connections():
+    if service is not None:
+        return  # The service holds the connections
+
+    def prewarm():
+        try:
+            with metrics.span("connect", "prewarm"):
+                db_pool.prewarm(int(os.getenv("DB_POOL_PREWARM", "2")))
+        except Exception as e:
+            logging.error(f"Error prewarming database connections: {e}")
+
+    threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
+
+
+# Periodically close pooled connections that have sat idle past their timeout
+def prune_idle_connections():
+    db_pool.prune()
+    root.after(60000, prune_idle_connections)
+
+
+# Show connection pool statistics
+def show_pool_stats():
+    stats = db_pool.stats()
+    messagebox.showinfo(
+        "Connection Pool",
+        f"Pool size: {stats['size']} (open: {stats['open']}, in use: {stats['in_use']}, idle: {stats['idle']})\n"
+        f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {stats['hit_rate']:.0%}\n"
+        f"Average acquire: {stats['avg_acquire_time'] * 1000:.1f} ms\n"
+        f"Average connect: {stats['avg_connect_time'] * 1000:.1f} ms\n"
+        f"Waits: {stats['waits']}  Average wait: {stats['avg_wait_time'] * 1000:.1f} ms  "
+        f"Max wait: {stats['max_wait_time'] * 1000:.1f} ms\n"
+        f"Health check failures: {stats['health_check_failures']}  "
+        f"Idle expired: {stats['idle_expired']}  Recycled: {stats['recycled']}\n"
+        f"Prewarmed at startup: {stats['prewarmed']} in {stats['prewarm_time'] * 1000:.0f} ms")
 
 
 # Global variable to track data masking state
 data_masked = True
 
+# Non-sensitive columns of the cache saved to SNAPSHOT_FILE (default employee_snapshot.db, empty
+# to turn off), shown straight away at the next start and while the server is unreachable.
+# Not used through the service, which pages every view from the server.
+snapshot_path = os.getenv("SNAPSHOT_FILE", "employee_snapshot.db") if service is None else ""
+snapshot_store = SnapshotStore(snapshot_path, PUBLIC_EMPLOYEE_COLUMN_NAMES) if snapshot_path else None
+snapshot_loading = False
 
-# Unified function to display data with optional masking
-def display_data(mask_data=True):
-    global data_masked  # Use the global variable
-    connection = connect_to_db()
-    if connection:
-        try:
-            cursor = connection.cursor()
-            if mask_data:
-                cursor.execute(
-                    "SELECT ID, Name, Job_Titles, Department, Full_or_Part_Time, Salary_or_Hourly, Typical_Hours, '****' AS Annual_Salary, '****' AS Hourly_Rate FROM Current_Employee"
-                )
-                data_masked = True
-                column_names = [
-                    "ID", "Name", "Job Titles", "Department",
-                    "Full/Part-Time", "Salary/Hourly", "Typical Hours",
-                    "Annual Salary", "Hourly Rate"
-                ]  # Original headings
-            else:
-                cursor.execute(
-                    "SELECT ID, Name, Job_Titles, Department, Full_or_Part_Time, Salary_or_Hourly, Typical_Hours, Annual_Salary, Hourly_Rate FROM Current_Employee")
-                data_masked = False
-                column_names = [
-                    "ID", "Name", "Job Titles", "Department",
-                    "Full/Part-Time", "Salary/Hourly", "Typical Hours",
-                    "Annual Salary", "Hourly Rate"
-                ]  # Original headings (no change needed here, but for clarity)
-            rows = cursor.fetchall()
-            for row in tree.get_children():
-                tree.delete(row)
-            for row in rows:
-                tree.insert("", tk.END, values=row)
-
-            # Reconfigure column headings
-            tree['columns'] = column_names  # Update columns (important if needed)
-            for i, col in enumerate(tree['columns']):
-                tree.heading(col, text=column_names[i])
 
-        except Exception as e:
-            messagebox.showerror("Fetch Error", f"Error fetching data:\n{e}")
-        finally:
-            connection.close()
+# Client-side copy of the employee table without the sensitive columns,
+# refreshed by delta sync every CACHE_REFRESH_SECONDS and held column by column
+# unless CACHE_COLUMNAR=0
+employee_cache = EmployeeCache(connect_to_db, PUBLIC_EMPLOYEE_COLUMN_NAMES, "Current_Employee",
+                               block_size=int(os.getenv("CACHE_BLOCK_SIZE", "1000")),
+                               schema=PUBLIC_EMPLOYEE_SCHEMA if os.getenv("CACHE_COLUMNAR", "1") != "0" else None)
+
+# Annual salary and hourly rate, fetched after login and wiped when the data is masked again
+sensitive_store = (ServiceSensitiveStore(service) if service else
+                   SensitiveStore(connect_to_db, "Current_Employee", SENSITIVE_COLUMN_NAMES))
+
+# Rows are fetched once without the sensitive columns, masking is applied as they are shown
+projection = MaskProjection(sensitive_store)
+
+# Updates and deletes staged while an edit session is on, shown in place of the stored rows
+edit_session = EditSession(projection)
+
+# Columns picked on the Treeview headings, and sort keys reused across sorts of the cache
+sort_spec = SortSpec()
+cache_sorter = CacheSorter(employee_cache, sensitive_store.lookup)
+
+# Values ticked in the filter panel, column -> set of values. Values of one column are
+# alternatives, columns and the search words all have to match.
+facet_selection = {column: set() for column in FACET_COLUMNS}
+facet_values = {}  # Column -> values in the order its Listbox shows them
+
+
+# Payroll reports keyed by whether they include pay. Patched for the app's own edits,
+# dropped when a sync brings in changes from elsewhere.
+payroll_reports = {}
+analytics_view = None  # Redraws the open payroll dashboard
+
+# Salaries loaded for the what-if window, dropped with the payroll reports
+salary_model = None
+what_if_view = None  # Redraws the open what-if window
+
+
+# Replace the Treeview contents with the given rows, inserted in chunks between repaints
+def show_rows(rows):
+    pager.detach()  # The Treeview now shows a fixed result set instead of pages
+    renderer.render(rows)
+
+
+# Reload whatever the Treeview is showing, used when a change cannot be patched in
+def refresh_view():
+    if pager.source is None:
+        search_data()
+    else:
+        display_data()
+
+
+# Show the full table, masked or not according to data_masked
+def display_data():
+    live_search.forget()  # The Treeview is going back to the full table
+    if employee_cache.loaded and is_active(facet_selection):
+        # Only the rows ticked in the filter panel, answered from the cache's bitmap indexes
+        employee_cache.hits += 1
+        executor.cancel("tree")  # Drop any server request this result replaces
+        show_search_results("", employee_cache.filter("", facet_selection))
+        return
+    refresh_facet_panel()
+
+    def on_loaded():
+        renderer.cancel()  # The pager has replaced any search results still being inserted
+        column_names = [
+            "ID", "Name", "Job Titles", "Department",
+            "Full/Part-Time", "Salary/Hourly", "Typical Hours",
+            "Annual Salary", "Hourly Rate"
+        ]  # Original headings
+
+        # Reconfigure column headings
+        tree['columns'] = column_names  # Update columns (important if needed)
+        update_headings()
+
+    if employee_cache.loaded:
+        # Serve the view from the cache instead of re-querying
+        employee_cache.hits += 1
+        if sort_spec:
+            columns = sort_spec.key()
+            source = SortedCachePageSource(employee_cache, lambda: cache_sorter.order(columns))
+        else:
+            source = CachePageSource(employee_cache)
+    else:
+        # Page through Current_Employee by ID, or by the sort columns then ID, instead of
+        # fetching the whole table
+        employee_cache.misses += 1
+        if service is not None:
+            source = ServicePageSource(service, sort_spec.columns)
+        else:
+            source = KeysetPageSource(connect_to_db, repository.columns(masked=True),
+                                      repository.table, "ID", repository.dialect, order_by=sort_spec.sql())
+    pager.load(source, on_loaded=on_loaded,
+               on_error=lambda e: report_db_error("Fetch Error", "Error fetching data", e))
+
+
+# Heading texts, with an arrow on the columns being sorted by, and their click handlers
+def update_headings():
+    for position, col in enumerate(tree['columns']):
+        tree.heading(col, text=f"{col} {sort_spec.indicator(position)}".rstrip(),
+                     command=lambda position=position: sort_by(position))
+
+
+# Value of a column for sorting rows that may or may not carry the sensitive columns
+def sort_value(row, column):
+    if column not in SENSITIVE_COLUMNS:
+        return row[column]
+    pay = sensitive_store.lookup(row[0])
+    return None if pay is None else pay[column - min(SENSITIVE_COLUMNS)]
+
+
+# Sort by a heading. Clicking the sorted column again reverses it, Shift+click adds a column
+# as a further sort key. Search results are sorted in place, the full table is re-paged in
+# the new order (ORDER BY on the server, or the cache's precomputed sort keys).
+def sort_by(column, extend=False):
+    if column in SENSITIVE_COLUMNS and data_masked:
+        messagebox.showinfo("Sort", "Reveal sensitive data to sort by salary or hourly rate.")
+        return
+    if column in SENSITIVE_COLUMNS and service is not None and pager.source is not None:
+        messagebox.showinfo("Sort", "The employee service only sorts the full table by the other "
+                                    "columns. Search first to sort the results by pay.")
+        return
+    reversed_only = sort_spec.toggle(column, extend)
+    update_headings()
+    if pager.source is None and live_search.rows is not None:
+        rows = live_search.rows
+        rows = rows[::-1] if reversed_only else sort_rows(rows, sort_spec.columns, sort_value)
+        show_rows(rows)
+        live_search.shown(live_search.keyword, rows)
+    else:
+        display_data()
+
+
+# Shift+click on a heading, the heading command only sees plain clicks
+def sort_by_extended(event):
+    if tree.identify_region(event.x, event.y) != "heading":
+        return None
+    sort_by(int(tree.identify_column(event.x)[1:]) - 1, extend=True)
+    return "break"
 
 
 # Function to toggle data visibility
 def toggle_data_visibility():
-    global data_masked
-
     if data_masked:
+        if not require_online("reveal sensitive data"):
+            return
         # Require login to reveal sensitive data
         show_login_window()
     else:
         # No login required to hide sensitive data
-        display_data(mask_data=True)  # Mask data
+        mask_sensitive_data()
 
 
-# Add data to the database
-def add_data():
-    if data_masked:
-        messagebox.showerror("Operation Error",
-                             "Cannot add a record while sensitive data is masked. Please reveal sensitive data first.")
-        return
+# Rewrite only the two sensitive columns of the rows in the Treeview
+def show_sensitive_columns(keys=None):
+    iids = tree.get_children() if keys is None else [str(key) for key in keys if tree.exists(str(key))]
+    for iid in iids:
+        salary, rate = edit_session.sensitive(int(iid))
+        tree.set(iid, "Annual Salary", salary)
+        tree.set(iid, "Hourly Rate", rate)
 
-    if not all(
-            [name_entry.get(), job_entry.get(), dept_entry.get(), type_entry.get(),
-             salary_type_entry.get(), hours_entry.get(), annual_salary_entry.get(),
-             hourly_rate_entry.get()]):
-        messagebox.showwarning("Input Error", "All fields must be filled out.")
-        return
 
-    # Input length checks
-    if (len(name_entry.get()) > 50 or
-            len(job_entry.get()) > 50 or
-            len(dept_entry.get()) > 100 or
-            len(type_entry.get()) > 50 or
-            len(salary_type_entry.get()) > 50):
-        messagebox.showwarning("Input Error", "One or more fields exceed the maximum length.")
-        return
+# After login: fetch the sensitive columns and fill them into the rows already on screen
+def reveal_sensitive_data():
+    def on_success(fetched):
+        global data_masked
+        if sensitive_store.apply(fetched) is None:
+            return  # Masked again while the values were being fetched
+        data_masked = False
+        projection.masked = False
+        show_sensitive_columns()
+        refresh_analytics()
 
-    # Validate numeric inputs
-    hours_str = hours_entry.get().strip()
-    annual_salary_str = annual_salary_entry.get().strip()
-    hourly_rate_str = hourly_rate_entry.get().strip()
+    executor.submit(sensitive_store.fetch, channel="sensitive", on_success=on_success,
+                    on_error=lambda e: report_db_error("Fetch Error", "Error fetching data", e))
 
-    if not hours_str:
-        messagebox.showwarning("Input Error", "Hours cannot be empty.")
-        return
-    if not annual_salary_str:
-        messagebox.showwarning("Input Error", "Annual Salary cannot be empty.")
-        return
-    if not hourly_rate_str:
-        messagebox.showwarning("Input Error", "Hourly Rate cannot be empty.")
-        return
 
-    try:
-        typical_hours = int(hours_str) if hours_str else None
-    except ValueError:
-        messagebox.showwarning("Data Type Error", "Please enter a valid integer value for Hours.")
-        return
+# Hide the sensitive columns again and drop the fetched values
+def mask_sensitive_data():
+    global data_masked
+    executor.cancel("sensitive")
+    sensitive_store.wipe()
+    data_masked = True
+    projection.masked = True
+    show_sensitive_columns()
+    payroll_reports.pop(True, None)
+    refresh_analytics()
+    # The salary columns are not sortable while masked, and their order would give them away
+    if sort_spec.drop(SENSITIVE_COLUMNS):
+        update_headings()
+        refresh_view()
 
-    try:
-        annual_salary = float(annual_salary_str) if annual_salary_str else None
-    except ValueError:
-        messagebox.showwarning("Data Type Error",
-                             "Please enter a valid numeric value for Annual Salary.")
-        return
 
-    try:
-        hourly_rate = float(hourly_rate_str) if hourly_rate_str else None
-    except ValueError:
-        messagebox.showwarning("Data Type Error",
-                             "Please enter a valid numeric value for Hourly Rate.")
+# Add data to the database
+def add_data():
+    if not require_online("add a record"):
         return
-
-    # Reverse first name and last name and convert to uppercase
-    name_parts = name_entry.get().strip().split()
-    if len(name_parts) < 2:
-        messagebox.showwarning("Input Error", "Please enter both first name and last name.")
+    if data_masked:
+        messagebox.showerror("Operation Error",
+                             "Cannot add a record while sensitive data is masked. Please reveal sensitive data first.")
         return
-    reversed_name = " ".join(name_parts[::-1]).upper()
 
-    # Convert other fields to uppercase
-    job_title = job_entry.get().strip().upper()
-    department = dept_entry.get().strip().upper()
-    full_or_part_time = type_entry.get().strip().upper()
+    fields = (name_entry.get(), job_entry.get(), dept_entry.get(), type_entry.get(),
+              salary_type_entry.get(), hours_entry.get(), annual_salary_entry.get(),
+              hourly_rate_entry.get())
+
+    # The row comes back with the ID generated by the database
+    def on_success(row):
+        messagebox.showinfo("Success", "Record added successfully!")
+        update_payroll(row[0], row[:7], row[7:], added=True)
+        employee_cache.upsert(row[:7])
+        sensitive_store.put(row[0], row[7:])
+        refresh_facet_panel()
+        # Show just the new row, only reload when the Treeview cannot take it in place
+        if not pager.apply_insert(row):
+            refresh_view()
+
+    def on_error(e):
+        if isinstance(e, ValidationError):
+            messagebox.showwarning(e.title, e.message)
+            return
+        logging.error(f"Error adding record: {e}, Fields: {fields}")
+        report_db_error("Insert Error", "Error adding record", e)
 
-    connection = connect_to_db()
-    if connection:
-        try:
-            cursor = connection.cursor()
-            query = """INSERT INTO Current_Employee (Name, Job_Titles, Department, Full_or_Part_Time, Salary_or_Hourly, Typical_Hours, Annual_Salary, Hourly_Rate)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""  # ID removed
-
-            params = (reversed_name, job_title, department, full_or_part_time,
-                      salary_type_entry.get(), typical_hours, annual_salary, hourly_rate)
-            cursor.execute(query, params)
-            connection.commit()
-            messagebox.showinfo("Success", "Record added successfully!")
-            display_data()  # Refresh data
-        except Exception as e:
-            logging.error(f"Error adding record: {e}, Query: {query}, Parameters: {params}")
-            messagebox.showerror("Insert Error", f"Error adding record:\n{e}")
-        finally:
-            connection.close()
+    executor.submit(repository.add, *fields, on_success=on_success, on_error=on_error)
 
 
 # Update data in the database
@@ -197,80 +414,128 @@ def update_data():
         messagebox.showwarning("Selection Error", "Please select a record to update.")
         return
 
-    if not all(
-            [name_entry.get(), job_entry.get(), dept_entry.get(), type_entry.get(),
-             salary_type_entry.get(), hours_entry.get(), annual_salary_entry.get(),
-             hourly_rate_entry.get()]):
-        messagebox.showwarning("Input Error", "All fields must be filled out.")
-        return
+    values = tree.item(selected_item[0], 'values')
+    employee_id = int(values[0])
+    fields = (name_entry.get(), job_entry.get(), dept_entry.get(), type_entry.get(),
+              salary_type_entry.get(), hours_entry.get(), annual_salary_entry.get(),
+              hourly_rate_entry.get())
 
-    # Input length checks
-    if (len(name_entry.get()) > 50 or
-            len(job_entry.get()) > 50 or
-            len(dept_entry.get()) > 100 or
-            len(type_entry.get()) > 50 or
-            len(salary_type_entry.get()) > 50):
-        messagebox.showwarning("Input Error", "One or more fields exceed the maximum length.")
+    if edit_session.active:
+        # Stage the change, it is written with the rest of the session
+        try:
+            edit_session.stage_update(repository.prepare_update(employee_id, *fields))
+        except ValidationError as e:
+            messagebox.showwarning(e.title, e.message)
+            return
+        show_pending(employee_id)
+        return
+    if not require_online("update a record"):
         return
 
-    # Validate numeric inputs
-    hours_str = hours_entry.get().strip()
-    annual_salary_str = annual_salary_entry.get().strip()
-    hourly_rate_str = hourly_rate_entry.get().strip()
+    def on_success(row):
+        messagebox.showinfo("Success", "Record updated successfully!")
+        update_payroll(employee_id, row[:7], row[7:])
+        employee_cache.upsert(row[:7])
+        sensitive_store.put(row[0], row[7:])
+        refresh_facet_panel()
+        # Update the one changed row in place instead of reloading the table
+        pager.apply_update(row)
+        renderer.update(row)
+
+    def on_error(e):
+        if isinstance(e, ValidationError):
+            messagebox.showwarning(e.title, e.message)
+            return
+        logging.error(f"Error updating record {employee_id}: {e}, Fields: {fields}")
+        report_db_error("Update Error", "Error updating record", e)
 
-    if not hours_str:
-        messagebox.showwarning("Input Error", "Hours cannot be empty.")
-        return
-    if not annual_salary_str:
-        messagebox.showwarning("Input Error", "Annual Salary cannot be empty.")
+    executor.submit(repository.update, employee_id, *fields, on_success=on_success, on_error=on_error)
+
+
+# Import employees from a CSV file in batched transactions
+def import_csv():
+    if not require_online("import records") or not require_direct("import records"):
         return
-    if not hourly_rate_str:
-        messagebox.showwarning("Input Error", "Hourly Rate cannot be empty.")
+    if data_masked:
+        messagebox.showerror("Operation Error",
+                             "Cannot import records while sensitive data is masked. Please reveal sensitive data first.")
         return
 
-    try:
-        typical_hours = int(hours_str) if hours_str else None
-    except ValueError:
-        messagebox.showwarning("Data Type Error", "Please enter a valid integer value for Hours.")
+    path = filedialog.askopenfilename(title="Import Employees",
+                                      filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    if not path:
         return
 
-    try:
-        annual_salary = float(annual_salary_str) if annual_salary_str else None
-    except ValueError:
-        messagebox.showwarning("Data Type Error",
-                             "Please enter a valid numeric value for Annual Salary.")
-        return
+    def run_import():
+        return import_employees(read_csv(path), connect_to_db,
+                                batch_size=int(os.getenv("IMPORT_BATCH_SIZE", "1000")))
+
+    def on_success(report):
+        for line_number, title, message in report.errors:
+            logging.error(f"Import of {path} rejected line {line_number}: {title}: {message}")
+        lines = [report.summary()]
+        lines += [f"Line {n}: {message}" for n, _, message in report.errors[:10]]
+        if len(report.errors) > 10:
+            lines.append(f"... and {len(report.errors) - 10} more (see error_log.txt)")
+        messagebox.showinfo("Import Complete", "\n".join(lines))
+        payroll_reports.clear()
+        # New rows reach the view through the cache sync, or a reload before the cache is warm
+        if employee_cache.loaded:
+            refresh_cache()
+        else:
+            refresh_view()
 
-    try:
-        hourly_rate = float(hourly_rate_str) if hourly_rate_str else None
-    except ValueError:
-        messagebox.showwarning("Data Type Error",
-                             "Please enter a valid numeric value for Hourly Rate.")
+    executor.submit(run_import, on_success=on_success,
+                    on_error=lambda e: report_db_error("Import Error", "Error importing records", e))
+
+
+# Export the employees in the current view to CSV, JSON Lines or Parquet.
+# Follows the masking state, and search results export only the rows that match the search.
+def export_data():
+    if not require_online("export") or not require_direct("export"):
+        return
+    path = filedialog.asksaveasfilename(
+        title="Export Employees", defaultextension=".csv",
+        filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")])
+    if not path:
         return
 
-    connection = connect_to_db()
-    if connection:
-        try:
-            cursor = connection.cursor()
-            values = tree.item(selected_item[0], 'values')
-            query = """UPDATE Current_Employee
-                       SET Name = ?, Job_Titles = ?, Department = ?, Full_or_Part_Time = ?, 
-                           Salary_or_Hourly = ?, Typical_Hours = ?, Annual_Salary = ?, Hourly_Rate = ?
-                       WHERE ID = ?"""
-
-            params = (name_entry.get(), job_entry.get(), dept_entry.get(),
-                      type_entry.get(), salary_type_entry.get(), typical_hours,
-                      annual_salary, hourly_rate, values[0])
-            cursor.execute(query, params)  # Parameters in a tuple
-            connection.commit()
-            messagebox.showinfo("Success", "Record updated successfully!")
-            display_data(mask_data=False)  # Refresh data without masking
-        except Exception as e:
-            logging.error(
-                f"Error updating record: {e}, Query: {query}, Parameters: {params}, Parameter Types: {[type(p) for p in params]}")
-            messagebox.showerror("Update Error", f"Error updating record:\n{e}")
-        finally:
-            connection.close()
+    masked = data_masked
+    keyword = live_search.keyword
+    filters = {column: sorted(values, key=str) for column, values in facet_selection.items() if values}
+    cancel_requested = threading.Event()
+
+    # Progress window, the export itself runs on the background executor
+    progress_window = tk.Toplevel(root)
+    progress_window.title("Export")
+    progress_window.resizable(False, False)
+    progress_label = tk.Label(progress_window, text="Starting export...", width=40)
+    progress_label.grid(row=0, column=0, padx=10, pady=10)
+    tk.Button(progress_window, text="Cancel", command=cancel_requested.set).grid(row=1, column=0, pady=10)
+
+    def show_progress(count):
+        if progress_window.winfo_exists():
+            progress_label.config(text=f"Exported {count} rows...")
+
+    def run_export():
+        return export_employees(connect_to_db, path, masked=masked, filters=filters, keyword=keyword,
+                                arraysize=int(os.getenv("EXPORT_ARRAYSIZE", "5000")),
+                                on_progress=lambda count: executor.post(show_progress, count),
+                                cancelled=cancel_requested.is_set)
+
+    def on_success(count):
+        progress_window.destroy()
+        messagebox.showinfo("Export Complete", f"Exported {count} rows to {path}")
+
+    def on_error(e):
+        progress_window.destroy()
+        if isinstance(e, ExportCancelled):
+            messagebox.showinfo("Export Cancelled", str(e))
+            return
+        logging.error(f"Error exporting to {path}: {e}")
+        report_db_error("Export Error", "Error exporting records", e)
+
+    executor.submit(run_export, on_success=on_success, on_error=on_error)
 
 
 # Delete data from the database
@@ -280,50 +545,815 @@ def delete_data():
         messagebox.showwarning("Selection Error", "Please select a record to delete.")
         return
 
+    if edit_session.active:
+        # Stage the deletion for every selected row, confirmed when the session is saved
+        for iid in selected_item:
+            edit_session.stage_delete(int(tree.item(iid, 'values')[0]))
+            show_pending(int(iid))
+        return
+    if not require_online("delete a record"):
+        return
+
     # Show a confirmation dialog
     confirm = messagebox.askyesno("Confirm Deletion",
                                  "Are you sure you want to delete this record?")
     if not confirm:
         return  # Cancel the deletion if the user selects "No"
 
-    connection = connect_to_db()
-    if connection:
-        try:
-            cursor = connection.cursor()
-            values = tree.item(selected_item[0], 'values')
-            query = "DELETE FROM Current_Employee WHERE ID = ?"
-            cursor.execute(query, (values[0],))
-            connection.commit()
-            messagebox.showinfo("Success", "Record deleted successfully!")
-            display_data()  # Refresh data
-        except Exception as e:
-            messagebox.showerror("Delete Error", f"Error deleting record:\n{e}")
-        finally:
-            connection.close()
+    values = tree.item(selected_item[0], 'values')
+    employee_id = int(values[0])
+
+    def on_success(_):
+        messagebox.showinfo("Success", "Record deleted successfully!")
+        update_payroll(employee_id)
+        employee_cache.remove(employee_id)
+        sensitive_store.remove(employee_id)
+        refresh_facet_panel()
+        pager.apply_delete(employee_id)  # Remove just the deleted row
+        renderer.discard([employee_id])
+
+    executor.submit(repository.delete, employee_id, on_success=on_success,
+                    on_error=lambda e: report_db_error("Delete Error", "Error deleting record", e))
+
+
+# Redraw a row of the Treeview with its staged change
+def show_pending(key):
+    iid = str(key)
+    if tree.exists(iid):
+        staged = edit_session.updates.get(key)
+        if staged is not None:
+            tree.item(iid, values=edit_session(staged))
+        tree.item(iid, tags=edit_session.tags((key,)))
+    update_session_status()
+
+
+def update_session_status():
+    count = len(edit_session)
+    session_status.config(text=f"{count} pending change{'s' if count != 1 else ''}" if edit_session.active else "")
+
+
+# Turn the edit session on or off. Turning it off with changes pending asks whether to save them.
+def toggle_edit_session():
+    if session_var.get():
+        edit_session.active = True
+    elif edit_session:
+        answer = messagebox.askyesnocancel(
+            "Edit Session", f"Save the {len(edit_session)} pending changes before ending the session?")
+        session_var.set(True)
+        if answer is None:
+            return
+        if answer:
+            save_edit_session(on_saved=end_edit_session)
+            return
+        discard_edit_session()
+        end_edit_session()
+    else:
+        edit_session.active = False
+    update_session_status()
+
+
+def end_edit_session():
+    edit_session.active = False
+    session_var.set(False)
+    update_session_status()
+
+
+# Write every staged update and delete in one transaction, then patch the cache and the
+# Treeview once. A failure rolls the whole session back and keeps the changes staged.
+def save_edit_session(on_saved=None):
+    if not edit_session:
+        if on_saved:
+            on_saved()
+        return
+    if not require_online("save changes"):
+        return
+    if edit_session.deletes and not messagebox.askyesno(
+            "Confirm Deletion", f"Delete {len(edit_session.deletes)} records and save "
+                                f"{len(edit_session.updates)} updates?"):
+        return
+    updates, deletes = edit_session.snapshot()
+
+    def on_success(counts):
+        edit_session.written(updates, deletes)
+        show_written_changes(updates, deletes)
+        update_session_status()
+        messagebox.showinfo("Changes Saved", f"Saved {counts[0]} updates and {counts[1]} deletions "
+                                             f"in one transaction.")
+        if on_saved:
+            on_saved()
+
+    def on_error(e):
+        logging.error(f"Error saving edit session ({len(updates)} updates, {len(deletes)} deletes): {e}")
+        report_db_error("Save Error", "Error saving changes, nothing was written", e)
+
+    executor.submit(repository.apply_changes, updates, deletes, on_success=on_success, on_error=on_error)
+
+
+# Patch payroll, the cache, the sensitive store and the Treeview once for a batch written
+# by EmployeeRepository.apply_changes()
+def show_written_changes(updates, deletes):
+    for row in updates:
+        update_payroll(row[0], row[:7], row[7:])
+        employee_cache.upsert(row[:7])
+        sensitive_store.put(row[0], row[7:])
+        pager.apply_update(row)
+        renderer.update(row)
+    for key in deletes:
+        update_payroll(key)
+        employee_cache.remove(key)
+        sensitive_store.remove(key)
+        pager.apply_delete(key)
+    renderer.discard(deletes)
+    refresh_facet_panel()
+
+
+# Drop the staged changes and reload the view to show the stored rows again
+def discard_edit_session():
+    if edit_session.discard():
+        refresh_view()
+    update_session_status()
+
+
+# Leave the application, offering to save an edit session that still has changes
+def quit_app():
+    if edit_session:
+        answer = messagebox.askyesnocancel(
+            "Edit Session", f"Save the {len(edit_session)} pending changes before exiting?")
+        if answer is None:
+            return
+        if answer:
+            save_edit_session(on_saved=root.quit)
+            return
+    root.quit()
+
+
+# Show search results, masked and sorted the same way as the rest of the Treeview
+def show_search_results(keyword, rows):
+    if sort_spec:
+        rows = sort_rows(rows, sort_spec.columns, sort_value)
+    show_rows(rows)
+    live_search.shown(keyword, rows)  # Lets the next keystroke narrow these rows locally
+    refresh_facet_panel()
 
 
 # Search data in the Treeview
-def search_data():
-    keyword = search_entry.get().strip().lower()
-    for row in tree.get_children():
-        tree.delete(row)
+def search_data(keyword=None):
+    if keyword is None:
+        keyword = search_entry.get().strip().lower()
+    if employee_cache.loaded:
+        employee_cache.hits += 1
+        executor.cancel("tree")  # Drop any server request this result replaces
+        show_search_results(keyword, employee_cache.filter(keyword, facet_selection))
+        return
+    employee_cache.misses += 1
+    # Every word must appear in Name, Job_Titles or Department, the same rule as the local index.
+    # The salary columns come from the sensitive store, so they are never part of the search.
+    executor.submit(repository.search, keyword, True, channel="tree",
+                    on_success=lambda rows: show_search_results(keyword, rows),
+                    on_error=lambda e: report_db_error("Search Error", "Error searching records", e))
+
+
+# Search as the user types, an emptied search box goes back to the full table
+def run_live_search(keyword):
+    if keyword:
+        search_data(keyword)
+    else:
+        display_data()
+
+
+# Drop rows that no longer match a narrowed live search
+def remove_search_rows(keys):
+    renderer.discard(keys)
+    tree.delete(*[str(key) for key in keys if tree.exists(str(key))])
+    refresh_facet_panel()
+
+
+# Redraw the filter panel: every value of each facet column with the number of rows ticking it
+# would leave, given the search on screen and the other columns' ticks. Needs the cache loaded.
+def refresh_facet_panel():
+    if not employee_cache.loaded:
+        return
+    counts = employee_cache.facet_counts(live_search.keyword or "", facet_selection)
+    for column, listbox in facet_lists.items():
+        values = employee_cache.facets.values(column)
+        # Keep ticked values that no longer occur, so they can still be unticked
+        values += sorted((value for value in facet_selection[column] if value not in counts[column]), key=str)
+        facet_values[column] = values
+        top = listbox.yview()[0]
+        listbox.delete(0, tk.END)
+        for index, value in enumerate(values):
+            count = counts[column].get(value, 0)
+            listbox.insert(tk.END, f"{value} ({count})")
+            if not count:
+                listbox.itemconfig(index, foreground="gray")
+            if value in facet_selection[column]:
+                listbox.selection_set(index)
+        listbox.yview_moveto(top)
+
+
+# Values were ticked or unticked in the filter panel
+def select_facet(column):
+    listbox = facet_lists[column]
+    facet_selection[column] = {facet_values[column][index] for index in listbox.curselection()}
+    apply_facets()
+
+
+def clear_facets():
+    for values in facet_selection.values():
+        values.clear()
+    apply_facets()
+
+
+# Show the rows matching the filter panel and whatever is in the search box
+def apply_facets():
+    if search_entry.get().strip():
+        search_data()
+    else:
+        display_data()
+
+
+# Pull changes from the server into the employee cache, and into the sensitive store while it is loaded
+def refresh_cache():
+    if service is None:  # Through the service every view is paged from the server
+        executor.submit(employee_cache.fetch_delta, channel="cache", on_success=apply_cache_delta,
+                        on_error=cache_refresh_failed)
+    if sensitive_store.loaded:
+        executor.submit(sensitive_store.sync, channel="sensitive", on_success=apply_sensitive_changes,
+                        on_error=lambda e: logging.error(f"Error refreshing sensitive data: {e}"))
+
+
+def cache_refresh_failed(e):
+    logging.error(f"Error refreshing employee cache: {e}")
+    if isinstance(e, DatabaseConnectionError) and employee_cache.loaded:
+        go_offline(e)
+
+
+# Start the cache from the snapshot on disk, if there is one, then keep it in sync with the
+# server. Runs while the login window is up, so the table can be shown from it straight away.
+def start_employee_cache():
+    global snapshot_loading
+    if snapshot_store is None or not snapshot_store.exists():
+        schedule_cache_refresh()
+        return
 
-    connection = connect_to_db()
-    if connection:
+    def on_success(delta):
+        global snapshot_loading
+        snapshot_loading = False
+        if delta is not None:
+            apply_cache_delta(delta)
+            if offline:
+                display_data()  # The server went missing while the snapshot was read
+        elif offline:
+            messagebox.showerror("Connection Error", "The database cannot be reached and there is no saved copy.")
+            root.quit()
+            return
+        schedule_cache_refresh()
+
+    def on_error(e):
+        global snapshot_loading
+        snapshot_loading = False
+        logging.error(f"Error reading employee snapshot {snapshot_path}: {e}")
+        schedule_cache_refresh()
+
+    snapshot_loading = True
+    executor.submit(employee_cache.load_snapshot, snapshot_store, channel="cache",
+                    on_success=on_success, on_error=on_error)
+
+
+# Apply synced changes to the cache and patch any of them that are on screen
+def apply_cache_delta(delta):
+    inserted, updated, deleted = employee_cache.apply(delta)
+    if delta.source == "server":
+        go_online()
+        if snapshot_store is not None:
+            snapshot_store.save(delta, employee_cache.block_size)
+    for row in inserted:
+        pager.apply_insert(row)
+    for row in updated:
+        pager.apply_update(row)
+        renderer.update(row)
+    for key in deleted:
+        pager.apply_delete(key)
+    renderer.discard(deleted)
+    if delta.full or inserted or updated or deleted:
+        refresh_facet_panel()
+    if inserted or updated or deleted:
+        payroll_reports.clear()
+        refresh_analytics()
+
+
+# Show synced salary changes in the rows on screen
+def apply_sensitive_changes(fetched):
+    changed = sensitive_store.apply(fetched)
+    if changed and not data_masked:
+        show_sensitive_columns(changed)
+    if changed:
+        payroll_reports.pop(True, None)
+        refresh_analytics()
+
+
+# Periodic background auto-refresh of the employee cache
+def schedule_cache_refresh():
+    refresh_cache()
+    root.after(int(float(os.getenv("CACHE_REFRESH_SECONDS", "60")) * 1000), schedule_cache_refresh)
+
+
+# Show employee cache statistics
+def show_cache_stats():
+    stats = employee_cache.stats()
+    staleness = "never synced" if stats["staleness"] is None else f"{stats['staleness']:.0f} s"
+    messagebox.showinfo(
+        "Employee Cache",
+        f"Loaded: {'yes' if stats['loaded'] else 'no'}  Rows: {stats['rows']}\n"
+        f"Hits: {stats['hits']}  Misses: {stats['misses']}\n"
+        f"Refreshes: {stats['probes']} (with changes: {stats['syncs']})\n"
+        f"Rows synced last refresh: {stats['rows_synced_last']}  Total: {stats['rows_synced_total']}\n"
+        f"Last refresh took: {stats['last_sync_duration'] * 1000:.0f} ms\n"
+        f"Rows restored from snapshot: {stats['snapshot_rows']}  Snapshot writes: "
+        f"{snapshot_store.writes if snapshot_store else 'off'}\n"
+        f"Staleness: {staleness}\n"
+        f"Sorts: {cache_sorter.sorts}  Reversed in place: {cache_sorter.reverses}")
+
+
+# Diagnostics panel: time spent connecting, executing, fetching and rendering per operation,
+# with the most recent slow operations. Refreshes itself every second while open.
+def show_diagnostics():
+    window = tk.Toplevel(root)
+    window.title("Diagnostics")
+    window.geometry("760x420")
+    columns = ("Phase", "Operation", "Count", "p50 ms", "p95 ms", "Max ms", "Rows", "Bytes", "Slow")
+    spans_view = ttk.Treeview(window, columns=columns, show='headings', height=10)
+    for col in columns:
+        spans_view.heading(col, text=col)
+        spans_view.column(col, width=110 if col == "Operation" else 70, anchor='w' if col in columns[:2] else 'e')
+    spans_view.grid(row=0, column=0, columnspan=3, sticky='nsew', padx=10, pady=(10, 5))
+    slow_list = tk.Listbox(window, height=6)
+    slow_list.grid(row=1, column=0, columnspan=3, sticky='nsew', padx=10, pady=5)
+    window.grid_rowconfigure(0, weight=1)
+    window.grid_columnconfigure(0, weight=1)
+
+    def refresh():
+        if not window.winfo_exists():
+            return
+        snapshot = metrics.snapshot()
+        spans_view.delete(*spans_view.get_children())
+        for entry in snapshot["spans"]:
+            spans_view.insert("", tk.END, values=(
+                entry["phase"], entry["operation"], entry["count"],
+                f"{entry['p50_seconds'] * 1000:.1f}", f"{entry['p95_seconds'] * 1000:.1f}",
+                f"{entry['max_seconds'] * 1000:.1f}", entry["rows"], entry["bytes"], entry["slow"]))
+        slow_list.delete(0, tk.END)
+        for entry in reversed(snapshot["slow"]):
+            at = time.strftime("%H:%M:%S", time.localtime(entry["time"]))
+            slow_list.insert(tk.END, f"{at}  slow {entry['phase']} for {entry['operation']}: "
+                                     f"{entry['ms']:.0f} ms, {entry['rows']} rows")
+        window.after(1000, refresh)
+
+    def save():
+        path = filedialog.asksaveasfilename(
+            parent=window, title="Save Metrics", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if path:
+            metrics.dump(path)
+
+    tk.Button(window, text="Reset", command=metrics.reset).grid(row=2, column=0, sticky='w', padx=10, pady=10)
+    tk.Button(window, text="Save Metrics...", command=save).grid(row=2, column=2, sticky='e', padx=10, pady=10)
+    refresh()
+
+
+# Write the metrics to METRICS_FILE every METRICS_DUMP_SECONDS for collection
+def dump_metrics():
+    path = os.getenv("METRICS_FILE")
+    if not path:
+        return
+    try:
+        metrics.dump(path)
+    except OSError as e:
+        logging.error(f"Error writing metrics to {path}: {e}")
+    root.after(int(float(os.getenv("METRICS_DUMP_SECONDS", "60")) * 1000), dump_metrics)
+
+
+# Headcount and payroll per group (runs on a worker thread). The cached rows are aggregated
+# locally when loaded, otherwise the server does the GROUP BY. Pay is only summed when unmasked.
+def compute_payroll_report(include_pay):
+    from payroll_analytics import aggregate_cache, aggregate_server  # Loads NumPy when installed
+    weeks = float(os.getenv("PAYROLL_WEEKS", "52"))
+    if employee_cache.loaded and (sensitive_store.loaded or not include_pay):
+        return aggregate_cache(employee_cache.rows, sensitive_store.values if include_pay else None, weeks)
+    return aggregate_server(connect_to_db, include_pay, weeks, repository.table)
+
+
+# Patch the payroll reports for a record the app added, updated (new_row/new_pay given) or
+# deleted. Call before the employee cache takes the change, it still has the old record.
+def update_payroll(employee_id, new_row=None, new_pay=None, added=False):
+    old_row = None if added else employee_cache.rows.get(employee_id)
+    if not added and old_row is None:
+        # Without the record as it was the totals cannot be adjusted, recalculate instead
+        payroll_reports.clear()
+    else:
+        old_pay = None if added else sensitive_store.lookup(employee_id)
+        for include_pay, report in payroll_reports.items():
+            report.apply_change(old_row, old_pay if include_pay else None,
+                                new_row, new_pay if include_pay else None)
+    refresh_analytics()
+
+
+def refresh_analytics():
+    global salary_model
+    salary_model = None
+    if analytics_view is not None:
+        analytics_view()
+    if what_if_view is not None:
+        what_if_view()
+
+
+# Payroll dashboard: headcount, annual payroll and average pay per department,
+# full/part-time or salary/hourly. Payroll is shown as '****' while data is masked.
+def show_analytics():
+    global analytics_view
+    if not require_direct("open the payroll dashboard"):
+        return
+    window = tk.Toplevel(root)
+    window.title("Payroll Analytics")
+    window.geometry("620x420")
+    group_names = {"Department": "Department", "Full/Part-Time": "Full_or_Part_Time",
+                   "Salary/Hourly": "Salary_or_Hourly"}
+    group_var = tk.StringVar(value="Department")
+    tk.Label(window, text="Group by:").grid(row=0, column=0, padx=10, pady=10, sticky='w')
+    ttk.Combobox(window, textvariable=group_var, values=list(group_names),
+                 state="readonly").grid(row=0, column=1, pady=10, sticky='w')
+    columns = ("Group", "Headcount", "Annual Payroll", "Average")
+    table = ttk.Treeview(window, columns=columns, show='headings')
+    for col in columns:
+        table.heading(col, text=col)
+        table.column(col, width=200 if col == "Group" else 120, anchor='w' if col == "Group" else 'e')
+    table.grid(row=1, column=0, columnspan=3, sticky='nsew', padx=10)
+    summary = tk.Label(window, anchor='w', justify='left')
+    summary.grid(row=2, column=0, columnspan=2, sticky='w', padx=10, pady=10)
+    window.grid_rowconfigure(1, weight=1)
+    window.grid_columnconfigure(2, weight=1)
+
+    def render():
+        if not window.winfo_exists():
+            return
+        include_pay = not data_masked
+        report = payroll_reports.get(include_pay)
+        if report is None:
+            summary.config(text="Calculating...")
+            load(include_pay)
+            return
+        table.delete(*table.get_children())
+        for value, count, payroll in report.rows(group_names[group_var.get()]):
+            if payroll is None:
+                table.insert("", tk.END, values=(value, count, "****", "****"))
+            else:
+                table.insert("", tk.END, values=(value, count, f"{payroll:,.0f}", f"{payroll / count:,.0f}"))
+        total = "****" if report.payroll is None else f"{report.payroll:,.0f}"
+        summary.config(text=f"Employees: {report.headcount}  Annual payroll: {total}\n"
+                            f"Computed by {report.source} in {report.duration * 1000:.0f} ms, "
+                            f"{report.incremental_updates} changes applied since")
+
+    def load(include_pay):
+        def on_success(report):
+            payroll_reports[include_pay] = report
+            render()
+
+        executor.submit(compute_payroll_report, include_pay, channel="analytics", on_success=on_success,
+                        on_error=lambda e: report_db_error("Analytics Error", "Error calculating payroll", e))
+
+    def recalculate():
+        payroll_reports.pop(not data_masked, None)
+        render()
+
+    def on_close():
+        global analytics_view
+        analytics_view = None
+        window.destroy()
+
+    tk.Button(window, text="Recalculate", command=recalculate).grid(row=2, column=2, sticky='e', padx=10)
+    group_var.trace_add("write", lambda *args: render())
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    analytics_view = render
+    render()
+
+
+# Price the scenarios on a worker thread, loading the salaries first when they are not loaded.
+# Returns (model, results), the baseline first. Identical scenarios are priced once per model.
+def price_scenarios(model, scenarios):
+    from salary_scenarios import load_cache, load_server  # Loads NumPy when installed
+    if model is None:
+        weeks = float(os.getenv("PAYROLL_WEEKS", "52"))
+        if employee_cache.loaded and sensitive_store.loaded:
+            model = load_cache(employee_cache.rows, sensitive_store.values, weeks)
+        else:
+            model = load_server(connect_to_db, weeks, repository.table)
+    return model, [model.baseline] + [model.evaluate(scenario) for scenario in scenarios]
+
+
+# Salary what-if: build scenarios from pay rules (a percentage change, a floor or a cap, for everyone
+# or one department, full/part-time or salary/hourly group) and compare their annual payroll with
+# today's, side by side per group. Only offered while the sensitive data is revealed, and closed
+# when it is masked again.
+def show_what_if():
+    global what_if_view
+    if not require_direct("open the salary what-if"):
+        return
+    if data_masked:
+        messagebox.showerror("Operation Error", "The salary what-if needs the sensitive data. "
+                                                "Please reveal sensitive data first.")
+        return
+    from salary_scenarios import RULE_KINDS, Rule, Scenario
+    window = tk.Toplevel(root)
+    window.title("Salary What-If")
+    window.geometry("900x600")
+    scenarios = []  # Saved scenarios, compared side by side
+    rules = []  # Rules of the scenario being built
+    group_names = {"Department": "Department", "Full/Part-Time": "Full_or_Part_Time",
+                   "Salary/Hourly": "Salary_or_Hourly"}
+
+    editor = tk.Frame(window)
+    editor.grid(row=0, column=0, columnspan=3, sticky='w', padx=10, pady=(10, 0))
+    kind_var = tk.StringVar(value=RULE_KINDS[0])
+    value_var = tk.StringVar(value="3")
+    department_var = tk.StringVar(value="Any")
+    time_var = tk.StringVar(value="Any")
+    basis_var = tk.StringVar(value="Any")
+    tk.Label(editor, text="Adjust").grid(row=0, column=0)
+    ttk.Combobox(editor, textvariable=kind_var, values=RULE_KINDS, state="readonly", width=8).grid(row=0, column=1)
+    tk.Entry(editor, textvariable=value_var, width=10).grid(row=0, column=2, padx=5)
+    tk.Label(editor, text="Department").grid(row=0, column=3)
+    department_box = ttk.Combobox(editor, textvariable=department_var, values=["Any"], width=22)
+    department_box.grid(row=0, column=4, padx=5)
+    tk.Label(editor, text="Full/Part-Time").grid(row=0, column=5)
+    ttk.Combobox(editor, textvariable=time_var, values=["Any", "F", "P"], state="readonly", width=4).grid(row=0, column=6)
+    tk.Label(editor, text="Salary/Hourly").grid(row=0, column=7, padx=(5, 0))
+    ttk.Combobox(editor, textvariable=basis_var, values=["Any", "Salary", "Hourly"], state="readonly",
+                 width=7).grid(row=0, column=8)
+
+    rule_list = tk.Listbox(window, height=5)
+    rule_list.grid(row=1, column=0, columnspan=2, sticky='ew', padx=10, pady=5)
+    rule_buttons = tk.Frame(window)
+    rule_buttons.grid(row=1, column=2, sticky='n', padx=10, pady=5)
+
+    naming = tk.Frame(window)
+    naming.grid(row=2, column=0, columnspan=3, sticky='w', padx=10)
+    name_var = tk.StringVar(value="Scenario 1")
+    group_var = tk.StringVar(value="Department")
+    tk.Label(naming, text="Scenario name:").grid(row=0, column=0)
+    tk.Entry(naming, textvariable=name_var, width=20).grid(row=0, column=1, padx=5)
+    tk.Label(naming, text="Group by:").grid(row=0, column=4, padx=(20, 5))
+    ttk.Combobox(naming, textvariable=group_var, values=list(group_names), state="readonly").grid(row=0, column=5)
+
+    table = ttk.Treeview(window, show='headings')
+    table.grid(row=3, column=0, columnspan=3, sticky='nsew', padx=10, pady=5)
+    summary = tk.Label(window, anchor='w', justify='left')
+    summary.grid(row=4, column=0, columnspan=3, sticky='w', padx=10, pady=(0, 10))
+    window.grid_rowconfigure(3, weight=1)
+    window.grid_columnconfigure(1, weight=1)
+
+    # The saved scenarios, plus the one being built while it has rules
+    def compared():
+        return scenarios + ([Scenario(f"{name_var.get().strip() or 'Draft'} (draft)", rules)] if rules else [])
+
+    def show(results, model):
+        department_box.config(values=["Any"] + model.choices("Department"))
+        baseline = results[0]
+        column = group_names[group_var.get()]
+        headings = ["Group", "Headcount"] + [result.name for result in results]
+        table.config(columns=[f"c{index}" for index in range(len(headings))])
+        for index, heading in enumerate(headings):
+            table.heading(f"c{index}", text=heading)
+            table.column(f"c{index}", width=180 if index == 0 else 110, anchor='w' if index == 0 else 'e')
+        table.delete(*table.get_children())
+        for value, (count, payroll) in sorted(baseline.groups[column].items(), key=lambda item: -item[1][1]):
+            figures = [f"{payroll:,.0f}"]
+            for result in results[1:]:
+                changed = result.groups[column].get(value, (0, 0.0))[1]
+                figures.append(f"{changed:,.0f} ({changed - payroll:+,.0f})")
+            table.insert("", tk.END, values=[value, count] + figures)
+        lines = [f"{result.name}: {result.payroll:,.0f} ({result.change:+,.0f}, {result.affected} employees "
+                 f"affected, {result.duration * 1000:.0f} ms)" for result in results[1:]]
+        lines.append(f"Baseline: {baseline.payroll:,.0f} for {len(model)} employees, "
+                     f"salaries loaded by {model.source} in {model.load_duration * 1000:.0f} ms")
+        summary.config(text="\n".join(lines))
+
+    def render():
+        global what_if_view
+        if not window.winfo_exists():
+            return
+        if data_masked:
+            # The pay figures go with the revealed data
+            what_if_view = None
+            window.destroy()
+            return
+        if salary_model is None:
+            summary.config(text="Loading salaries...")
+
+        def on_success(priced):
+            global salary_model
+            model, results = priced
+            salary_model = model
+            if window.winfo_exists() and not data_masked:
+                show(results, model)
+
+        executor.submit(price_scenarios, salary_model, compared(), channel="what_if", on_success=on_success,
+                        on_error=lambda e: report_db_error("What-If Error", "Error calculating the scenarios", e))
+
+    def add_rule():
+        choice = lambda var: None if var.get() in ("", "Any") else var.get()
         try:
-            cursor = connection.cursor()
-            query = """SELECT ID, Name, Job_Titles, Department, Full_or_Part_Time, Salary_or_Hourly, 
-                       Typical_Hours, Annual_Salary, Hourly_Rate 
-                       FROM Current_Employee
-                       WHERE LOWER(Name) LIKE ? OR LOWER(Job_Titles) LIKE ? OR LOWER(Department) LIKE ?"""
-            cursor.execute(query, (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"))
-            rows = cursor.fetchall()
-            for row in rows:
-                tree.insert("", tk.END, values=row)
-        except Exception as e:
-            messagebox.showerror("Search Error", f"Error searching records:\n{e}")
-        finally:
-            connection.close()
+            rule = Rule(kind_var.get(), value_var.get(), choice(department_var), choice(time_var), choice(basis_var))
+        except ValidationError as e:
+            messagebox.showwarning(e.title, e.message, parent=window)
+            return
+        rules.append(rule)
+        rule_list.insert(tk.END, str(rule))
+        render()
+
+    def remove_rule():
+        for index in reversed(rule_list.curselection()):
+            del rules[index]
+            rule_list.delete(index)
+        render()
+
+    def save_scenario():
+        if not rules:
+            messagebox.showwarning("Input Error", "Add at least one rule to the scenario.", parent=window)
+            return
+        scenarios.append(Scenario(name_var.get().strip() or f"Scenario {len(scenarios) + 1}", rules))
+        rules.clear()  # Scenario keeps its own copy
+        rule_list.delete(0, tk.END)
+        name_var.set(f"Scenario {len(scenarios) + 1}")
+        render()
+
+    def clear_scenarios():
+        scenarios.clear()
+        render()
+
+    def on_close():
+        global what_if_view
+        what_if_view = None
+        window.destroy()
+
+    tk.Button(editor, text="Add Rule", command=add_rule).grid(row=0, column=9, padx=(10, 0))
+    tk.Button(rule_buttons, text="Remove Rule", command=remove_rule).pack(fill='x')
+    tk.Button(naming, text="Save Scenario", command=save_scenario).grid(row=0, column=2)
+    tk.Button(naming, text="Clear Scenarios", command=clear_scenarios).grid(row=0, column=3, padx=5)
+    group_var.trace_add("write", lambda *args: render())
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    what_if_view = render
+    render()
+
+
+# Groups listed at most in the duplicate review, the rest show up once some are resolved
+MAX_DUPLICATE_GROUPS = 2000
+
+
+# Review likely duplicate employees found in the in-memory copy. Opening a group shows its
+# records. Merge keeps the selected record of each selected group (or the one with the lowest ID),
+# stored the way a new record is, and deletes the others. Delete removes the selected records.
+# Either way all the changes are written in one transaction.
+def show_duplicates():
+    if not require_direct("find duplicates"):
+        return
+    if not employee_cache.loaded:
+        messagebox.showinfo("Find Duplicates", "The employee table is still loading, please try again shortly.")
+        return
+    window = tk.Toplevel(root)
+    window.title("Possible Duplicates")
+    window.geometry("940x480")
+    columns = ("ID", "Name", "Job Titles", "Department", "Full/Part-Time", "Salary/Hourly")
+    review = ttk.Treeview(window, columns=columns, show='tree headings')
+    review.heading("#0", text="Group")
+    review.column("#0", width=200)
+    for col in columns:
+        review.heading(col, text=col)
+        review.column(col, width=60 if col == "ID" else 130)
+    scrollbar = ttk.Scrollbar(window, orient='vertical', command=review.yview)
+    review.configure(yscrollcommand=scrollbar.set)
+    review.grid(row=0, column=0, columnspan=4, sticky='nsew', padx=(10, 0), pady=10)
+    scrollbar.grid(row=0, column=4, sticky='ns', pady=10)
+    status = tk.Label(window, anchor='w')
+    status.grid(row=1, column=0, sticky='w', padx=10, pady=(0, 10))
+    window.grid_rowconfigure(0, weight=1)
+    window.grid_columnconfigure(0, weight=1)
+    groups = {}  # Group iid -> DuplicateGroup, record iids are "<group iid>/<ID>"
+
+    def label(group):
+        match = "same name" if group.score == 1.0 else f"similar names ({group.score:.0%})"
+        return f"{len(group.rows)} records, {match}"
+
+    def show(found, seconds):
+        if not window.winfo_exists():
+            return
+        review.delete(*review.get_children())
+        groups.clear()
+        for index, group in enumerate(found[:MAX_DUPLICATE_GROUPS]):
+            iid = f"group{index}"
+            groups[iid] = group
+            review.insert("", tk.END, iid=iid, text=label(group), values=("", "", "", group.department))
+            review.insert(iid, tk.END, text="...")  # The records are inserted when the group is opened
+        shown = f", showing the first {MAX_DUPLICATE_GROUPS}" if len(found) > MAX_DUPLICATE_GROUPS else ""
+        status.config(text=f"{len(found)} groups with {sum(len(group.rows) for group in found)} records, "
+                           f"found in {seconds:.1f} s{shown}")
+
+    def on_open(event):
+        iid = review.focus()
+        children = review.get_children(iid)
+        if iid not in groups or not children or review.item(children[0], 'text') != "...":
+            return
+        review.delete(*children)
+        for row in groups[iid].rows:
+            review.insert(iid, tk.END, iid=f"{iid}/{row[0]}", values=tuple(row[:6]))
+
+    def find():
+        status.config(text="Looking for duplicates...")
+        # Copied on the Tk thread, syncs and edits change a dict row store while the search runs
+        rows = list(employee_cache.rows.values())
+
+        def search():
+            started = time.perf_counter()
+            found = find_duplicates(rows)
+            return found, time.perf_counter() - started
+
+        executor.submit(search, channel="duplicates", on_success=lambda result: show(*result),
+                        on_error=lambda e: report_db_error("Find Duplicates", "Error finding duplicates", e))
+
+    # Group iid -> ID to keep, for the groups with a selected group or record
+    def selected_groups():
+        chosen = {}
+        for iid in review.selection():
+            group_iid, _, key = iid.partition("/")
+            if group_iid not in groups:
+                continue
+            if key:
+                chosen[group_iid] = int(key)
+            else:
+                chosen.setdefault(group_iid, groups[group_iid].keys[0])
+        return chosen
+
+    def write(updates, deletes):
+        def on_success(counts):
+            show_written_changes(updates, deletes)
+            messagebox.showinfo("Duplicates", f"Saved {counts[0]} updates and {counts[1]} deletions "
+                                              f"in one transaction.", parent=window)
+            if not window.winfo_exists():
+                return
+            deleted = set(deletes)
+            for group_iid, group in list(groups.items()):
+                if deleted.isdisjoint(group.keys):
+                    continue
+                group.rows = [row for row in group.rows if row[0] not in deleted]
+                if len(group.rows) < 2:
+                    review.delete(group_iid)
+                    del groups[group_iid]
+                    continue
+                for key in deleted:
+                    if review.exists(f"{group_iid}/{key}"):
+                        review.delete(f"{group_iid}/{key}")
+                review.item(group_iid, text=label(group))
+
+        executor.submit(repository.apply_changes, updates, deletes, on_success=on_success,
+                        on_error=lambda e: report_db_error("Save Error", "Error saving changes, nothing was written", e))
+
+    def merge():
+        chosen = selected_groups()
+        if not chosen:
+            messagebox.showwarning("Selection Error", "Please select the groups to merge.", parent=window)
+            return
+        if data_masked:
+            messagebox.showerror("Operation Error", "Cannot merge records while sensitive data is masked. "
+                                                    "Please reveal sensitive data first.", parent=window)
+            return
+        if not require_online("merge records"):
+            return
+        updates, deletes = [], []
+        for group_iid, survivor in chosen.items():
+            pay = sensitive_store.lookup(survivor) or (None, None)
+            kept, removed = merge_changes(groups[group_iid], survivor, pay)
+            updates.extend(kept)
+            deletes.extend(removed)
+        if messagebox.askyesno("Confirm Merge", f"Keep {len(updates)} records and delete the other "
+                                                f"{len(deletes)} in their groups?", parent=window):
+            write(updates, deletes)
+
+    def delete():
+        keys = [int(iid.partition("/")[2]) for iid in review.selection() if "/" in iid]
+        if not keys:
+            messagebox.showwarning("Selection Error", "Please open a group and select the records to delete.",
+                                   parent=window)
+            return
+        if not require_online("delete records"):
+            return
+        if messagebox.askyesno("Confirm Deletion", f"Delete {len(keys)} records?", parent=window):
+            write([], keys)
+
+    tk.Button(window, text="Find Again", command=find).grid(row=1, column=1, padx=5, pady=(0, 10))
+    tk.Button(window, text="Merge Selected Groups", command=merge).grid(row=1, column=2, padx=5, pady=(0, 10))
+    tk.Button(window, text="Delete Selected Records", command=delete).grid(row=1, column=3, padx=(5, 10),
+                                                                           pady=(0, 10))
+    review.bind("<<TreeviewOpen>>", on_open)
+    find()
 
 
 # Populate entry fields for editing
@@ -366,7 +1396,7 @@ def show_login_window():
 
         if username == valid_username and password == valid_password:
             login_window.destroy()  # Close the login window
-            display_data(mask_data=False)  # Reveal sensitive data
+            reveal_sensitive_data()  # Reveal sensitive data
         else:
             # Log incorrect login attempts
             logging.error(f"Incorrect login attempt with username: {username}")
@@ -473,161 +1503,266 @@ def show_startup_login(on_success=None):
 
 
 
-# Tkinter GUI
-root = tk.Tk()
-root.title('Employee Data')  # Set the title of the main window to 'Employee Data'
-# Get the screen width and height
-screen_width = root.winfo_screenwidth()
-screen_height = root.winfo_screenheight()
+# Build the window and run the application, importing this module only defines the functions
+if __name__ == "__main__":
+    # Operations slower than SLOW_OPERATION_MS (or SLOW_<PHASE>_MS) are logged here. Only when run
+    # as the app, importing the module (as the benchmarks do) creates no log file.
+    configure_slow_log(os.getenv("SLOW_LOG_FILE", "slow_log.txt"))
+
+    # Tkinter GUI
+    root = tk.Tk()
+    root.title('Employee Data')  # Set the title of the main window to 'Employee Data'
+    # Get the screen width and height
+    screen_width = root.winfo_screenwidth()
+    screen_height = root.winfo_screenheight()
+
+    # Set the window width and height
+    window_width = 800
+    window_height = 600
+
+    # Calculate the position to center the window
+    x = (screen_width // 2) - (window_width // 2)
+    y = (screen_height // 2) - (window_height // 2)
+
+    # Set the geometry of the main window
+    root.geometry(f"{window_width}x{window_height}+{x}+{y}")
+
+    # Background executor for database work, results come back through root.after
+    executor = QueryExecutor(root, max_workers=int(os.getenv("DB_WORKERS", "4")), on_busy=set_busy)
+
+    # Call the startup login window and draw it before building the rest of the window,
+    # then connect to the database while the user types
+    show_startup_login()
+    root.update()
+    prewarm_connections()
+
+    # Labels and Entry Widgets
+    tk.Label(root, text="Name:").grid(row=0, column=0)
+    name_entry = tk.Entry(root)
+    name_entry.grid(row=0, column=1,
+                    sticky='ew')  # Make the entry field stretch horizontally
+
+    tk.Label(root, text="Job Title:").grid(row=1, column=0)
+    job_entry = tk.Entry(root)
+    job_entry.grid(row=1, column=1, sticky='ew')
+
+    tk.Label(root, text="Department:").grid(row=2, column=0)
+    dept_entry = tk.Entry(root)
+    dept_entry.grid(row=2, column=1, sticky='ew')
+
+    tk.Label(root, text="Full/Part-Time:").grid(row=3, column=0)
+    type_entry = tk.Entry(root)
+    type_entry.grid(row=3, column=1, sticky='ew')
+
+    tk.Label(root, text="Salary/Hourly:").grid(row=4, column=0)
+    salary_type_entry = tk.Entry(root)
+    salary_type_entry.grid(row=4, column=1, sticky='ew')
+
+    tk.Label(root, text="Typical Hours:").grid(row=5, column=0)
+    hours_entry = tk.Entry(root)
+    hours_entry.grid(row=5, column=1, sticky='ew')
+
+    tk.Label(root, text="Annual Salary:").grid(row=6, column=0)
+    annual_salary_entry = tk.Entry(root)
+    annual_salary_entry.grid(row=6, column=1, sticky='ew')
+
+    tk.Label(root, text="Hourly Rate:").grid(row=7, column=0)
+    hourly_rate_entry = tk.Entry(root)
+    hourly_rate_entry.grid(row=7, column=1, sticky='ew')
+
+    # Search bar
+    tk.Label(root, text="Search:").grid(row=8, column=0)
+    search_entry = tk.Entry(root)
+    search_entry.grid(row=8, column=1,
+                    sticky='we')  # Search field already stretches horizontally
+    tk.Button(root, text="Search", command=search_data).grid(row=8, column=2)
+
+    # Search as you type, waiting SEARCH_DEBOUNCE_MS after the last key press
+    live_search = LiveSearch(root, search_entry, run_live_search, remove_search_rows,
+                             lambda: executor.cancel("tree"),
+                             delay=int(os.getenv("SEARCH_DEBOUNCE_MS", "150")))
+    tk.Button(root, text="Clear Search", command=display_data).grid(row=8, column=3)
+
+    # Configure column 1 to expand horizontally
+    root.grid_columnconfigure(1, weight=1)
+
+    # Treeview to display data
+    tree = ttk.Treeview(root,
+                        columns=('ID', 'Name', 'Job Titles', 'Department',
+                                 'Full/Part-Time',
+                                 'Salary/Hourly', 'Typical Hours', 'Annual Salary',
+                                 'Hourly Rate'), show='headings')
+    tree.grid(row=10, column=0, columnspan=2, sticky='nsew')
+
+    # Configure column headings, clicking one sorts by it and Shift+click adds it to the sort
+    update_headings()
+    tree.bind("<Shift-Button-1>", sort_by_extended)
+
+    # Add vertical scrollbar for the Treeview
+    v_scrollbar = ttk.Scrollbar(root, orient='vertical', command=tree.yview)
+    v_scrollbar.grid(row=10, column=2, sticky='ns')
+
+    # Filter panel: tick values to filter the table, each shows how many rows it would give.
+    # Filled in once the employee cache has loaded.
+    facet_panel = tk.Frame(root)
+    facet_panel.grid(row=10, column=3, sticky='ns', padx=(5, 0))
+    facet_lists = {}
+    for column, title in (("Department", "Department"), ("Full_or_Part_Time", "Full/Part-Time"),
+                          ("Salary_or_Hourly", "Salary/Hourly")):
+        tk.Label(facet_panel, text=title).pack(anchor='w')
+        facet_lists[column] = tk.Listbox(facet_panel, selectmode=tk.MULTIPLE, exportselection=False,
+                                         height=8 if column == "Department" else 3, width=24)
+        facet_lists[column].pack(fill='x', pady=(0, 5))
+        facet_lists[column].bind("<<ListboxSelect>>", lambda event, column=column: select_facet(column))
+    tk.Button(facet_panel, text="Clear Filters", command=clear_facets).pack(anchor='w')
+
+    # Keep only a few pages of rows in the Treeview and load more while scrolling
+    pager = PagedTreeview(tree, v_scrollbar, executor,
+                          page_size=int(os.getenv("PAGE_SIZE", "200")),
+                          cache_pages=int(os.getenv("PAGE_CACHE_SIZE", "32")),
+                          project=edit_session, tags=edit_session.tags)
+
+    # Search results are inserted in chunks sized to fit RENDER_BUDGET_MS per frame
+    renderer = ChunkedTreeRenderer(tree, budget_ms=float(os.getenv("RENDER_BUDGET_MS", "16")),
+                                   first_chunk=int(os.getenv("RENDER_FIRST_CHUNK", "200")),
+                                   project=edit_session, tags=edit_session.tags)
+
+    # Rows with a change staged in the edit session
+    tree.tag_configure(PENDING_UPDATE_TAG, background="#fff3c4")
+    tree.tag_configure(PENDING_DELETE_TAG, background="#f8d7da", foreground="gray")
+
+    # Add horizontal scrollbar for the Treeview
+    h_scrollbar = ttk.Scrollbar(root, orient='horizontal',
+                                command=tree.xview)
+    tree.configure(xscrollcommand=h_scrollbar.set)
+    h_scrollbar.grid(row=11, column=0, columnspan=2, sticky='ew')
+
+    # Busy indicator shown while background queries are running
+    busy_bar = ttk.Progressbar(root, mode='indeterminate', length=120)
+    busy_bar.grid(row=12, column=0, columnspan=2, sticky='w')
+
+    # Adjust grid weights for resizing
+    root.grid_rowconfigure(10, weight=1)
+    root.grid_columnconfigure(1, weight=1)
+
+    # Buttons
+    tk.Button(root, text="Add Record", command=add_data).grid(row=9, column=0)
+    tk.Button(root, text="Update Record", command=update_data).grid(row=9, column=1)
+    tk.Button(root, text="Delete Record", command=delete_data).grid(row=9, column=2)
+
+    # Edit session: Update and Delete are staged and saved together in one transaction
+    session_frame = tk.Frame(root)
+    session_frame.grid(row=9, column=3, sticky='w')
+    session_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(session_frame, text="Edit session", variable=session_var,
+                   command=toggle_edit_session).pack(side='left')
+    tk.Button(session_frame, text="Save", command=save_edit_session).pack(side='left')
+    tk.Button(session_frame, text="Discard", command=discard_edit_session).pack(side='left')
+    session_status = tk.Label(session_frame)
+    session_status.pack(side='left', padx=5)
+
+
+    # Bind event to populate fields
+    tree.bind("<Double-1>", populate_fields)
+
+    # The first page is fetched once the login succeeds (show_startup_login), not before
+
+    # Set the theme
+    import sv_ttk  # Sun Valley theme for ttk
+    sv_ttk.set_theme("light")
+
+    # Function to toggle between light and dark themes
+    def toggle_theme():
+        current_theme = sv_ttk.get_theme()
+        if current_theme == "light":
+            sv_ttk.set_theme("dark")
+        else:
+            sv_ttk.set_theme("light")
 
-# Set the window width and height
-window_width = 800
-window_height = 600
+    # Create a menu bar
+    menu_bar = tk.Menu(root)
 
-# Calculate the position to center the window
-x = (screen_width // 2) - (window_width // 2)
-y = (screen_height // 2) - (window_height // 2)
-
-# Set the geometry of the main window
-root.geometry(f"{window_width}x{window_height}+{x}+{y}")
-
-# Call the startup login window
-show_startup_login()
-
-# Labels and Entry Widgets
-tk.Label(root, text="Name:").grid(row=0, column=0)
-name_entry = tk.Entry(root)
-name_entry.grid(row=0, column=1,
-                sticky='ew')  # Make the entry field stretch horizontally
-
-tk.Label(root, text="Job Title:").grid(row=1, column=0)
-job_entry = tk.Entry(root)
-job_entry.grid(row=1, column=1, sticky='ew')
-
-tk.Label(root, text="Department:").grid(row=2, column=0)
-dept_entry = tk.Entry(root)
-dept_entry.grid(row=2, column=1, sticky='ew')
-
-tk.Label(root, text="Full/Part-Time:").grid(row=3, column=0)
-type_entry = tk.Entry(root)
-type_entry.grid(row=3, column=1, sticky='ew')
-
-tk.Label(root, text="Salary/Hourly:").grid(row=4, column=0)
-salary_type_entry = tk.Entry(root)
-salary_type_entry.grid(row=4, column=1, sticky='ew')
-
-tk.Label(root, text="Typical Hours:").grid(row=5, column=0)
-hours_entry = tk.Entry(root)
-hours_entry.grid(row=5, column=1, sticky='ew')
-
-tk.Label(root, text="Annual Salary:").grid(row=6, column=0)
-annual_salary_entry = tk.Entry(root)
-annual_salary_entry.grid(row=6, column=1, sticky='ew')
-
-tk.Label(root, text="Hourly Rate:").grid(row=7, column=0)
-hourly_rate_entry = tk.Entry(root)
-hourly_rate_entry.grid(row=7, column=1, sticky='ew')
-
-# Search bar
-tk.Label(root, text="Search:").grid(row=8, column=0)
-search_entry = tk.Entry(root)
-search_entry.grid(row=8, column=1,
-                sticky='we')  # Search field already stretches horizontally
-tk.Button(root, text="Search", command=search_data).grid(row=8, column=2)
-tk.Button(root, text="Clear Search", command=display_data).grid(row=8, column=3)
-
-# Configure column 1 to expand horizontally
-root.grid_columnconfigure(1, weight=1)
-
-# Treeview to display data
-tree = ttk.Treeview(root,
-                    columns=('ID', 'Name', 'Job Titles', 'Department',
-                             'Full/Part-Time',
-                             'Salary/Hourly', 'Typical Hours', 'Annual Salary',
-                             'Hourly Rate'), show='headings')
-tree.grid(row=10, column=0, columnspan=2, sticky='nsew')
-
-# Configure column headings
-for col in tree['columns']:
-    tree.heading(col, text=col)
-
-# Add vertical scrollbar for the Treeview
-v_scrollbar = ttk.Scrollbar(root, orient='vertical', command=tree.yview)
-tree.configure(yscrollcommand=v_scrollbar.set)
-v_scrollbar.grid(row=10, column=2, sticky='ns')
-
-# Add horizontal scrollbar for the Treeview
-h_scrollbar = ttk.Scrollbar(root, orient='horizontal',
-                            command=tree.xview)
-tree.configure(xscrollcommand=h_scrollbar.set)
-h_scrollbar.grid(row=11, column=0, columnspan=2, sticky='ew')
-
-# Adjust grid weights for resizing
-root.grid_rowconfigure(10, weight=1)
-root.grid_columnconfigure(1, weight=1)
-
-# Buttons
-tk.Button(root, text="Add Record", command=add_data).grid(row=9, column=0)
-tk.Button(root, text="Update Record", command=update_data).grid(row=9, column=1)
-tk.Button(root, text="Delete Record", command=delete_data).grid(row=9, column=2)
-
-
-# Bind event to populate fields
-tree.bind("<Double-1>", populate_fields)
-
-# Initial data display (masked)
-display_data()
-
-# Set the theme
-sv_ttk.set_theme("light")
-
-# Function to toggle between light and dark themes
-def toggle_theme():
-    current_theme = sv_ttk.get_theme()
-    if current_theme == "light":
-        sv_ttk.set_theme("dark")
-    else:
-        sv_ttk.set_theme("light")
+    # Create the "File" menu
+    file_menu = tk.Menu(menu_bar, tearoff=0)
+    menu_bar.add_cascade(label="File", menu=file_menu)
+
+    # Add "Toggle Theme" option to the "File" menu
+    file_menu.add_command(label="Toggle Theme", command=toggle_theme)
+
+    # Add "Import CSV" option to the "File" menu
+    file_menu.add_command(label="Import CSV...", command=import_csv)
+
+    # Add "Export" option to the "File" menu
+    file_menu.add_command(label="Export...", command=export_data)
+
+    # Add "Find Duplicates" option to the "File" menu
+    file_menu.add_command(label="Find Duplicates...", command=show_duplicates)
+
+    # Add "Refresh Data" option to the "File" menu
+    file_menu.add_command(label="Refresh Data", command=refresh_cache)
+
+    # Add "Reveal Sensitive Data" option to the "File" menu
+    file_menu.add_command(label="Reveal Sensitive Data",
+                          command=toggle_data_visibility)
+
+    # Add an "Exit" option to the "File" menu
+    file_menu.add_separator()
+    file_menu.add_command(label="Exit", command=quit_app)
+    root.protocol("WM_DELETE_WINDOW", quit_app)
+
+    # Create the "Help" menu
+    help_menu = tk.Menu(menu_bar, tearoff=0)
+    menu_bar.add_cascade(label="Help", menu=help_menu)
+
+    # Add "About" option to the "Help" menu
+    def show_about():
+        messagebox.showinfo("About",
+                            "Employee Data Manager v1.0\nDeveloped by [Keith Richardson]\n© 2025")
+
+
+    help_menu.add_command(label="About", command=show_about)
 
-# Create a menu bar
-menu_bar = tk.Menu(root)
+    # Add "Help" option to the "Help" menu
+    def show_help():
+        messagebox.showinfo("Help",
+                            "To use this application:\n\n1. Add, update, or delete employee records.\n2. Use the 'Reveal Sensitive Data' option to view sensitive information.\n3. Use the 'Toggle Theme' option to switch between light and dark themes.")
 
-# Create the "File" menu
-file_menu = tk.Menu(menu_bar, tearoff=0)
-menu_bar.add_cascade(label="File", menu=file_menu)
 
-# Add "Toggle Theme" option to the "File" menu
-file_menu.add_command(label="Toggle Theme", command=toggle_theme)
+    help_menu.add_command(label="Help", command=show_help)
 
-# Add "Reveal Sensitive Data" option to the "File" menu
-file_menu.add_command(label="Reveal Sensitive Data",
-                      command=toggle_data_visibility)
+    # Add "Connection Pool Stats" option to the "Help" menu
+    help_menu.add_command(label="Connection Pool Stats", command=show_pool_stats)
 
-# Add an "Exit" option to the "File" menu
-file_menu.add_separator()
-file_menu.add_command(label="Exit", command=root.quit)
+    # Add "Cache Stats" option to the "Help" menu
+    help_menu.add_command(label="Cache Stats", command=show_cache_stats)
 
-# Create the "Help" menu
-help_menu = tk.Menu(menu_bar, tearoff=0)
-menu_bar.add_cascade(label="Help", menu=help_menu)
+    # Add "Payroll Analytics" option to the "Help" menu
+    help_menu.add_command(label="Payroll Analytics", command=show_analytics)
 
-# Add "About" option to the "Help" menu
-def show_about():
-    messagebox.showinfo("About",
-                        "Employee Data Manager v1.0\nDeveloped by [Keith Richardson]\n© 2025")
+    # Add "Salary What-If" option to the "Help" menu
+    help_menu.add_command(label="Salary What-If", command=show_what_if)
 
+    # Add "Diagnostics" option to the "Help" menu
+    help_menu.add_command(label="Diagnostics", command=show_diagnostics)
 
-help_menu.add_command(label="About", command=show_about)
+    # Configure the menu bar
+    root.config(menu=menu_bar)
 
-# Add "Help" option to the "Help" menu
-def show_help():
-    messagebox.showinfo("Help",
-                        "To use this application:\n\n1. Add, update, or delete employee records.\n2. Use the 'Reveal Sensitive Data' option to view sensitive information.\n3. Use the 'Toggle Theme' option to switch between light and dark themes.")
+    # Close idle connections on a timer
+    root.after(60000, prune_idle_connections)
 
+    # Warm the employee cache from the snapshot, then keep it in sync with the server
+    root.after(0, start_employee_cache)
 
-help_menu.add_command(label="Help", command=show_help)
+    # Periodic metrics dump when METRICS_FILE is set
+    root.after(0, dump_metrics)
 
-# Configure the menu bar
-root.config(menu=menu_bar)
+    root.mainloop()  # Start the main event loop
 
-root.mainloop()  # Start the main event loop
\ No newline at end of file
+    # Clean shutdown of background workers and all pooled connections
+    executor.shutdown()
+    if snapshot_store is not None:
+        snapshot_store.close()  # Finish writing the latest synced changes
+    db_pool.close()
+    if os.getenv("METRICS_FILE"):
+        metrics.dump(os.getenv("METRICS_FILE"))
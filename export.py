@@ -0,0 +1,185 @@
+import argparse  # Headless command line
+import csv  # CSV output
+import json  # JSON Lines output
+import os  # File extension detection
+import tempfile  # Partial file written before it replaces the target
+from decimal import Decimal
+
+from database import EMPLOYEE_COLUMN_NAMES, EMPLOYEE_COLUMNS, MASKED_EMPLOYEE_COLUMNS
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+# Columns that may be filtered on with an exact match
+FILTER_COLUMNS = ("Department", "Full_or_Part_Time", "Salary_or_Hourly", "Job_Titles")
+
+
+# Raised when the user cancels an export part way through
+class ExportCancelled(Exception):
+    pass
+
+
+# Build the export query. filters maps a FILTER_COLUMNS column to the value it must equal, or
+# to a list or set of values it must be one of (the filter panel's ticked values, None for NULL),
+# keyword keeps rows where every word appears in Name, Job_Titles or Department like a search.
+def build_export_query(masked=True, filters=None, keyword=None):
+    conditions, params = [], []
+    for column, value in (filters or {}).items():
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter on column: {column}")
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if not value:
+                continue
+            # IN never matches NULL, so a ticked None (the panel lists it) needs IS NULL
+            values = [item for item in value if item is not None]
+            matches = [f"{column} IN ({', '.join('?' for _ in values)})"] if values else []
+            if len(values) < len(value):
+                matches.append(f"{column} IS NULL")
+            conditions.append(matches[0] if len(matches) == 1 else f"({' OR '.join(matches)})")
+            params.extend(values)
+        elif value is None:
+            conditions.append(f"{column} IS NULL")
+        else:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    for word in (keyword or "").lower().split():
+        conditions.append("(LOWER(Name) LIKE ? OR LOWER(Job_Titles) LIKE ? OR LOWER(Department) LIKE ?)")
+        params.extend([f"%{word}%"] * 3)
+    query = f"SELECT {MASKED_EMPLOYEE_COLUMNS if masked else EMPLOYEE_COLUMNS} FROM Current_Employee"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query + " ORDER BY ID", params
+
+
+# Yield lists of up to arraysize rows with fetchmany, so only one batch is in memory at a time
+def stream_rows(connect, query, params=(), arraysize=5000):
+    connection = connect()
+    try:
+        cursor = connection.cursor()
+        cursor.arraysize = arraysize
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(arraysize)
+            if not rows:
+                break
+            yield rows
+    finally:
+        connection.close()
+
+
+def _plain(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def write_csv(batches, path, on_batch):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(EMPLOYEE_COLUMN_NAMES)
+        for rows in batches:
+            writer.writerows(rows)
+            on_batch(len(rows))
+
+
+def write_jsonl(batches, path, on_batch):
+    with open(path, "w", encoding="utf-8") as handle:
+        for rows in batches:
+            handle.writelines(
+                json.dumps(dict(zip(EMPLOYEE_COLUMN_NAMES, map(_plain, row)))) + "\n" for row in rows)
+            on_batch(len(rows))
+
+
+# Columnar output, one Parquet row group per fetched batch (needs the optional pyarrow package)
+def write_parquet(batches, path, on_batch, masked):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs the pyarrow package (pip install pyarrow).")
+    money = pa.string() if masked else pa.float64()
+    schema = pa.schema([
+        ("ID", pa.int64()), ("Name", pa.string()), ("Job_Titles", pa.string()),
+        ("Department", pa.string()), ("Full_or_Part_Time", pa.string()),
+        ("Salary_or_Hourly", pa.string()), ("Typical_Hours", pa.float64()),
+        ("Annual_Salary", money), ("Hourly_Rate", money),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in batches:
+            columns = list(zip(*[[_plain(value) for value in row] for row in rows]))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema))
+            on_batch(len(rows))
+
+
+# Stream Current_Employee to path. Masked exports use the same '****' projection as the masked
+# grid. on_progress(rows written so far) is called after every batch and cancelled() is checked
+# between batches. Returns the number of rows written.
+def export_employees(connect, path, fmt=None, masked=True, filters=None, keyword=None,
+                     arraysize=5000, on_progress=None, cancelled=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt or path}")
+    query, params = build_export_query(masked, filters, keyword)
+    written = 0
+
+    def on_batch(count):
+        nonlocal written
+        written += count
+        if on_progress:
+            on_progress(written)
+        if cancelled and cancelled():
+            raise ExportCancelled(f"Export cancelled after {written} rows.")
+
+    # Written to a temporary file next to path and moved over it once complete, so a failed or
+    # cancelled export leaves whatever was at path before untouched
+    directory, name = os.path.split(os.path.abspath(path))
+    descriptor, partial = tempfile.mkstemp(prefix=f".{name}.", suffix=".part", dir=directory)
+    os.close(descriptor)
+    batches = stream_rows(connect, query, params, arraysize)
+    try:
+        if fmt == "csv":
+            write_csv(batches, partial, on_batch)
+        elif fmt == "jsonl":
+            write_jsonl(batches, partial, on_batch)
+        else:
+            write_parquet(batches, partial, on_batch, masked)
+        os.replace(partial, path)
+    except BaseException:
+        batches.close()  # Return the connection before removing the partial file
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return written
+
+
+# Headless entry point: python export.py employees.csv [--unmasked] [--department POLICE]
+def main():
+    from dotenv import load_dotenv  # To load environment variables from a .env file
+    from database import create_pool
+
+    parser = argparse.ArgumentParser(description="Export Current_Employee to CSV, JSONL or Parquet.")
+    parser.add_argument("output", help="file to write, the format is taken from its extension")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--unmasked", action="store_true", help="include salary and hourly rate")
+    parser.add_argument("--department")
+    parser.add_argument("--full-or-part-time")
+    parser.add_argument("--salary-or-hourly")
+    parser.add_argument("--search", help="keep rows matching these search words")
+    parser.add_argument("--arraysize", type=int, default=5000)
+    args = parser.parse_args()
+
+    filters = {column: value for column, value in (
+        ("Department", args.department), ("Full_or_Part_Time", args.full_or_part_time),
+        ("Salary_or_Hourly", args.salary_or_hourly)) if value}
+    load_dotenv()
+    pool = create_pool()
+    try:
+        written = export_employees(pool.acquire, args.output, args.format, not args.unmasked,
+                                   filters, args.search, args.arraysize,
+                                   on_progress=lambda n: print(f"{n} rows", end="\r", flush=True))
+    finally:
+        pool.close()
+    print(f"\nExported {written} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Columns the filter panel offers, with their positions in an employee row
+FACET_COLUMNS = {"Department": 3, "Full_or_Part_Time": 4, "Salary_or_Hourly": 5}
+
+# Bit positions set in each byte value, for turning a bitmap back into keys
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+# Bitmap with the bit of every key set. Bitmaps are plain ints, bit n standing for ID n,
+# so intersections, unions and counts run in C over whole machine words.
+def bitmap_of(keys):
+    keys = list(keys)
+    if not keys:
+        return 0
+    buffer = bytearray(max(keys) // 8 + 1)
+    for key in keys:
+        buffer[key >> 3] |= 1 << (key & 7)
+    return int.from_bytes(buffer, "little")
+
+
+# Keys whose bits are set, in ascending order
+def keys_of(bitmap):
+    keys = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            keys.extend(base + bit for bit in _BYTE_BITS[byte])
+    return keys
+
+
+# Per-value bitmap indexes over the facet columns of employee rows.
+#
+# Every distinct value of a facet column has a bitmap of the IDs holding it. A selection maps a
+# column to the values ticked for it: values of one column are OR'ed, columns are AND'ed, and
+# the result can be intersected with the rows of a text search. Counts for each value are the
+# popcount of its bitmap AND the rows matching every other column's selection, so they show how
+# many rows ticking that value would give.
+class FacetIndex:
+    def __init__(self, fields=None):
+        self.fields = dict(FACET_COLUMNS if fields is None else fields)  # Column -> row position
+        self._bitmaps = {column: {} for column in self.fields}  # Column -> value -> bitmap
+        self._row_values = {}  # Row key -> facet values, so a row can be removed again
+        self.all = 0  # Bitmap of every indexed row
+
+    # Build an index over an iterable of rows, setting bits in bulk rather than one int at a time
+    @classmethod
+    def build(cls, rows, fields=None):
+        index = cls(fields)
+        keys = {column: {} for column in index.fields}
+        for row in rows:
+            values = tuple(row[position] for position in index.fields.values())
+            index._row_values[row[0]] = values
+            for column, value in zip(index.fields, values):
+                keys[column].setdefault(value, []).append(row[0])
+        for column, by_value in keys.items():
+            index._bitmaps[column] = {value: bitmap_of(value_keys) for value, value_keys in by_value.items()}
+        index.all = bitmap_of(index._row_values)
+        return index
+
+    def __len__(self):
+        return len(self._row_values)
+
+    # Index a row, replacing any earlier version of it
+    def add(self, row):
+        key = row[0]
+        if key in self._row_values:
+            self.remove(key)
+        bit = 1 << key
+        values = tuple(row[position] for position in self.fields.values())
+        for column, value in zip(self.fields, values):
+            bitmaps = self._bitmaps[column]
+            bitmaps[value] = bitmaps.get(value, 0) | bit
+        self._row_values[key] = values
+        self.all |= bit
+
+    def remove(self, key):
+        values = self._row_values.pop(key, None)
+        if values is None:
+            return
+        bit = 1 << key
+        for column, value in zip(self.fields, values):
+            bitmaps = self._bitmaps[column]
+            bitmap = bitmaps[value] & ~bit
+            if bitmap:
+                bitmaps[value] = bitmap
+            else:
+                del bitmaps[value]
+        self.all &= ~bit
+
+    # Distinct values of a column, missing values last
+    def values(self, column):
+        return sorted(self._bitmaps[column], key=lambda value: (value is None, str(value)))
+
+    # Bitmap of the rows matching a selection (column -> values). Columns without ticked
+    # values do not filter, skip leaves one column out, as needed for its counts.
+    def match(self, selection, skip=None):
+        result = self.all
+        for column, values in selection.items():
+            if column == skip or not values:
+                continue
+            bitmaps = self._bitmaps[column]
+            union = 0
+            for value in values:
+                union |= bitmaps.get(value, 0)
+            result &= union
+            if not result:
+                break
+        return result
+
+    # Column -> value -> number of rows matching the selection once the value is ticked
+    # (for the other columns' selections) and the base bitmap, e.g. a text search
+    def counts(self, selection, base=None):
+        counts = {}
+        for column, bitmaps in self._bitmaps.items():
+            others = self.match(selection, skip=column)
+            if base is not None:
+                others &= base
+            counts[column] = {value: (bitmap & others).bit_count() for value, bitmap in bitmaps.items()}
+        return counts
+
+
+# True when a selection ticks at least one value
+def is_active(selection):
+    return any(selection.values())
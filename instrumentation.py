@@ -0,0 +1,171 @@
+import json  # JSON metrics dump
+import logging  # Slow operation log
+import os  # Thresholds from environment variables
+import threading  # Spans are recorded from worker threads and the Tk thread
+import time  # Span timing
+from collections import deque
+
+# Phases of a database round trip, as they appear in the diagnostics panel
+PHASES = ("connect", "execute", "fetch", "render")
+
+slow_log = logging.getLogger("employment_management.slow")
+
+
+# Approximate size in bytes of fetched rows: text length plus 8 bytes per other value
+def payload_size(rows):
+    size = 0
+    for row in rows:
+        for value in row:
+            size += len(value) if isinstance(value, str) else 8
+    return size
+
+
+# One timed step, filled in by the caller inside the with block
+class Span:
+    def __init__(self, metrics, phase, operation):
+        self.metrics = metrics
+        self.phase = phase
+        self.operation = operation
+        self.rows = 0
+        self.bytes = 0
+        self.started = 0.0
+        self.duration = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        self.metrics.record(self, failed=exc_type is not None)
+
+
+# Running totals for one (phase, operation) pair
+class SpanStats:
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.slow = 0
+        self.recent = deque(maxlen=window)  # Latest durations, for percentiles
+
+    def percentile(self, fraction):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+# Collects timing spans for connect, execute, fetch and render, keyed by phase and operation
+# (e.g. ("fetch", "search")). Spans slower than their threshold are written to the slow log.
+# Thresholds in ms come from SLOW_<PHASE>_MS, falling back to SLOW_OPERATION_MS (default 500).
+class Metrics:
+    def __init__(self, window=1000, slow_history=100):
+        self.window = window
+        self.started_at = time.time()
+        self.stats = {}
+        self.slow = deque(maxlen=slow_history)  # (time, phase, operation, ms, rows) of slow spans
+        self.thresholds = {}
+        default = float(os.getenv("SLOW_OPERATION_MS", "500"))
+        for phase in PHASES:
+            self.thresholds[phase] = float(os.getenv(f"SLOW_{phase.upper()}_MS", default)) / 1000
+        self._lock = threading.Lock()
+
+    def span(self, phase, operation=""):
+        return Span(self, phase, operation)
+
+    def record(self, span, failed=False):
+        key = (span.phase, span.operation)
+        slow = span.duration >= self.thresholds.get(span.phase, self.thresholds["execute"])
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = SpanStats(self.window)
+            stats.count += 1
+            stats.errors += failed
+            stats.total += span.duration
+            stats.max = max(stats.max, span.duration)
+            stats.rows += span.rows
+            stats.bytes += span.bytes
+            stats.recent.append(span.duration)
+            if slow:
+                stats.slow += 1
+                self.slow.append((time.time(), span.phase, span.operation, span.duration * 1000, span.rows))
+        if slow:
+            slow_log.warning(f"Slow {span.phase} for {span.operation or 'unknown'}: "
+                             f"{span.duration * 1000:.0f} ms, {span.rows} rows, {span.bytes} bytes")
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow.clear()
+            self.started_at = time.time()
+
+    # Plain dictionary of every series, in phase order
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self.stats.items(),
+                           key=lambda item: (PHASES.index(item[0][0]) if item[0][0] in PHASES else len(PHASES),
+                                             item[0][1]))
+            series = [{
+                "phase": phase, "operation": operation, "count": stats.count, "errors": stats.errors,
+                "total_seconds": stats.total, "max_seconds": stats.max,
+                "p50_seconds": stats.percentile(0.50), "p95_seconds": stats.percentile(0.95),
+                "p99_seconds": stats.percentile(0.99),
+                "rows": stats.rows, "bytes": stats.bytes, "slow": stats.slow,
+            } for (phase, operation), stats in items]
+            slow = [{"time": at, "phase": phase, "operation": operation, "ms": ms, "rows": rows}
+                    for at, phase, operation, ms, rows in self.slow]
+        return {"started_at": self.started_at, "collected_at": time.time(),
+                "thresholds_ms": {phase: seconds * 1000 for phase, seconds in self.thresholds.items()},
+                "spans": series, "slow": slow}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    # Prometheus text exposition format, for a node_exporter textfile collector or similar
+    def to_prometheus(self):
+        lines = []
+        metrics = [
+            ("span_seconds_total", "counter", "Time spent in spans", "total_seconds"),
+            ("span_count_total", "counter", "Spans recorded", "count"),
+            ("span_errors_total", "counter", "Spans that raised", "errors"),
+            ("span_slow_total", "counter", "Spans over their slow threshold", "slow"),
+            ("span_rows_total", "counter", "Rows fetched or rendered", "rows"),
+            ("span_bytes_total", "counter", "Approximate bytes fetched", "bytes"),
+            ("span_max_seconds", "gauge", "Slowest span", "max_seconds"),
+            ("span_p95_seconds", "gauge", "95th percentile of recent spans", "p95_seconds"),
+        ]
+        series = self.snapshot()["spans"]
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP employment_management_{name} {help_text}")
+            lines.append(f"# TYPE employment_management_{name} {kind}")
+            for entry in series:
+                lines.append(f'employment_management_{name}{{phase="{entry["phase"]}",'
+                             f'operation="{entry["operation"]}"}} {entry[field]}')
+        return "\n".join(lines) + "\n"
+
+    # Write the metrics to path, Prometheus text for .prom files and JSON otherwise.
+    # Written to a temporary file first so a collector never reads half a dump.
+    def dump(self, path):
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(temporary, path)
+
+
+# Send slow operation warnings to their own file, separate from error_log.txt
+def configure_slow_log(path="slow_log.txt"):
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    slow_log.addHandler(handler)
+    slow_log.setLevel(logging.WARNING)
+    slow_log.propagate = False
+
+
+# Process-wide metrics shared by the repository, pager, cache and Tk layer
+metrics = Metrics()
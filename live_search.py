@@ -0,0 +1,64 @@
+# True when every word appears in one of the searched text fields (Name, Job_Titles, Department)
+def row_matches(row, words, fields=(1, 2, 3)):
+    texts = [str(row[position]).lower() for position in fields if row[position]]
+    return all(any(word in text for text in texts) for word in words)
+
+
+# Search-as-you-type for an Entry widget.
+#
+# Key presses are debounced so a query only starts once typing pauses for delay ms. When the new
+# keyword extends the one whose results are on screen (e.g. "smi" -> "smit") every new match must
+# already be among the shown rows, so they are filtered locally and only the rows that no longer
+# match are removed, instead of running another query.
+class LiveSearch:
+    def __init__(self, root, entry, run_query, remove_rows, cancel_query, delay=150):
+        self.root = root
+        self.entry = entry
+        self.run_query = run_query  # run_query(keyword) starts a full search, results come back via shown()
+        self.remove_rows = remove_rows  # remove_rows(keys) drops rows that no longer match from the view
+        self.cancel_query = cancel_query  # Abandons an in-flight full search
+        self.delay = delay
+        self.keyword = None  # Keyword whose results are on screen
+        self.rows = None
+        self.narrowed = 0  # Keystrokes answered by filtering the shown results
+        self.queried = 0  # Keystrokes that needed a full search
+        self._pending = None
+        entry.bind("<KeyRelease>", self._on_key)
+
+    # Remember the results a full search put on screen
+    def shown(self, keyword, rows):
+        self.keyword = keyword
+        self.rows = rows
+
+    # The view no longer shows search results
+    def forget(self):
+        self.keyword = None
+        self.rows = None
+
+    def _on_key(self, event):
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+        self._pending = self.root.after(self.delay, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        keyword = self.entry.get().strip().lower()
+        if keyword == self.keyword:
+            return
+        if self.rows is not None and self.keyword and keyword.startswith(self.keyword):
+            self.narrowed += 1
+            self.cancel_query()  # An older, wider search must not overwrite the narrowed rows
+            words = keyword.split()
+            kept, removed = [], []
+            for row in self.rows:
+                if row_matches(row, words):
+                    kept.append(row)
+                else:
+                    removed.append(row[0])
+            self.rows = kept
+            self.keyword = keyword
+            if removed:
+                self.remove_rows(removed)
+            return
+        self.queried += 1
+        self.run_query(keyword)
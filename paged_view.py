@@ -0,0 +1,364 @@
+from bisect import bisect_left
+from collections import OrderedDict, deque
+import tkinter as tk
+
+from database import select_top
+from instrumentation import metrics, payload_size
+
+
+# Bounded least-recently-used cache of fetched pages
+class PageCache:
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self._pages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        rows = self._pages.get(key)
+        if rows is None:
+            self.misses += 1
+            return None
+        self._pages.move_to_end(key)
+        self.hits += 1
+        return rows
+
+    def put(self, key, rows):
+        self._pages[key] = rows
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.capacity:
+            self._pages.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._pages.clear()
+
+    def __len__(self):
+        return len(self._pages)
+
+
+# Reads pages of a table in key order using keyset pagination (WHERE key > last seen key)
+# instead of OFFSET, so every page costs the same however deep the user has scrolled.
+# order_by lists (SQL expression, descending) pairs to sort by before the key column. Their
+# values are fetched after the select list and, with the key, make up a row's keyset position.
+class KeysetPageSource:
+    def __init__(self, connect, select_list, table, key_column="ID", dialect="mssql", order_by=()):
+        self.connect = connect
+        self.table = table
+        self.key_column = key_column
+        self.dialect = dialect
+        self.order_by = list(order_by)
+        self.sorted = bool(self.order_by)
+        self.select_list = ", ".join([select_list] + [expression for expression, _ in self.order_by])
+        self._terms = self.order_by + [(key_column, False)]
+
+    # Key of a fetched row, the key column must come first in select_list
+    def key(self, row):
+        if not self.order_by:
+            return row[0]
+        return tuple(row[len(row) - len(self.order_by):]) + (row[0],)
+
+    # WHERE clause for rows past key: (a > ?) OR (a = ? AND b > ?) OR ... over the sort terms.
+    # With more than one term it starts with a >= ?, which says nothing new but lets an index on
+    # a seek to the key instead of scanning up to it.
+    def _after(self, key, backwards):
+        key = key if self.order_by else (key,)
+        clauses, params = [], []
+        for index, (expression, descending) in enumerate(self._terms):
+            operator = "<" if descending != backwards else ">"
+            parts = [f"{term} = ?" for term, _ in self._terms[:index]] + [f"{expression} {operator} ?"]
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params.extend(key[:index + 1])
+        if len(clauses) == 1:
+            return "WHERE " + clauses[0], tuple(params)
+        expression, descending = self._terms[0]
+        bound = f"{expression} {'<=' if descending != backwards else '>='} ?"
+        return f"WHERE {bound} AND ({' OR '.join(clauses)})", (key[0],) + tuple(params)
+
+    def _order(self, backwards):
+        return "ORDER BY " + ", ".join(
+            f"{expression} DESC" if descending != backwards else expression
+            for expression, descending in self._terms)
+
+    # Fetch up to limit rows after (direction "after") or before ("before") key.
+    # A key of None means the start of the table. Runs on a worker thread.
+    def fetch(self, direction, key, limit):
+        backwards = direction == "before"
+        where, params = ("", ()) if key is None else self._after(key, backwards)
+        query = select_top(self.dialect, self.select_list,
+                           f"FROM {self.table} {where} {self._order(backwards)}", limit)
+        with metrics.span("connect", "page"):
+            connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", "page"):
+                cursor.execute(query, params)
+            with metrics.span("fetch", "page") as span:
+                rows = [tuple(row) for row in cursor.fetchall()]
+                span.rows = len(rows)
+                span.bytes = payload_size(rows)
+        finally:
+            connection.close()
+        if direction == "before":
+            rows.reverse()
+        return rows
+
+
+# Keeps only a small window of pages in a Treeview and slides it as the user scrolls.
+# Pages are loaded on the background executor, the next page is prefetched, and
+# recently used pages are kept in a PageCache so scrolling back does not re-query.
+# Pages hold rows as fetched, project turns a row into the values shown in the Treeview and
+# tags, when given, into the Treeview tags of its item.
+class PagedTreeview:
+    def __init__(self, tree, scrollbar, executor, page_size=200, max_pages=3,
+                 cache_pages=32, edge=0.1, project=tuple, tags=None):
+        self.tree = tree
+        self.project = project
+        self.tags = tags
+        self.scrollbar = scrollbar
+        self.executor = executor
+        self.page_size = page_size
+        self.max_pages = max_pages  # Pages held in the Treeview at once
+        self.edge = edge  # Fraction of the scroll range that triggers loading the next page
+        self.cache = PageCache(cache_pages)
+        self.source = None
+        self._pages = deque()  # Row lists currently in the Treeview, in key order
+        self._at_start = True
+        self._at_end = True
+        self._loading = False
+        self._generation = 0  # Bumped whenever the source changes
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    # Show the first page of a new source
+    def load(self, source, on_loaded=None, on_error=None):
+        self._reset(source)
+        generation = self._generation
+        self._loading = True
+
+        def on_success(rows):
+            if generation != self._generation:
+                return
+            self._loading = False
+            self.tree.delete(*self.tree.get_children())
+            self._pages.clear()
+            self._at_start = True
+            self._at_end = len(rows) < self.page_size
+            self.cache.put(("after", None), rows)
+            self._append(rows)
+            if on_loaded:
+                on_loaded()
+            self._prefetch("after")
+
+        def on_failure(e):
+            if generation == self._generation:
+                self._loading = False
+            if on_error:
+                on_error(e)
+
+        # Shares the "tree" channel with searches so the newest request always wins
+        self.executor.submit(source.fetch, "after", None, self.page_size, channel="tree",
+                             on_success=on_success, on_error=on_failure)
+
+    # Stop paging, e.g. when the Treeview is about to show search results instead
+    def detach(self):
+        self._reset(None)
+
+    # Keys of the rows currently held in the Treeview window
+    def visible_range(self):
+        if not self._pages:
+            return None
+        return self.source.key(self._pages[0][0]), self.source.key(self._pages[-1][-1])
+
+    # Apply a newly inserted row without reloading. Returns False when the caller
+    # has to reload instead (the Treeview is showing a fixed result set).
+    def apply_insert(self, row):
+        if self.source is None or self.source.sorted:
+            return False  # Where a new row sorts to is up to the server or a fresh sort
+        self._invalidate()
+        key = self.source.key(row)
+        window = self.visible_range()
+        if window is None:
+            if not self._at_end:
+                return False
+            self._append([tuple(row)])
+            return True
+        first, last = window
+        if key < first or (key > last and not self._at_end):
+            return True  # Outside the rows held in the Treeview, picked up when scrolled to
+        # Find the page and position the new key sorts into
+        index = 0
+        for page in self._pages:
+            keys = [self.source.key(r) for r in page]
+            if key <= keys[-1] or page is self._pages[-1]:
+                position = bisect_left(keys, key)
+                page.insert(position, tuple(row))
+                self.tree.insert("", index + position, iid=str(row[0]), values=self.project(row),
+                                 tags=self._tags(row))
+                return True
+            index += len(page)
+        return True
+
+    # Apply an updated row in place, rows outside the window are picked up when scrolled to
+    def apply_update(self, row):
+        self._invalidate()
+        iid = str(row[0])
+        if not self.tree.exists(iid):
+            return True
+        self.tree.item(iid, values=self.project(row), tags=self._tags(row))
+        for page in self._pages:
+            for index, existing in enumerate(page):
+                if str(existing[0]) == iid:
+                    page[index] = tuple(row)
+                    return True
+        return True
+
+    # Remove a deleted row in place
+    def apply_delete(self, key):
+        self._invalidate()
+        iid = str(key)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+        for page in self._pages:
+            for index, existing in enumerate(page):
+                if str(existing[0]) == iid:
+                    del page[index]
+                    if not page:
+                        self._pages.remove(page)
+                    return True
+        return True
+
+    def _tags(self, row):
+        return self.tags(row) if self.tags else ()
+
+    # Forget cached and in-flight prefetched pages after the table changed
+    def _invalidate(self):
+        self.executor.cancel("prefetch")
+        self.cache.clear()
+
+    def _reset(self, source):
+        self._generation += 1
+        self.executor.cancel("page")
+        self.executor.cancel("prefetch")
+        self.source = source
+        self.cache.clear()
+        self._pages.clear()
+        self._at_start = True
+        self._at_end = True
+        self._loading = False
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.source is None or self._loading or not self._pages:
+            return
+        first, last = float(first), float(last)
+        everything_visible = first <= 0.0 and last >= 1.0
+        if last >= 1.0 - self.edge and not self._at_end:
+            if not everything_visible or len(self._pages) < self.max_pages:
+                self._load("after")
+        elif first <= self.edge and not self._at_start and not everything_visible:
+            self._load("before")
+
+    def _boundary_key(self, direction):
+        if direction == "after":
+            return self.source.key(self._pages[-1][-1])
+        return self.source.key(self._pages[0][0])
+
+    def _load(self, direction):
+        key = self._boundary_key(direction)
+        cached = self.cache.get((direction, key))
+        if cached is not None:
+            self._apply(direction, cached)
+            return
+        generation = self._generation
+        self._loading = True
+
+        def on_success(rows):
+            if generation != self._generation:
+                return
+            self._loading = False
+            self.cache.put((direction, key), rows)
+            self._apply(direction, rows)
+
+        def on_failure(e):
+            if generation == self._generation:
+                self._loading = False
+
+        self.executor.submit(self.source.fetch, direction, key, self.page_size, channel="page",
+                             on_success=on_success, on_error=on_failure)
+
+    # Fetch the page beyond the window edge into the cache ahead of the user scrolling there
+    def _prefetch(self, direction):
+        if not self._pages or (self._at_end if direction == "after" else self._at_start):
+            return
+        key = self._boundary_key(direction)
+        if self.cache.get((direction, key)) is not None:
+            return
+        generation = self._generation
+
+        def on_success(rows):
+            if generation == self._generation:
+                self.cache.put((direction, key), rows)
+
+        self.executor.submit(self.source.fetch, direction, key, self.page_size,
+                             channel="prefetch", on_success=on_success)
+
+    def _apply(self, direction, rows):
+        if direction == "after":
+            if not rows:
+                self._at_end = True
+                return
+            self._at_end = len(rows) < self.page_size
+            self._append(rows)
+            if len(self._pages) > self.max_pages:
+                self._evict("before")
+        else:
+            if not rows:
+                self._at_start = True
+                return
+            self._at_start = len(rows) < self.page_size
+            self._prepend(rows)
+            if len(self._pages) > self.max_pages:
+                self._evict("after")
+        self._prefetch(direction)
+
+    def _append(self, rows):
+        rows = list(rows)  # Pages are patched in place, keep cached pages untouched
+        self._pages.append(rows)
+        with metrics.span("render", "page") as span:
+            for row in rows:
+                self.tree.insert("", tk.END, iid=str(row[0]), values=self.project(row), tags=self._tags(row))
+            span.rows = len(rows)
+
+    def _prepend(self, rows):
+        top = self._top_index()
+        rows = list(rows)
+        self._pages.appendleft(rows)
+        with metrics.span("render", "page") as span:
+            for index, row in enumerate(rows):
+                self.tree.insert("", index, iid=str(row[0]), values=self.project(row), tags=self._tags(row))
+            span.rows = len(rows)
+        self._scroll_to(top + len(rows))
+
+    # Drop the page at the far end of the window from the direction being loaded
+    def _evict(self, side):
+        if side == "before":
+            top = self._top_index()
+            rows = self._pages.popleft()
+            self._at_start = False
+            self.tree.delete(*[str(row[0]) for row in rows])
+            self._scroll_to(top - len(rows))
+        else:
+            rows = self._pages.pop()
+            self._at_end = False
+            self.tree.delete(*[str(row[0]) for row in rows])
+
+    # Index of the first visible row, used to keep the view steady while the window slides
+    def _top_index(self):
+        count = len(self.tree.get_children())
+        return round(float(self.tree.yview()[0]) * count)
+
+    def _scroll_to(self, index):
+        count = len(self.tree.get_children())
+        if count:
+            self.tree.yview_moveto(max(index, 0) / count)
@@ -0,0 +1,176 @@
+import time  # Report timing
+
+from columnar_store import NULL_INT, ColumnarTable
+from instrumentation import metrics
+
+try:
+    import numpy as np  # Optional, vectorised aggregation over the columnar cache
+except ImportError:
+    np = None
+
+# Columns the dashboard can group by, with their positions in an employee row
+GROUP_COLUMNS = {"Department": 3, "Full_or_Part_Time": 4, "Salary_or_Hourly": 5}
+
+# Annual cost of one employee: Annual_Salary for salaried staff, Typical_Hours x Hourly_Rate x weeks
+# for hourly staff, missing values counting as 0. Kept in step with annual_cost() below.
+ANNUAL_COST_SQL = ("CASE WHEN UPPER(Salary_or_Hourly) = 'HOURLY' "
+                   "THEN COALESCE(Typical_Hours, 0) * COALESCE(Hourly_Rate, 0) * ? "
+                   "ELSE COALESCE(Annual_Salary, 0) END")
+
+
+def annual_cost(salary_or_hourly, typical_hours, annual_salary, hourly_rate, weeks):
+    if (salary_or_hourly or "").upper() == "HOURLY":
+        return (typical_hours or 0) * (hourly_rate or 0) * weeks
+    return annual_salary or 0
+
+
+# Headcount and annual payroll per value of each GROUP_COLUMNS column.
+# Without pay (the data is masked) only headcounts are kept and payroll is None.
+class PayrollReport:
+    def __init__(self, include_pay, weeks=52, source=""):
+        self.include_pay = include_pay
+        self.weeks = weeks
+        self.source = source  # "server", "numpy" or "python"
+        self.groups = {column: {} for column in GROUP_COLUMNS}  # column -> value -> [headcount, payroll]
+        self.headcount = 0
+        self.payroll = 0.0 if include_pay else None
+        self.computed_at = time.time()
+        self.duration = 0.0
+        self.incremental_updates = 0
+
+    def _cost(self, row, pay):
+        if not self.include_pay:
+            return 0.0
+        salary, rate = pay if pay is not None else (None, None)
+        return annual_cost(row[5], row[6], salary, rate, self.weeks)
+
+    def _change(self, row, pay, sign):
+        cost = self._cost(row, pay) * sign
+        self.headcount += sign
+        if self.include_pay:
+            self.payroll += cost
+        for column, position in GROUP_COLUMNS.items():
+            totals = self.groups[column].setdefault(row[position], [0, 0.0])
+            totals[0] += sign
+            totals[1] += cost
+            if totals[0] <= 0:
+                del self.groups[column][row[position]]
+
+    # Adjust the totals for one changed record instead of recomputing them. row is the
+    # non-sensitive part of an employee row, pay its (Annual_Salary, Hourly_Rate) or None.
+    # A new record has no old row, a deleted one no new row.
+    def apply_change(self, old_row=None, old_pay=None, new_row=None, new_pay=None):
+        if old_row is not None:
+            self._change(old_row, old_pay, -1)
+        if new_row is not None:
+            self._change(new_row, new_pay, 1)
+        self.incremental_updates += 1
+
+    # (value, headcount, payroll or None) for one group column, largest payroll or headcount first
+    def rows(self, column):
+        entries = [(value, count, payroll if self.include_pay else None)
+                   for value, (count, payroll) in self.groups[column].items()]
+        entries.sort(key=lambda entry: (-(entry[2] or 0), -entry[1], str(entry[0])))
+        return entries
+
+
+# Let the server group and sum (runs on a worker thread). Pay is only summed when include_pay.
+def aggregate_server(connect, include_pay, weeks=52, table="Current_Employee"):
+    started = time.perf_counter()
+    report = PayrollReport(include_pay, weeks, "server")
+    total = f"SUM({ANNUAL_COST_SQL})" if include_pay else "NULL"
+    query = " UNION ALL ".join(
+        f"SELECT '{column}', {column}, COUNT(*), {total} FROM {table} GROUP BY {column}"
+        for column in GROUP_COLUMNS)
+    params = (weeks,) * len(GROUP_COLUMNS) if include_pay else ()
+    connection = connect()
+    try:
+        cursor = connection.cursor()
+        with metrics.span("execute", "analytics"):
+            cursor.execute(query, params)
+        with metrics.span("fetch", "analytics") as span:
+            rows = cursor.fetchall()
+            span.rows = len(rows)
+    finally:
+        connection.close()
+    for column, value, count, payroll in rows:
+        report.groups[column][value] = [count, float(payroll or 0)]
+    first = report.groups[next(iter(GROUP_COLUMNS))].values()
+    report.headcount = sum(count for count, _ in first)
+    if include_pay:
+        report.payroll = sum(payroll for _, payroll in first)
+    report.duration = time.perf_counter() - started
+    return report
+
+
+# Aggregate the cached rows (runs on a worker thread). rows is the employee cache's row store,
+# sensitive the SensitiveStore's table or None while masked. Uses NumPy over the columnar
+# arrays when both are available, a plain loop otherwise.
+def aggregate_cache(rows, sensitive, weeks=52):
+    started = time.perf_counter()
+    if np is not None and isinstance(rows, ColumnarTable) and (
+            sensitive is None or isinstance(sensitive, ColumnarTable)):
+        report = _aggregate_numpy(rows, sensitive, weeks)
+    else:
+        report = _aggregate_python(rows, sensitive, weeks)
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def _aggregate_python(rows, sensitive, weeks):
+    report = PayrollReport(sensitive is not None, weeks, "python")
+    for row in list(rows.values()):
+        pay = None
+        if sensitive is not None:
+            stored = sensitive.get(row[0])
+            pay = None if stored is None else tuple(stored[1:])
+        report.apply_change(new_row=row, new_pay=pay)
+    report.incremental_updates = 0
+    return report
+
+
+def _aggregate_numpy(rows, sensitive, weeks):
+    report = PayrollReport(sensitive is not None, weeks, "numpy")
+    keys, positions, columns = rows.export_columns(list(GROUP_COLUMNS) + ["Typical_Hours"])
+    positions = np.frombuffer(positions, dtype=np.int64)
+    live = positions >= 0
+    keys = np.frombuffer(keys, dtype=np.int64)[live]
+    positions = positions[live]
+
+    cost = None
+    if sensitive is not None:
+        pay_keys, pay_positions, pay = sensitive.export_columns(["Annual_Salary", "Hourly_Rate"])
+        pay_positions = np.frombuffer(pay_positions, dtype=np.int64)
+        pay_live = pay_positions >= 0
+        pay_keys = np.frombuffer(pay_keys, dtype=np.int64)[pay_live]
+        pay_positions = pay_positions[pay_live]
+        # Line up each cached row with its sensitive values by ID, both are in ID order
+        found = np.zeros(len(keys), dtype=bool)
+        salary = np.zeros(len(keys))
+        rate = np.zeros(len(keys))
+        if len(pay_keys):
+            index = np.minimum(np.searchsorted(pay_keys, keys), len(pay_keys) - 1)
+            found = pay_keys[index] == keys
+            source = pay_positions[index[found]]
+            salary[found] = np.frombuffer(pay["Annual_Salary"].data, dtype=np.float64)[source]
+            rate[found] = np.frombuffer(pay["Hourly_Rate"].data, dtype=np.float64)[source]
+        hours = np.frombuffer(columns["Typical_Hours"].data, dtype=np.int64)[positions].astype(np.float64)
+        hours[hours == NULL_INT] = 0
+        salary = np.nan_to_num(salary)
+        rate = np.nan_to_num(rate)
+        kind = columns["Salary_or_Hourly"]
+        hourly_codes = [code for code, value in enumerate(kind.values) if (value or "").upper() == "HOURLY"]
+        hourly = np.isin(np.frombuffer(kind.codes, dtype=np.uint32)[positions], hourly_codes)
+        cost = np.where(hourly, hours * rate * weeks, salary)
+        report.payroll = float(cost.sum())
+
+    report.headcount = int(len(keys))
+    for column in GROUP_COLUMNS:
+        category = columns[column]
+        codes = np.frombuffer(category.codes, dtype=np.uint32)[positions]
+        counts = np.bincount(codes, minlength=len(category.values))
+        sums = np.bincount(codes, weights=cost, minlength=len(category.values)) if cost is not None else None
+        for code in np.flatnonzero(counts):
+            report.groups[column][category.values[code]] = [
+                int(counts[code]), float(sums[code]) if sums is not None else 0.0]
+    return report
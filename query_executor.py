@@ -0,0 +1,117 @@
+import itertools  # Request sequence numbers
+import logging  # For logging to file and console
+import queue  # Hand results from worker threads to the Tk thread
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Runs database work on worker threads and delivers results on the Tk main thread.
+# Requests submitted on the same channel supersede each other: an older request
+# that has not started is cancelled, and an older result that arrives late is dropped,
+# so only the newest result on a channel ever reaches the UI.
+class QueryExecutor:
+    def __init__(self, root, max_workers=4, poll_interval=20, on_busy=None):
+        self._root = root
+        self._workers = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="query")
+        self._results = queue.Queue()
+        self._sequence = itertools.count(1)
+        self._latest = {}  # Channel -> sequence number of the newest request
+        self._futures = {}  # Channel -> future of the newest request
+        self._poll_interval = poll_interval
+        self._on_busy = on_busy  # Called with True/False when work starts/finishes
+        self._pending = 0  # Requests submitted but not yet delivered
+        self._polling = False
+        self.stale_dropped = 0  # Results discarded because a newer request replaced them
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    # Run fn(*args) in the background, then call on_success(result) or on_error(exception)
+    # on the Tk thread. Must be called from the Tk thread.
+    def submit(self, fn, *args, channel=None, on_success=None, on_error=None):
+        sequence = next(self._sequence)
+        if channel is not None:
+            self._supersede(channel)
+            self._latest[channel] = sequence
+        future = self._workers.submit(self._run, sequence, channel, fn, args,
+                                      on_success, on_error)
+        if channel is not None:
+            self._futures[channel] = future
+        self._pending += 1
+        if self._pending == 1 and self._on_busy:
+            self._on_busy(True)
+        if not self._polling:
+            self._polling = True
+            self._root.after(self._poll_interval, self._poll)
+        return sequence
+
+    # Call callback(value) on the Tk thread, e.g. progress updates. Safe to call from any thread.
+    def post(self, callback, value):
+        self._results.put((None, None, callback, value))
+
+    # Drop whatever is outstanding on a channel without submitting anything new
+    def cancel(self, channel):
+        self._supersede(channel)
+        self._latest[channel] = next(self._sequence)
+        if self._pending == 0 and self._on_busy:
+            self._on_busy(False)
+
+    # Stop accepting work and abandon anything that has not started
+    def shutdown(self):
+        self._workers.shutdown(wait=False, cancel_futures=True)
+
+    def _supersede(self, channel):
+        future = self._futures.pop(channel, None)
+        if future is not None and future.cancel():
+            self._pending -= 1  # Never ran, so nothing will be delivered for it
+            self.stale_dropped += 1
+
+    def _is_stale(self, sequence, channel):
+        return channel is not None and self._latest.get(channel) != sequence
+
+    # Worker thread side
+    def _run(self, sequence, channel, fn, args, on_success, on_error):
+        if self._is_stale(sequence, channel):
+            self._results.put((sequence, channel, None, None))
+            return
+        try:
+            self._results.put((sequence, channel, on_success, fn(*args)))
+        except Exception as e:
+            self._results.put((sequence, channel, on_error, e))
+
+    # Tk thread side
+    def _poll(self):
+        while True:
+            try:
+                sequence, channel, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if sequence is None:  # Posted update, not a finished request
+                self._deliver(callback, value)
+                continue
+            self._pending -= 1
+            if self._is_stale(sequence, channel):
+                self.stale_dropped += 1
+                continue
+            if channel is not None:
+                self._futures.pop(channel, None)
+            if callback is None:
+                if isinstance(value, Exception):
+                    logging.error(f"Unhandled background query error: {value}")
+                continue
+            self._deliver(callback, value)
+
+        if self._pending > 0:
+            self._root.after(self._poll_interval, self._poll)
+        else:
+            self._polling = False
+            if self._on_busy:
+                self._on_busy(False)
+
+    @staticmethod
+    def _deliver(callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            logging.error(f"Error delivering background query result: {e}")
@@ -0,0 +1,256 @@
+import time  # Report timing
+
+from columnar_store import NULL_INT, ColumnarTable
+from payroll_analytics import GROUP_COLUMNS, np
+from validation import ValidationError
+
+RULE_KINDS = ("percent", "floor", "cap")
+
+
+# One pay adjustment for the employees matching every filter that is set. The value is a
+# percentage for "percent", and a minimum or maximum for "floor" and "cap" in the employee's own
+# pay unit: Annual_Salary for salaried staff, Hourly_Rate for hourly staff. Missing pay stays missing.
+class Rule:
+    def __init__(self, kind, value, department=None, full_or_part_time=None, salary_or_hourly=None):
+        if kind not in RULE_KINDS:
+            raise ValidationError("Input Error", f"Unknown adjustment '{kind}', expected one of "
+                                                 f"{', '.join(RULE_KINDS)}.")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError("Input Error", "The adjustment must be a number.")
+        if kind != "percent" and value < 0:
+            raise ValidationError("Input Error", "A floor or cap cannot be negative.")
+        if kind == "percent" and value <= -100:
+            raise ValidationError("Input Error", "A pay cut must be less than 100%.")
+        self.kind = kind
+        self.value = value
+        # Group column -> value to match, upper-cased like the stored values
+        self.filters = {column: value.strip().upper() for column, value in (
+            ("Department", department), ("Full_or_Part_Time", full_or_part_time),
+            ("Salary_or_Hourly", salary_or_hourly)) if value}
+
+    def key(self):
+        return self.kind, self.value, tuple(sorted(self.filters.items()))
+
+    def __str__(self):
+        change = f"{self.value:+g}%" if self.kind == "percent" else f"{self.kind} {self.value:,.2f}"
+        scope = ", ".join(self.filters.values()) or "everyone"
+        return f"{change} for {scope}"
+
+
+# A named list of rules, applied in order
+class Scenario:
+    def __init__(self, name, rules=()):
+        self.name = name
+        self.rules = list(rules)
+
+    def key(self):
+        return tuple(rule.key() for rule in self.rules)
+
+
+# Payroll under one scenario: totals, the change from the baseline and per-group figures
+class ScenarioResult:
+    def __init__(self, name, payroll, baseline, affected, groups, duration):
+        self.name = name
+        self.payroll = payroll
+        self.change = payroll - baseline
+        self.affected = affected  # Employees whose pay the rules changed
+        self.groups = groups  # column -> value -> (headcount, payroll)
+        self.duration = duration
+
+
+# Annual_Salary, Hourly_Rate, Typical_Hours and the GROUP_COLUMNS of every employee, loaded once
+# and then priced under any number of scenarios. Pay is the employee's own rate (salary or hourly),
+# so one array takes every rule. Uses NumPy arrays when installed, lists otherwise.
+class SalaryModel:
+    def __init__(self, keys, pay, hours, hourly, codes, values, weeks=52, source=""):
+        self.keys = keys
+        self.pay = pay  # Annual_Salary for salaried staff, Hourly_Rate for hourly staff, NaN when missing
+        self.hours = hours  # Typical_Hours, 0 when missing
+        self.hourly = hourly  # True for hourly staff
+        self.codes = codes  # Group column -> code of each employee's value
+        self.values = values  # Group column -> code -> value
+        self.weeks = weeks
+        self.source = source  # "numpy" or "python"
+        self.loaded_at = time.time()
+        self.load_duration = 0.0
+        self._results = {}  # Scenario key -> ScenarioResult, the baseline is the empty key
+        self._masks = {}  # (group column, value) -> employees with that value, shared by the rules
+        self.baseline = self.evaluate(Scenario("Baseline"))
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Distinct values of a group column, for picking rule filters
+    def choices(self, column):
+        return sorted(value for value in self.values[column] if value)
+
+    # Price a scenario, reusing the result of an identical one
+    def evaluate(self, scenario):
+        key = scenario.key()
+        result = self._results.get(key)
+        if result is None:
+            started = time.perf_counter()
+            if np is not None and not isinstance(self.pay, list):
+                payroll, affected, groups = self._evaluate_numpy(scenario)
+            else:
+                payroll, affected, groups = self._evaluate_python(scenario)
+            baseline = payroll if not key else self.baseline.payroll
+            result = self._results[key] = ScenarioResult(
+                scenario.name, payroll, baseline, affected, groups, time.perf_counter() - started)
+        elif result.name != scenario.name:
+            result = ScenarioResult(scenario.name, result.payroll, result.payroll - result.change,
+                                    result.affected, result.groups, result.duration)
+        return result
+
+    # Codes of the values a rule's filter matches, ignoring case and spacing like the stored values
+    def _matching_codes(self, column, wanted):
+        return [code for code, value in enumerate(self.values[column])
+                if " ".join((value or "").upper().split()) == wanted]
+
+    def _evaluate_numpy(self, scenario):
+        pay = self.pay.copy()
+        for rule in scenario.rules:
+            mask = None
+            for column, wanted in rule.filters.items():
+                matched = self._masks.get((column, wanted))
+                if matched is None:
+                    # Look each employee's code up in a table of the matching codes, faster than isin
+                    table = np.zeros(len(self.values[column]), dtype=bool)
+                    table[self._matching_codes(column, wanted)] = True
+                    matched = self._masks[(column, wanted)] = table[self.codes[column]]
+                mask = matched if mask is None else mask & matched
+            selected = pay if mask is None else pay[mask]
+            if rule.kind == "percent":
+                selected = selected * (1 + rule.value / 100)
+            elif rule.kind == "floor":
+                selected = np.maximum(selected, rule.value)  # NaN (missing pay) stays NaN
+            else:
+                selected = np.minimum(selected, rule.value)
+            if mask is None:
+                pay = selected
+            else:
+                pay[mask] = selected
+        changed = pay != self.pay
+        affected = int(np.count_nonzero(changed & ~np.isnan(pay)))
+        pay = np.nan_to_num(pay)
+        cost = np.where(self.hourly, self.hours * pay * self.weeks, pay)
+        groups = {}
+        for column, codes in self.codes.items():
+            values = self.values[column]
+            counts = np.bincount(codes, minlength=len(values))
+            sums = np.bincount(codes, weights=cost, minlength=len(values))
+            groups[column] = {values[code]: (int(counts[code]), float(sums[code])) for code in np.flatnonzero(counts)}
+        return float(cost.sum()), affected, groups
+
+    def _evaluate_python(self, scenario):
+        rules = [(rule, [(self.codes[column], set(self._matching_codes(column, wanted)))
+                         for column, wanted in rule.filters.items()]) for rule in scenario.rules]
+        payroll, affected = 0.0, 0
+        groups = {column: {} for column in self.codes}
+        for index, original in enumerate(self.pay):
+            pay = original
+            if pay == pay:  # Missing pay (NaN) is left alone
+                for rule, filters in rules:
+                    if all(codes[index] in matched for codes, matched in filters):
+                        if rule.kind == "percent":
+                            pay = pay * (1 + rule.value / 100)
+                        elif rule.kind == "floor":
+                            pay = max(pay, rule.value)
+                        else:
+                            pay = min(pay, rule.value)
+                affected += pay != original
+            else:
+                pay = 0.0
+            cost = self.hours[index] * pay * self.weeks if self.hourly[index] else pay
+            payroll += cost
+            for column, codes in self.codes.items():
+                value = self.values[column][codes[index]]
+                count, total = groups[column].get(value, (0, 0.0))
+                groups[column][value] = (count + 1, total + cost)
+        return payroll, affected, groups
+
+
+# Build the model from the employee cache's row store and the SensitiveStore's table (runs on a
+# worker thread). Takes the columnar arrays as they are when both are columnar and NumPy is installed.
+def load_cache(rows, sensitive, weeks=52):
+    started = time.perf_counter()
+    if np is not None and isinstance(rows, ColumnarTable) and isinstance(sensitive, ColumnarTable):
+        model = _load_numpy(rows, sensitive, weeks)
+    else:
+        model = _load_rows(((row, sensitive.get(row[0])) for row in list(rows.values())), weeks)
+    model.load_duration = time.perf_counter() - started
+    return model
+
+
+# Build the model from the database (runs on a worker thread), for when the cache is not loaded
+def load_server(connect, weeks=52, table="Current_Employee"):
+    started = time.perf_counter()
+    connection = connect()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT ID, NULL, NULL, Department, Full_or_Part_Time, Salary_or_Hourly, Typical_Hours, "
+                       f"ID, Annual_Salary, Hourly_Rate FROM {table} ORDER BY ID")
+        rows = cursor.fetchall()
+    finally:
+        connection.close()
+    model = _load_rows(((row[:7], row[7:]) for row in rows), weeks)
+    model.load_duration = time.perf_counter() - started
+    return model
+
+
+# From (employee row, (ID, Annual_Salary, Hourly_Rate) or None) pairs
+def _load_rows(pairs, weeks):
+    keys, pay, hours, hourly = [], [], [], []
+    codes = {column: [] for column in GROUP_COLUMNS}
+    lookups = {column: {} for column in GROUP_COLUMNS}
+    for row, stored in pairs:
+        is_hourly = (row[5] or "").upper() == "HOURLY"
+        value = None if stored is None else stored[2 if is_hourly else 1]
+        keys.append(row[0])
+        pay.append(float("nan") if value is None else float(value))
+        hours.append(row[6] or 0)
+        hourly.append(is_hourly)
+        for column, position in GROUP_COLUMNS.items():
+            codes[column].append(lookups[column].setdefault(row[position], len(lookups[column])))
+    values = {column: list(lookup) for column, lookup in lookups.items()}
+    if np is not None:
+        return SalaryModel(np.array(keys, dtype=np.int64), np.array(pay), np.array(hours, dtype=np.float64),
+                           np.array(hourly, dtype=bool),
+                           {column: np.array(column_codes, dtype=np.int64) for column, column_codes in codes.items()},
+                           values, weeks, "numpy")
+    return SalaryModel(keys, pay, hours, hourly, codes, values, weeks, "python")
+
+
+def _load_numpy(rows, sensitive, weeks):
+    keys, positions, columns = rows.export_columns(list(GROUP_COLUMNS) + ["Typical_Hours"])
+    positions = np.frombuffer(positions, dtype=np.int64)
+    live = positions >= 0
+    keys = np.frombuffer(keys, dtype=np.int64)[live]
+    positions = positions[live]
+
+    # Line up each cached row with its sensitive values by ID, both are in ID order
+    pay_keys, pay_positions, pay = sensitive.export_columns(["Annual_Salary", "Hourly_Rate"])
+    pay_positions = np.frombuffer(pay_positions, dtype=np.int64)
+    pay_live = pay_positions >= 0
+    pay_keys = np.frombuffer(pay_keys, dtype=np.int64)[pay_live]
+    pay_positions = pay_positions[pay_live]
+    salary = np.full(len(keys), np.nan)
+    rate = np.full(len(keys), np.nan)
+    if len(pay_keys):
+        index = np.minimum(np.searchsorted(pay_keys, keys), len(pay_keys) - 1)
+        found = pay_keys[index] == keys
+        source = pay_positions[index[found]]
+        salary[found] = np.frombuffer(pay["Annual_Salary"].data, dtype=np.float64)[source]
+        rate[found] = np.frombuffer(pay["Hourly_Rate"].data, dtype=np.float64)[source]
+
+    hours = np.frombuffer(columns["Typical_Hours"].data, dtype=np.int64)[positions].astype(np.float64)
+    hours[hours == NULL_INT] = 0
+    kind = columns["Salary_or_Hourly"]
+    hourly_codes = [code for code, value in enumerate(kind.values) if (value or "").upper() == "HOURLY"]
+    hourly = np.isin(np.frombuffer(kind.codes, dtype=np.uint32)[positions], hourly_codes)
+    codes = {column: np.frombuffer(columns[column].codes, dtype=np.uint32)[positions].astype(np.int64)
+             for column in GROUP_COLUMNS}
+    values = {column: columns[column].values for column in GROUP_COLUMNS}
+    return SalaryModel(keys, np.where(hourly, rate, salary), hours, hourly, codes, values, weeks, "numpy")
@@ -0,0 +1,176 @@
+import argparse  # Command line
+import logging  # For logging to file and console
+import os  # For environment variables
+import time  # When each migration was applied
+
+TABLE = "Current_Employee"
+
+# Editable columns, a change to any of them gives the row a new Row_Version
+TRACKED_COLUMNS = ("Name", "Job_Titles", "Department", "Full_or_Part_Time", "Salary_or_Hourly",
+                   "Typical_Hours", "Annual_Salary", "Hourly_Rate")
+
+# Migration that adds Search_Text, EmployeeRepository.search() uses it from this version on
+SEARCH_TEXT_VERSION = 3
+
+
+# One versioned change to the schema, with its statements for SQL Server and the SQLite stand-in
+class Migration:
+    def __init__(self, version, description, mssql, sqlite):
+        self.version = version
+        self.description = description
+        self.statements = {"mssql": mssql, "sqlite": sqlite}
+
+
+# Name, Job_Titles and Department lower-cased and joined by spaces, with the dialect's concat operator
+def _search_text(concat):
+    joined = f" {concat} ' ' {concat} ".join(f"COALESCE({column}, '')"
+                                             for column in ("Name", "Job_Titles", "Department"))
+    return f"LOWER({joined})"
+
+
+# Supporting structures for the queries the app issues against Current_Employee, applied in order.
+# Keyset pages in ID order already use the primary key.
+MIGRATIONS = [
+    # Export's Department / Full_or_Part_Time / Salary_or_Hourly filters and the payroll groupings
+    Migration(1, "Index the filter panel columns", [
+        f"CREATE INDEX IX_{TABLE}_Department ON {TABLE} (Department, Full_or_Part_Time, Salary_or_Hourly)",
+    ], [
+        f"CREATE INDEX IX_{TABLE}_Department ON {TABLE} (Department, Full_or_Part_Time, Salary_or_Hourly)",
+    ]),
+    # Pages sorted on a heading order by sorting.sql_sort_expression(), then ID. SQL Server matches
+    # those expressions to persisted computed columns, SQLite indexes the expressions themselves.
+    Migration(2, "Index the case-folded sort keys", [
+        f"ALTER TABLE {TABLE} ADD Name_Sort AS LOWER(COALESCE(Name, '')) PERSISTED",
+        f"ALTER TABLE {TABLE} ADD Job_Titles_Sort AS LOWER(COALESCE(Job_Titles, '')) PERSISTED",
+        f"ALTER TABLE {TABLE} ADD Department_Sort AS LOWER(COALESCE(Department, '')) PERSISTED",
+        f"ALTER TABLE {TABLE} ADD Typical_Hours_Sort AS COALESCE(Typical_Hours, -1) PERSISTED",
+        f"CREATE INDEX IX_{TABLE}_Name_Sort ON {TABLE} (Name_Sort, ID)",
+        f"CREATE INDEX IX_{TABLE}_Job_Titles_Sort ON {TABLE} (Job_Titles_Sort, ID)",
+        f"CREATE INDEX IX_{TABLE}_Department_Sort ON {TABLE} (Department_Sort, ID)",
+        f"CREATE INDEX IX_{TABLE}_Typical_Hours_Sort ON {TABLE} (Typical_Hours_Sort, ID)",
+    ], [
+        f"CREATE INDEX IX_{TABLE}_Name_Sort ON {TABLE} (LOWER(COALESCE(Name, '')), ID)",
+        f"CREATE INDEX IX_{TABLE}_Job_Titles_Sort ON {TABLE} (LOWER(COALESCE(Job_Titles, '')), ID)",
+        f"CREATE INDEX IX_{TABLE}_Department_Sort ON {TABLE} (LOWER(COALESCE(Department, '')), ID)",
+        f"CREATE INDEX IX_{TABLE}_Typical_Hours_Sort ON {TABLE} (COALESCE(Typical_Hours, -1), ID)",
+    ]),
+    # Name, Job_Titles and Department case-folded into one column. A search word with a leading
+    # wildcard cannot seek any index, but scanning this narrow index instead of the whole table
+    # finds the matching IDs without lower-casing three columns of every row.
+    Migration(SEARCH_TEXT_VERSION, "Add the case-folded Search_Text column", [
+        f"ALTER TABLE {TABLE} ADD Search_Text AS {_search_text('+')} PERSISTED",
+        f"CREATE INDEX IX_{TABLE}_Search_Text ON {TABLE} (ID) INCLUDE (Search_Text)",
+    ], [
+        f"ALTER TABLE {TABLE} ADD COLUMN Search_Text TEXT GENERATED ALWAYS AS ({_search_text('||')}) VIRTUAL",
+        f"CREATE INDEX IX_{TABLE}_Search_Text ON {TABLE} (Search_Text)",
+    ]),
+    # A version stamp that changes whenever a row does, for change tracking. The SQLite stand-in
+    # numbers changes with triggers.
+    Migration(4, "Add Row_Version for change tracking", [
+        f"ALTER TABLE {TABLE} ADD Row_Version rowversion",
+        f"CREATE INDEX IX_{TABLE}_Row_Version ON {TABLE} (Row_Version)",
+    ], [
+        f"ALTER TABLE {TABLE} ADD COLUMN Row_Version INTEGER",
+        f"UPDATE {TABLE} SET Row_Version = ID",
+        f"CREATE INDEX IX_{TABLE}_Row_Version ON {TABLE} (Row_Version)",
+        f"""CREATE TRIGGER TR_{TABLE}_Row_Version_Insert AFTER INSERT ON {TABLE}
+            BEGIN
+                UPDATE {TABLE} SET Row_Version = (SELECT COALESCE(MAX(Row_Version), 0) + 1 FROM {TABLE})
+                WHERE ID = NEW.ID;
+            END""",
+        f"""CREATE TRIGGER TR_{TABLE}_Row_Version_Update AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON {TABLE}
+            BEGIN
+                UPDATE {TABLE} SET Row_Version = (SELECT COALESCE(MAX(Row_Version), 0) + 1 FROM {TABLE})
+                WHERE ID = NEW.ID;
+            END""",
+    ]),
+]
+
+SCHEMA_VERSION_TABLE = ("CREATE TABLE Schema_Version (Version INTEGER PRIMARY KEY, "
+                        "Description VARCHAR(200), Applied_At VARCHAR(32))")
+
+
+# Highest migration applied to the database, 0 before the first
+def applied_version(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT MAX(Version) FROM Schema_Version")
+    except Exception:  # No Schema_Version table yet
+        connection.rollback()
+        return 0
+    return cursor.fetchone()[0] or 0
+
+
+# Migrations not applied yet, up to target (all when None)
+def pending(connection, target=None):
+    version = applied_version(connection)
+    return [migration for migration in MIGRATIONS
+            if migration.version > version and (target is None or migration.version <= target)]
+
+
+# Apply the pending migrations in order, each in its own transaction together with its
+# Schema_Version row. Returns the migrations applied.
+def migrate(connection, dialect, target=None):
+    applied = []
+    for migration in pending(connection, target):
+        cursor = connection.cursor()
+        started = time.perf_counter()
+        try:
+            if dialect == "sqlite":
+                cursor.execute("BEGIN")  # sqlite3 would otherwise run each DDL statement on its own
+            if migration.version == MIGRATIONS[0].version:
+                cursor.execute(SCHEMA_VERSION_TABLE)
+            for statement in migration.statements[dialect]:
+                cursor.execute(statement)
+            cursor.execute("INSERT INTO Schema_Version (Version, Description, Applied_At) VALUES (?, ?, ?)",
+                           (migration.version, migration.description, time.strftime("%Y-%m-%d %H:%M:%S")))
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            logging.error(f"Schema migration {migration.version} failed: {e}")
+            raise
+        applied.append((migration, time.perf_counter() - started))
+    return applied
+
+
+# python schema_migrations.py [--status] [--target N] [--sqlite PATH]
+# Uses the database configured for the app (DB_BACKEND and so on from .env) unless --sqlite is given.
+def main():
+    from dotenv import load_dotenv  # To load environment variables from a .env file
+    from database import connect_odbc, connect_sqlite
+
+    parser = argparse.ArgumentParser(description="Apply the versioned Current_Employee schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list the migrations without applying any")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    parser.add_argument("--sqlite", help="migrate this SQLite file instead of the configured database")
+    parser.add_argument("--sql", action="store_true", help="print the statements of the pending migrations")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.sqlite or os.getenv("DB_BACKEND", "mssql").lower() == "sqlite":
+        connection = connect_sqlite(args.sqlite or os.getenv("DB_SQLITE_PATH", "employees.db"))
+        dialect = "sqlite"
+    else:
+        connection = connect_odbc()
+        dialect = "mssql"
+    try:
+        version = applied_version(connection)
+        waiting = pending(connection, args.target)
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version <= version else (
+                "pending" if migration in waiting else "not targeted")
+            print(f"{migration.version:>3}  {state:<12}  {migration.description}")
+            if args.sql and migration in waiting:
+                for statement in migration.statements[dialect]:
+                    print(f"       {statement};")
+        if args.status or args.sql:
+            return
+        for migration, seconds in migrate(connection, dialect, args.target):
+            print(f"Applied {migration.version}: {migration.description} ({seconds:.1f} s)")
+        print(f"Schema is at version {applied_version(connection)}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# In-process substring search over the text columns of employee rows.
+#
+# Instead of scanning every row with LOWER(col) LIKE '%kw%', distinct lower-cased field values are
+# indexed by their trigrams. A term is answered by intersecting the posting lists of its trigrams
+# (smallest first), checking the few surviving values really contain the term, and taking the
+# union of the rows that hold those values. Multi-word queries intersect the rows of each word.
+# Indexing distinct values rather than rows keeps the index small for repetitive columns such as
+# Department and Job_Titles.
+class SearchIndex:
+    def __init__(self, fields=(1, 2, 3)):
+        self.fields = fields  # Row positions to index, Name, Job_Titles and Department by default
+        self._value_ids = {}  # Lower-cased text -> value id
+        self._texts = {}  # Value id -> lower-cased text
+        self._value_rows = {}  # Value id -> set of row keys holding that text
+        self._grams = {}  # Trigram -> set of value ids
+        self._row_values = {}  # Row key -> value ids, so a row can be removed again
+        self._next_value_id = 0
+
+    # Build an index over an iterable of rows
+    @classmethod
+    def build(cls, rows, fields=(1, 2, 3)):
+        index = cls(fields)
+        for row in rows:
+            index.add(row)
+        return index
+
+    def __len__(self):
+        return len(self._row_values)
+
+    # Index a row, replacing any earlier version of it
+    def add(self, row):
+        key = row[0]
+        if key in self._row_values:
+            self.remove(key)
+        value_ids = []
+        for position in self.fields:
+            value = row[position]
+            if not value:
+                continue
+            value_id = self._value_id(str(value).lower())
+            if value_id in value_ids:
+                continue  # Same text in two fields, e.g. Job_Titles equal to Department
+            self._value_rows[value_id].add(key)
+            value_ids.append(value_id)
+        self._row_values[key] = value_ids
+
+    def remove(self, key):
+        for value_id in self._row_values.pop(key, ()):
+            rows = self._value_rows[value_id]
+            rows.discard(key)
+            if not rows:
+                self._drop_value(value_id)
+
+    # Keys of rows where every word of query appears in one of the indexed fields
+    def search(self, query):
+        words = query.lower().split()
+        if not words:
+            return set(self._row_values)
+        result = None
+        # Rarest words first so the running intersection shrinks quickly
+        for rows in sorted((self._rows_matching(word) for word in words), key=len):
+            result = rows if result is None else result & rows
+            if not result:
+                break
+        return result
+
+    def _rows_matching(self, word):
+        rows = set()
+        for value_id in self._values_matching(word):
+            rows |= self._value_rows[value_id]
+        return rows
+
+    def _values_matching(self, word):
+        grams = _trigrams(word)
+        if not grams:
+            # Too short for a trigram, check every distinct value instead
+            return [value_id for value_id, text in self._texts.items() if word in text]
+        postings = []
+        for gram in grams:
+            posting = self._grams.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+        # Trigrams can all be present without the word being a substring
+        return [value_id for value_id in candidates if word in self._texts[value_id]]
+
+    def _value_id(self, text):
+        value_id = self._value_ids.get(text)
+        if value_id is not None:
+            return value_id
+        value_id = self._next_value_id
+        self._next_value_id += 1
+        self._value_ids[text] = value_id
+        self._texts[value_id] = text
+        self._value_rows[value_id] = set()
+        for gram in _trigrams(text):
+            self._grams.setdefault(gram, set()).add(value_id)
+        return value_id
+
+    def _drop_value(self, value_id):
+        text = self._texts.pop(value_id)
+        del self._value_ids[text]
+        del self._value_rows[value_id]
+        for gram in _trigrams(text):
+            posting = self._grams[gram]
+            posting.discard(value_id)
+            if not posting:
+                del self._grams[gram]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
@@ -0,0 +1,122 @@
+import threading  # Wipes and syncs come from different threads
+
+from columnar_store import ColumnarTable
+from instrumentation import metrics, payload_size
+
+# What the Treeview shows in place of the sensitive columns while they are masked
+MASKED_VALUES = ("****", "****")
+
+
+# Annual_Salary and Hourly_Rate by employee ID, kept apart from the rest of the row.
+# Nothing is read from the server until fetch() is called after a successful login, and
+# wipe() drops every value again when the data is re-masked. Changes on the server are
+# picked up by sync(), which compares a one-row checksum of the two columns first.
+# Values are held in float arrays of a ColumnarTable keyed by ID.
+class SensitiveStore:
+    def __init__(self, connect, table="Current_Employee", columns=("Annual_Salary", "Hourly_Rate")):
+        self.connect = connect
+        self.table = table
+        self.columns = columns
+        self.schema = [("ID", "int")] + [(column, "float") for column in columns]
+        self.values = ColumnarTable(self.schema)  # Rows of (ID, Annual_Salary, Hourly_Rate)
+        self.loaded = False
+        self._probe = None
+        self._generation = 0  # Bumped by wipe() so a fetch that was already running is ignored
+        self._lock = threading.Lock()
+
+    def _checksum_query(self):
+        return f"SELECT CHECKSUM_AGG(BINARY_CHECKSUM(ID, {', '.join(self.columns)})) FROM {self.table}"
+
+    # Read every employee's sensitive values (runs on a worker thread).
+    # Returns (generation, probe, values) for apply().
+    def fetch(self):
+        generation = self._generation
+        with metrics.span("connect", "sensitive"):
+            connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", "sensitive"):
+                cursor.execute(self._checksum_query())
+                probe = cursor.fetchone()[0]
+                cursor.execute(f"SELECT ID, {', '.join(self.columns)} FROM {self.table}")
+            with metrics.span("fetch", "sensitive") as span:
+                rows = cursor.fetchall()
+                span.rows = len(rows)
+                span.bytes = payload_size(rows)
+        finally:
+            connection.close()
+        return generation, probe, ColumnarTable.from_rows(self.schema, rows)
+
+    # Checksum of the sensitive columns on the server (runs on a worker thread)
+    def read_probe(self):
+        with metrics.span("connect", "sensitive"):
+            connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            with metrics.span("execute", "sensitive_probe"):
+                cursor.execute(self._checksum_query())
+                return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    # Like fetch(), but returns None without reading the rows when nothing changed
+    def sync(self):
+        if not self.loaded:
+            return None
+        if self.read_probe() == self._probe:
+            return None
+        return self.fetch()
+
+    # Take in fetched values on the Tk thread. Returns the IDs whose values changed,
+    # or None when the store was wiped while the fetch was running.
+    def apply(self, fetched):
+        if fetched is None:
+            return []
+        generation, probe, values = fetched
+        with self._lock:
+            if generation != self._generation:
+                return None
+            previous = self.values
+            self.values = values
+            self._probe = probe
+            self.loaded = True
+        return [key for key in set(previous) | set(values) if previous.get(key) != values.get(key)]
+
+    # Forget every sensitive value
+    def wipe(self):
+        with self._lock:
+            self._generation += 1
+            self.values = ColumnarTable(self.schema)
+            self._probe = None
+            self.loaded = False
+
+    def get(self, key):
+        return self.lookup(key) or MASKED_VALUES
+
+    # (Annual_Salary, Hourly_Rate) for key, or None when not fetched
+    def lookup(self, key):
+        row = self.values.get(key)
+        return None if row is None else row[1:]
+
+    # Record values the app wrote itself, only while the store is loaded
+    def put(self, key, values):
+        if self.loaded:
+            self.values.put((key,) + tuple(values))
+
+    def remove(self, key):
+        self.values.pop(key, None)
+
+
+# Turns the non-sensitive part of a row into what the Treeview shows: the first seven columns
+# followed by either '****' or the values from the SensitiveStore. Rows may come with or without
+# the two sensitive columns, only the first seven are used.
+class MaskProjection:
+    def __init__(self, store, masked=True):
+        self.store = store
+        self.masked = masked
+
+    def sensitive(self, key):
+        return MASKED_VALUES if self.masked else self.store.get(key)
+
+    def __call__(self, row):
+        return tuple(row[:7]) + self.sensitive(row[0])
@@ -0,0 +1,160 @@
+import base64  # HTTP Basic credentials
+import http.client  # Keep-alive connections to the employee service
+import json  # Request and response bodies
+import threading  # One HTTP connection per worker thread
+from urllib.parse import urlencode, urlsplit
+
+from columnar_store import ColumnarTable
+from database import DatabaseConnectionError
+from employee_repository import EmployeeRepository
+from paged_view import KeysetPageSource
+from sensitive_store import SensitiveStore
+from sorting import sql_sort_expression
+from validation import ValidationError
+
+FORM_FIELDS = ("name", "job_title", "department", "full_or_part_time", "salary_or_hourly",
+               "typical_hours", "annual_salary", "hourly_rate")
+
+
+# Raised when the employee service answers with an error other than a validation failure
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+# Calls the employee_service HTTP/JSON API. Each thread keeps its own keep-alive connection.
+# Unreachable services raise DatabaseConnectionError, like an unreachable database, 400 answers
+# raise ValidationError and other errors ServiceError.
+class ServiceClient:
+    def __init__(self, base_url, user=None, password=None, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._auth = None
+        if user or password:
+            token = base64.b64encode(f"{user or ''}:{password or ''}".encode("utf-8")).decode("ascii")
+            self._auth = f"Basic {token}"
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port,
+                                                                             timeout=self.timeout)
+        return connection
+
+    def request(self, method, path, params=None, body=None):
+        url = self.prefix + path + (f"?{urlencode(params)}" if params else "")
+        headers = {"Accept": "application/json"}
+        if self._auth:
+            headers["Authorization"] = self._auth
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            connection = self._connection()
+            sent = False
+            try:
+                connection.request(method, url, body=data, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                payload = json.loads(response.read() or b"null")
+                break
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                self._local.connection = None
+                # A kept-alive connection may have been dropped, retry once on a new one. A change
+                # that was sent is not repeated, the service may have made it before the failure.
+                if attempt or (sent and method != "GET"):
+                    raise DatabaseConnectionError(f"Employee service unreachable: {e}") from e
+        if response.status == 200:
+            return payload
+        payload = payload if isinstance(payload, dict) else {}
+        if response.status == 400:
+            raise ValidationError(payload.get("error", "Input Error"), payload.get("message", ""))
+        if response.status == 503:
+            raise DatabaseConnectionError(payload.get("message", "Database unavailable"))
+        raise ServiceError(response.status, payload.get("message", response.reason))
+
+    def get(self, path, **params):
+        return self.request("GET", path, params)
+
+
+# EmployeeRepository's interface over the employee service, for the desktop app in service mode
+class ServiceRepository:
+    table = "Current_Employee"
+    dialect = "service"
+    columns = staticmethod(EmployeeRepository.columns)
+    prepare_update = staticmethod(EmployeeRepository.prepare_update)
+    mask = staticmethod(EmployeeRepository.mask)
+
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, direction="after", key=None, limit=200, masked=True):
+        params = {"direction": direction, "limit": limit, "masked": int(masked)}
+        if key is not None:
+            params["key"] = key
+        return [tuple(row) for row in self.client.get("/employees", **params)]
+
+    def get(self, employee_id, masked=True):
+        try:
+            return tuple(self.client.get(f"/employees/{int(employee_id)}", masked=int(masked)))
+        except ServiceError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def search(self, keyword, masked=False):
+        return [tuple(row) for row in self.client.get("/employees/search", q=keyword, masked=int(masked))]
+
+    def add(self, *fields):
+        return tuple(self.client.request("POST", "/employees", body=dict(zip(FORM_FIELDS, fields))))
+
+    def update(self, employee_id, *fields):
+        return tuple(self.client.request("PUT", f"/employees/{int(employee_id)}",
+                                         body=dict(zip(FORM_FIELDS, fields))))
+
+    def delete(self, employee_id):
+        self.client.request("DELETE", f"/employees/{int(employee_id)}")
+
+    def apply_changes(self, updates=(), deletes=()):
+        return tuple(self.client.request("POST", "/employees/batch",
+                                         body={"updates": [list(row) for row in updates],
+                                               "deletes": list(deletes)}))
+
+
+# KeysetPageSource that asks the service for each page. sort lists (column position, descending)
+# pairs like SortSpec.columns, the service turns them into the same ORDER BY and keys.
+class ServicePageSource(KeysetPageSource):
+    def __init__(self, client, sort=()):
+        super().__init__(None, "", "", order_by=[(sql_sort_expression(column), descending)
+                                                 for column, descending in sort])
+        self.client = client
+        self.sort = [list(entry) for entry in sort]
+
+    def fetch(self, direction, key, limit):
+        params = {"direction": direction, "limit": limit, "sort": json.dumps(self.sort)}
+        if key is not None:
+            params["key"] = json.dumps(key)
+        return [tuple(row) for row in self.client.get("/employees/page", **params)]
+
+
+# SensitiveStore that reads Annual_Salary and Hourly_Rate through the service
+class ServiceSensitiveStore(SensitiveStore):
+    def __init__(self, client):
+        super().__init__(None)
+        self.client = client
+
+    def fetch(self):
+        generation = self._generation
+        fetched = self.client.get("/employees/sensitive")
+        return generation, fetched["probe"], ColumnarTable.from_rows(
+            self.schema, [tuple(row) for row in fetched["rows"]])
+
+    def read_probe(self):
+        return self.client.get("/employees/sensitive/probe")["probe"]
@@ -0,0 +1,103 @@
+import json  # Probe and block checksums in the Meta table
+import logging  # For logging to file and console
+import os  # Snapshot file presence
+import sqlite3  # The snapshot is a local SQLite file
+import time  # Write timing
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Local SQLite copy of the employee cache's non-sensitive columns, for warm starts and for
+# read-only use while the server is unreachable.
+#
+# Alongside the rows it keeps the probe and per-block checksums of the server state they match,
+# so a cache restored from it goes on with an ordinary delta sync and only downloads the blocks
+# that changed since. Synced deltas are written on a single background thread, one transaction
+# each and in the order they were applied; a full load rewrites the file, later syncs replace
+# only the changed blocks. Annual_Salary and Hourly_Rate are never written.
+class SnapshotStore:
+    def __init__(self, path, columns, table="Employee"):
+        self.path = path
+        self.columns = list(columns)  # Key column first
+        self.table = table
+        self.writes = 0
+        self.last_write_duration = 0.0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                           f"({self.columns[0]} INTEGER PRIMARY KEY, {', '.join(self.columns[1:])})")
+        connection.execute("CREATE TABLE IF NOT EXISTS Meta (Key TEXT PRIMARY KEY, Value TEXT)")
+        return connection
+
+    # (rows in ID order, probe, blocks, time last confirmed in sync with the server), or None when
+    # there is no snapshot or it was written for other columns or another block size.
+    # Runs on a worker thread.
+    def read(self, block_size):
+        if not self.exists():
+            return None
+        connection = self._connect()
+        try:
+            meta = dict(connection.execute("SELECT Key, Value FROM Meta"))
+            if ("probe" not in meta or json.loads(meta.get("columns", "null")) != self.columns
+                    or int(meta.get("block_size", 0)) != block_size):
+                return None
+            rows = [tuple(row) for row in connection.execute(
+                f"SELECT {', '.join(self.columns)} FROM {self.table} ORDER BY {self.columns[0]}")]
+        finally:
+            connection.close()
+        blocks = {int(block): tuple(entry) for block, entry in json.loads(meta["blocks"]).items()}
+        return rows, tuple(json.loads(meta["probe"])), blocks, float(meta["synced_at"])
+
+    # Queue a delta from EmployeeCache.fetch_delta() to be written after the ones before it
+    def save(self, delta, block_size):
+        future = self._writer.submit(self._write, delta, block_size)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def _write(self, delta, block_size):
+        started = time.perf_counter()
+        key = self.columns[0]
+        connection = self._connect()
+        try:
+            with connection:  # One transaction, a failed write leaves the previous snapshot
+                meta = {"synced_at": json.dumps(delta.fetched_at)}
+                if delta.blocks is not None:
+                    if delta.full:
+                        connection.execute(f"DELETE FROM {self.table}")
+                    else:
+                        connection.executemany(
+                            f"DELETE FROM {self.table} WHERE {key} >= ? AND {key} < ?",
+                            [(block * block_size, (block + 1) * block_size) for block in delta.cleared_blocks])
+                    connection.executemany(
+                        f"INSERT OR REPLACE INTO {self.table} ({', '.join(self.columns)}) "
+                        f"VALUES ({', '.join('?' for _ in self.columns)})", [tuple(row) for row in delta.rows])
+                    meta.update(probe=json.dumps([_plain(value) for value in delta.probe]),
+                                blocks=json.dumps({str(block): [_plain(value) for value in entry]
+                                                   for block, entry in delta.blocks.items()}),
+                                columns=json.dumps(self.columns), block_size=str(block_size))
+                elif "probe" not in dict(connection.execute("SELECT Key, Value FROM Meta")):
+                    return  # Nothing to confirm as in sync yet
+                connection.executemany("INSERT OR REPLACE INTO Meta (Key, Value) VALUES (?, ?)", meta.items())
+        finally:
+            connection.close()
+        self.writes += 1
+        self.last_write_duration = time.perf_counter() - started
+
+    # Wait for queued writes, e.g. at exit
+    def close(self):
+        self._writer.shutdown(wait=True)
+
+
+# Checksums can come back as Decimal from ODBC
+def _plain(value):
+    return value if value is None or isinstance(value, (int, float, str)) else int(value)
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logging.error(f"Error writing employee snapshot: {error}")
@@ -0,0 +1,158 @@
+from array import array
+
+from database import EMPLOYEE_COLUMN_NAMES
+
+# Positions of the columns that sort as numbers, the rest sort as case-folded text
+NUMERIC_COLUMNS = {0, 6, 7, 8}
+SENSITIVE_COLUMNS = {7, 8}  # Annual_Salary and Hourly_Rate, only sortable while revealed
+
+
+# Missing and masked values ('****') sort before any number
+def _numeric_key(value):
+    try:
+        return (1, float(value))
+    except (TypeError, ValueError):
+        return (0, 0.0)
+
+
+def _text_key(value):
+    return "" if value is None else str(value).casefold()
+
+
+# Sort key function for the values of one column
+def sort_key(column):
+    return _numeric_key if column in NUMERIC_COLUMNS else _text_key
+
+
+# SQL expression the server sorts on for one column, with the same order as sort_key().
+# NULLs are folded into a value so keyset comparisons on the expression never see one.
+def sql_sort_expression(column):
+    name = EMPLOYEE_COLUMN_NAMES[column]
+    if column in NUMERIC_COLUMNS:
+        return f"COALESCE({name}, -1)"
+    return f"LOWER(COALESCE({name}, ''))"
+
+
+# The columns the Treeview is sorted by, most significant first, as (position, descending) pairs
+class SortSpec:
+    def __init__(self):
+        self.columns = []
+
+    # Click on a heading. A plain click sorts by that column alone, or flips its direction when
+    # it already is the only sort column; extend (Shift+click) adds the column as the next key
+    # or flips it in place. Returns True when the change only reversed the previous order.
+    def toggle(self, column, extend=False):
+        for index, (existing, descending) in enumerate(self.columns):
+            if existing == column and (extend or len(self.columns) == 1):
+                self.columns[index] = (column, not descending)
+                return len(self.columns) == 1
+        if extend:
+            self.columns.append((column, False))
+        else:
+            self.columns = [(column, False)]
+        return False
+
+    # Stop sorting by the given columns, e.g. the salary columns when the data is masked again
+    def drop(self, columns):
+        kept = [entry for entry in self.columns if entry[0] not in columns]
+        changed = len(kept) != len(self.columns)
+        self.columns = kept
+        return changed
+
+    def clear(self):
+        self.columns = []
+
+    # Arrow shown after a heading, numbered when sorting by more than one column
+    def indicator(self, column):
+        for index, (existing, descending) in enumerate(self.columns):
+            if existing == column:
+                arrow = "▼" if descending else "▲"
+                return f"{arrow}{index + 1}" if len(self.columns) > 1 else arrow
+        return ""
+
+    # ORDER BY terms for KeysetPageSource
+    def sql(self):
+        return [(sql_sort_expression(column), descending) for column, descending in self.columns]
+
+    def key(self):
+        return tuple(self.columns)
+
+    def __bool__(self):
+        return bool(self.columns)
+
+
+# Stable multi-column sort of a list of rows: one stable sort per column, least significant
+# first. value(row, column) reads a column, e.g. from the sensitive store for masked rows.
+def sort_rows(rows, columns, value=None):
+    rows = list(rows)
+    for column, descending in reversed(columns):
+        key = sort_key(column)
+        if value is None:
+            rows.sort(key=lambda row: key(row[column]), reverse=descending)
+        else:
+            rows.sort(key=lambda row: key(value(row, column)), reverse=descending)
+    return rows
+
+
+# Orders the IDs of an EmployeeCache by any SortSpec. Sort keys for each non-sensitive column
+# are computed once per cache version and reused by later sorts, and the last order is kept
+# so flipping the direction of a single-column sort is a reverse of that list (equal values
+# then come out in reverse ID order instead of ID order).
+# sensitive(key) returns a row's (Annual_Salary, Hourly_Rate) or None.
+class CacheSorter:
+    def __init__(self, cache, sensitive=None):
+        self.cache = cache
+        self.sensitive = sensitive
+        self._keys = {}  # Column -> (cache version, IDs, sort keys in the same order)
+        self._last = None  # (cache version, spec key, ordered IDs)
+        self.sorts = 0
+        self.reverses = 0
+
+    def _column_keys(self, column, version):
+        if column not in SENSITIVE_COLUMNS:
+            cached = self._keys.get(column)
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+        if column in SENSITIVE_COLUMNS:
+            ids, _ = self.cache.column_values(0)
+            offset = column - min(SENSITIVE_COLUMNS)
+            values = [None if pay is None else pay[offset] for pay in map(self.sensitive, ids)]
+        else:
+            ids, values = self.cache.column_values(column)
+        key = sort_key(column)
+        keys = [key(value) for value in values]
+        if column not in SENSITIVE_COLUMNS:
+            self._keys = {c: entry for c, entry in self._keys.items() if entry[0] == version}
+            self._keys[column] = (version, ids, keys)
+        return ids, keys
+
+    # IDs in display order (runs on a worker thread)
+    def order(self, columns):
+        columns = tuple(columns)
+        version = self.cache.version
+        last = self._last
+        if last is not None and last[0] == version and not any(c in SENSITIVE_COLUMNS for c, _ in columns):
+            if last[1] == columns:
+                return last[2]
+            if len(columns) == 1 and len(last[1]) == 1 and last[1][0] == (columns[0][0], not columns[0][1]):
+                self.reverses += 1
+                order = last[2][::-1]
+                self._last = (version, columns, order)
+                return order
+        self.sorts += 1
+        ids = None
+        permutation = None
+        for column, descending in reversed(columns):
+            column_ids, keys = self._column_keys(column, version)
+            if ids is None:
+                ids = column_ids
+                permutation = list(range(len(ids)))
+            elif column_ids is not ids and column_ids != ids:
+                # The cache changed between reading two columns, line the keys up by ID
+                by_id = dict(zip(column_ids, keys))
+                missing = sort_key(column)(None)
+                keys = [by_id.get(key, missing) for key in ids]
+            permutation.sort(key=keys.__getitem__, reverse=descending)
+        order = array("q", map(ids.__getitem__, permutation)) if ids is not None else array("q")
+        self._last = (version, columns, order)
+        return order
@@ -0,0 +1,66 @@
+import random  # Reproducible synthetic employees
+
+FIRST_NAMES = [
+    "JAMES", "MARY", "JOHN", "PATRICIA", "ROBERT", "JENNIFER", "MICHAEL", "LINDA",
+    "WILLIAM", "ELIZABETH", "DAVID", "BARBARA", "RICHARD", "SUSAN", "JOSEPH", "JESSICA",
+    "THOMAS", "SARAH", "CHARLES", "KAREN", "MARIA", "JOSE", "LUIS", "ANA", "KEITH",
+    "AISHA", "WEI", "PRIYA", "OMAR", "FATIMA", "TOMASZ", "AGNIESZKA",
+]
+LAST_NAMES = [
+    "SMITH", "JOHNSON", "WILLIAMS", "BROWN", "JONES", "GARCIA", "MILLER", "DAVIS",
+    "RODRIGUEZ", "MARTINEZ", "HERNANDEZ", "LOPEZ", "GONZALEZ", "WILSON", "ANDERSON",
+    "THOMAS", "TAYLOR", "MOORE", "JACKSON", "MARTIN", "LEE", "PEREZ", "THOMPSON",
+    "WHITE", "HARRIS", "SANCHEZ", "CLARK", "RAMIREZ", "LEWIS", "ROBINSON", "KOWALSKI",
+    "NOWAK", "NGUYEN", "PATEL", "KHAN", "O'BRIEN", "RICHARDSON",
+]
+DEPARTMENTS = [
+    "POLICE", "FIRE", "STREETS & SAN", "WATER MGMNT", "AVIATION", "TRANSPORTN",
+    "PUBLIC LIBRARY", "HEALTH", "FINANCE", "OEMC", "BUILDINGS", "FAMILY & SUPPORT",
+    "LAW", "GENERAL SERVICES", "CITY COUNCIL", "PROCUREMENT", "HUMAN RESOURCES",
+]
+JOB_TITLES = [
+    "POLICE OFFICER", "FIREFIGHTER-EMT", "SERGEANT", "MOTOR TRUCK DRIVER", "LIBRARIAN I",
+    "CLERK III", "SANITATION LABORER", "ELECTRICAL MECHANIC", "CROSSING GUARD",
+    "ADMINISTRATIVE ASST II", "PARAMEDIC", "STAFF ASST", "ENGINEER", "AVIATION SECURITY OFFICER",
+    "POOL MOTOR TRUCK DRIVER", "LIBRARY PAGE", "ACCOUNTANT IV", "PUBLIC HEALTH NURSE",
+]
+
+# Columns in the order generate_employees() yields them
+EMPLOYEE_FIELDS = ("Name", "Job_Titles", "Department", "Full_or_Part_Time",
+                   "Salary_or_Hourly", "Typical_Hours", "Annual_Salary", "Hourly_Rate")
+
+
+# Yield count synthetic employee rows (without ID) shaped like Current_Employee
+def generate_employees(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        name = f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+        full_time = rng.random() < 0.85
+        hourly = rng.random() < (0.2 if full_time else 0.9)
+        if hourly:
+            hours = 40 if full_time else rng.choice([10, 20, 35])
+            hourly_rate = round(rng.uniform(15, 60), 2)
+            annual_salary = None
+        else:
+            hours = None
+            hourly_rate = None
+            annual_salary = float(rng.randrange(40000, 180000, 12))
+        yield (name, rng.choice(JOB_TITLES), rng.choice(DEPARTMENTS),
+               "F" if full_time else "P", "HOURLY" if hourly else "SALARY",
+               hours, annual_salary, hourly_rate)
+
+
+# Insert count synthetic employees into Current_Employee in batches
+def seed_database(connection, count, seed=0, batch_size=10000):
+    query = (f"INSERT INTO Current_Employee ({', '.join(EMPLOYEE_FIELDS)}) "
+             f"VALUES ({', '.join('?' for _ in EMPLOYEE_FIELDS)})")
+    cursor = connection.cursor()
+    batch = []
+    for row in generate_employees(count, seed):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(query, batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+    connection.commit()
@@ -0,0 +1,64 @@
+from columnar_store import ColumnarTable, RowView
+from database import EMPLOYEE_SCHEMA
+
+ROWS = [
+    (3, "SMITH JOHN", "CLERK", "POLICE", "F", "SALARY", None, 52000.0, None),
+    (1, "DOE JANE", "OFFICER", "POLICE", "F", "HOURLY", 40, None, 31.5),
+    (2, "ROE JIM", "CLERK", "FIRE", "P", "HOURLY", 20, None, 18.0),
+]
+
+
+def test_rows_read_back_like_the_tuples_they_replace():
+    table = ColumnarTable.from_rows(EMPLOYEE_SCHEMA, ROWS)
+    assert len(table) == 3
+    assert list(table) == [1, 2, 3]
+    assert table.get(3) == ROWS[0]  # None kept in the nullable int and float columns
+    assert table.get(1)[1:3] == ("DOE JANE", "OFFICER")
+    assert table.values() == sorted(ROWS)
+    assert table.column("Department") == ["POLICE", "FIRE", "POLICE"]
+    assert table.get(9) is None and 9 not in table and 2 in table
+
+
+def test_put_replaces_and_pop_removes_without_changing_earlier_views():
+    table = ColumnarTable.from_rows(EMPLOYEE_SCHEMA, ROWS)
+    before = table.get(2)
+    table.put((2, "ROE JIM", "CLERK", "WATER", "P", "HOURLY", 20, None, 19.0))
+    assert before[3] == "FIRE"
+    assert table.get(2)[3] == "WATER"
+    table.put((0, "NEW ONE", "CLERK", "FIRE", "F", "SALARY", 40, 1.0, None))
+    assert list(table) == [0, 1, 2, 3]
+    assert table.pop(1) == ROWS[1]
+    assert table.pop(1, "gone") == "gone"
+    assert list(table) == [0, 2, 3] and len(table) == 3
+    table.put(ROWS[1])  # A removed key can come back
+    assert table.get(1) == ROWS[1] and len(table) == 4
+
+
+def test_compact_keeps_only_live_rows():
+    table = ColumnarTable.from_rows(EMPLOYEE_SCHEMA, ROWS)
+    for salary in range(10):
+        table.put(ROWS[0][:7] + (float(salary), None))
+    table.pop(2)
+    expected = table.values()
+    table.compact()
+    assert table.values() == expected
+    assert table._stored == len(table) == 2
+
+
+def test_many_replacements_compact_on_their_own():
+    table = ColumnarTable(EMPLOYEE_SCHEMA)
+    for version in range(3000):
+        table.put((7, f"NAME {version}", "CLERK", "FIRE", "F", "SALARY", 40, float(version), None))
+    assert table._stored <= 2048
+    assert table.get(7)[1] == "NAME 2999" and len(table) == 1
+
+
+def test_export_columns_is_a_consistent_copy():
+    table = ColumnarTable.from_rows(EMPLOYEE_SCHEMA, ROWS)
+    keys, positions, columns = table.export_columns(["Department", "Annual_Salary"])
+    table.put((4, "LATE ROW", "CLERK", "WATER", "F", "SALARY", 40, 1.0, None))
+    table.pop(1)
+    assert list(keys) == [1, 2, 3] and all(position >= 0 for position in positions)
+    department = columns["Department"]
+    assert [department.get(position) for position in positions] == ["POLICE", "FIRE", "POLICE"]
+    assert isinstance(table.get(2), RowView)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+from database import ConnectionPool, DatabaseConnectionError, PoolClosedError, PoolTimeoutError, connect_sqlite
+
+
+@pytest.fixture
+def factory(tmp_path):
+    path = str(tmp_path / "pool.db")
+    opened = []
+
+    def connect():
+        connection = connect_sqlite(path)
+        opened.append(connection)
+        return connection
+
+    connect.opened = opened
+    return connect
+
+
+def test_released_connection_is_reused(factory):
+    pool = ConnectionPool(factory, size=2, dialect="sqlite")
+    first = pool.acquire()
+    raw = first._entry.raw
+    first.close()
+    with pool.acquire() as second:
+        assert second._entry.raw is raw
+        assert second.cursor().execute("SELECT COUNT(*) FROM Current_Employee").fetchone() == (0,)
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses"], stats["open"], stats["idle"]) == (1, 1, 1, 1)
+    assert len(factory.opened) == 1
+
+
+def test_release_rolls_back_an_open_transaction(factory):
+    pool = ConnectionPool(factory, size=1, dialect="sqlite")
+    with pool.acquire() as connection:
+        connection.cursor().execute("INSERT INTO Current_Employee (Name) VALUES ('X')")
+    with pool.acquire() as connection:
+        assert connection.cursor().execute("SELECT COUNT(*) FROM Current_Employee").fetchone() == (0,)
+
+
+def test_acquire_times_out_when_every_connection_is_busy(factory):
+    pool = ConnectionPool(factory, size=1, acquire_timeout=0.05, dialect="sqlite")
+    held = pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()["open"] == 1
+    held.close()
+    pool.acquire().close()
+
+
+def test_waiting_caller_gets_the_released_connection(factory):
+    pool = ConnectionPool(factory, size=1, acquire_timeout=5, dialect="sqlite")
+    held = pool.acquire()
+    threading.Timer(0.05, held.close).start()
+    with pool.acquire():
+        pass
+    assert pool.stats()["waits"] == 1
+    assert len(factory.opened) == 1
+
+
+def test_idle_and_old_connections_expire(factory):
+    pool = ConnectionPool(factory, size=2, idle_timeout=0.05, max_lifetime=60, dialect="sqlite")
+    pool.acquire().close()
+    time.sleep(0.1)
+    assert pool.prune() == 1
+    assert pool.stats()["idle_expired"] == 1
+    assert pool.stats()["open"] == 0
+
+    pool = ConnectionPool(factory, size=2, max_lifetime=0.05, dialect="sqlite")
+    connection = pool.acquire()
+    time.sleep(0.1)
+    connection.close()  # Past its lifetime, closed instead of kept idle
+    stats = pool.stats()
+    assert (stats["recycled"], stats["open"], stats["idle"]) == (1, 0, 0)
+
+
+def test_connection_failing_its_health_check_is_replaced(factory):
+    pool = ConnectionPool(factory, size=1, health_check_interval=0, dialect="sqlite")
+    first = pool.acquire()
+    raw = first._entry.raw
+    first.close()
+    raw.close()  # Broken while idle, e.g. the server dropped it
+    with pool.acquire() as second:
+        assert second._entry.raw is not raw
+    stats = pool.stats()
+    assert (stats["health_check_failures"], stats["misses"], stats["open"]) == (1, 2, 1)
+
+
+def test_failed_connect_frees_its_slot(factory):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("server unreachable")
+        return factory()
+
+    pool = ConnectionPool(flaky, size=1, acquire_timeout=0.05, dialect="sqlite")
+    with pytest.raises(DatabaseConnectionError):
+        pool.acquire()
+    pool.acquire().close()
+    assert pool.stats()["open"] == 1
+
+
+def test_prewarm_opens_idle_connections_up_to_size(factory):
+    pool = ConnectionPool(factory, size=3, dialect="sqlite")
+    assert pool.prewarm(2) == 2
+    assert pool.prewarm(2) == 0  # Already open
+    assert pool.prewarm(10) == 1  # Never beyond size
+    pool.acquire().close()
+    stats = pool.stats()
+    assert (stats["prewarmed"], stats["idle"], stats["hits"], stats["misses"]) == (3, 3, 1, 0)
+
+
+def test_closed_pool_refuses_acquire(factory):
+    pool = ConnectionPool(factory, size=1, dialect="sqlite")
+    held = pool.acquire()
+    pool.close()
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+    held.close()
+    assert pool.stats()["open"] == 0
@@ -0,0 +1,53 @@
+from duplicates import find_duplicates, merge_changes, soundex, stored_name
+
+
+def test_soundex_known_codes():
+    assert soundex("Robert") == soundex("Rupert") == "R163"
+    assert soundex("Ashcraft") == "A261"  # H does not separate S and C
+    assert soundex("Tymczak") == "T522"
+    assert soundex("Pfister") == "P236"  # F has the first letter's code
+    assert soundex("Lee") == "L000"
+    assert soundex("O'Hara") == "O600"
+    assert soundex("") == ""
+
+
+def test_stored_name_normalises_typed_names():
+    assert stored_name("John Smith") == "SMITH JOHN"
+    assert stored_name("  john   smith ") == "SMITH JOHN"
+    assert stored_name("SMITH  JOHN") == "SMITH JOHN"  # Already stored by add_data()
+    assert stored_name(None) == ""
+
+
+def row(key, name, department="POLICE", job_title="CLERK", full_or_part_time="F",
+        salary_or_hourly="HOURLY", hours=40):
+    return key, name, job_title, department, full_or_part_time, salary_or_hourly, hours
+
+
+def test_typed_and_stored_names_group_within_a_department():
+    groups = find_duplicates([row(1, "SMITH JOHN"), row(2, "John Smith"), row(3, "SMITH JOHN", "FIRE"),
+                              row(4, "DOE JANE")])
+    assert [(group.keys, group.score) for group in groups] == [([1, 2], 1.0)]
+
+
+def test_consonant_typo_found_by_the_alphabetical_pass():
+    # JOHN and JOHB have different Soundex codes, so the phonetic blocks keep them apart
+    assert soundex("JOHN") != soundex("JOHB")
+    groups = find_duplicates([row(7, "KOWALSKI JOHN"), row(9, "KOWALSKI JOHB"), row(8, "NOWAK ANNA")])
+    assert len(groups) == 1
+    assert groups[0].keys == [7, 9]
+    assert 0.85 <= groups[0].score < 1.0
+
+
+def test_union_find_joins_chains_of_matches():
+    groups = find_duplicates([row(1, "SMITH JOHN"), row(2, "SMYTH JOHN"), row(3, "SMYTHE JOHN"),
+                              row(4, "John Smith")])
+    assert [group.keys for group in groups] == [[1, 2, 3, 4]]
+
+
+def test_merge_changes_normalises_the_survivor_and_deletes_the_rest():
+    group = find_duplicates([row(5, "SMITH JOHN"), row(3, "John Smith", job_title=" clerk ", department="police ",
+                                                       full_or_part_time="f"), row(8, "SMITH JOHN")])[0]
+    updates, deletes = merge_changes(group, 3, (None, 25.5))
+    # Same order as EmployeeRepository.prepare_update(), what apply_changes() writes
+    assert updates == [(3, "SMITH JOHN", "CLERK", "POLICE", "F", "HOURLY", 40, None, 25.5)]
+    assert deletes == [5, 8]
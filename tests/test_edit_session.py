@@ -0,0 +1,68 @@
+from edit_session import PENDING_DELETE_TAG, PENDING_UPDATE_TAG, EditSession
+from sensitive_store import MASKED_VALUES, MaskProjection
+
+
+class Store:
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key):
+        return self.values.get(key, MASKED_VALUES)
+
+
+ROW = (1, "SMITH JOHN", "CLERK", "POLICE", "F", "SALARY", 40, "****", "****")
+STAGED = (1, "SMITH JOHN", "SERGEANT", "POLICE", "F", "SALARY", 40, 61000.0, None)
+
+
+def session(masked=True):
+    return EditSession(MaskProjection(Store({1: (52000.0, None), 2: (None, 20.0)}), masked))
+
+
+def test_update_and_delete_of_the_same_row_replace_each_other():
+    edits = session()
+    edits.stage_update(STAGED)
+    assert edits.pending(1) == "update"
+    edits.stage_delete(1)
+    assert edits.pending(1) == "delete" and edits.updates == {}
+    edits.stage_update(STAGED)
+    assert edits.pending(1) == "update" and edits.deletes == set()
+    edits.stage_delete(3)
+    edits.stage_delete(2)
+    assert edits.snapshot() == ([STAGED], [2, 3])
+    assert len(edits) == 3
+
+
+def test_staged_rows_show_their_staged_values():
+    masked = session(masked=True)
+    masked.stage_update(STAGED)
+    assert masked(ROW) == STAGED[:7] + MASKED_VALUES
+    assert masked((2,) + ROW[1:]) == (2,) + ROW[1:7] + MASKED_VALUES
+
+    revealed = session(masked=False)
+    revealed.stage_update(STAGED)
+    assert revealed(ROW) == STAGED
+    assert revealed((2,) + ROW[1:]) == (2,) + ROW[1:7] + (None, 20.0)
+    revealed.stage_delete(2)
+    assert revealed.tags(ROW) == (PENDING_UPDATE_TAG,)
+    assert revealed.tags((2,) + ROW[1:]) == (PENDING_DELETE_TAG,)
+    assert revealed.tags((3,) + ROW[1:]) == ()
+
+
+def test_written_keeps_changes_staged_again_while_saving():
+    edits = session()
+    edits.stage_update(STAGED)
+    edits.stage_delete(2)
+    updates, deletes = edits.snapshot()
+    restaged = STAGED[:2] + ("CAPTAIN",) + STAGED[3:]
+    edits.stage_update(restaged)  # Changed again while the save was running
+    edits.written(updates, deletes)
+    assert edits.updates == {1: restaged}
+    assert edits.deletes == set()
+
+
+def test_discard_returns_the_ids_that_had_a_change():
+    edits = session()
+    edits.stage_update(STAGED)
+    edits.stage_delete(5)
+    assert sorted(edits.discard()) == [1, 5]
+    assert len(edits) == 0 and edits.pending(1) is None
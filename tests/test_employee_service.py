@@ -0,0 +1,136 @@
+# EmployeeService over the SQLite stand-in (what `employee_service.py --sqlite` serves): credentials
+# on the unmasked, sensitive and write routes, reads after a write, and malformed requests.
+import asyncio
+import base64
+import json
+import threading
+
+import pytest
+
+from database import connect_sqlite, create_pool
+from employee_service import FORM_FIELDS, create_service
+from synthetic_data import seed_database
+
+AUTH = {"authorization": "Basic " + base64.b64encode(b"clerk:secret").decode("ascii")}
+
+
+@pytest.fixture
+def sqlite_env(tmp_path, monkeypatch):
+    path = str(tmp_path / "service.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, 50)
+    connection.close()
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_SQLITE_PATH", path)
+    pool = create_pool()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def service(sqlite_env, monkeypatch):
+    monkeypatch.setenv("SEN_USER", "clerk")
+    monkeypatch.setenv("SEN_PASSWORD", "secret")
+    return create_service(sqlite_env, cache_seconds=60)
+
+
+def dispatch(service, method, target, headers=None, body=None):
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    return asyncio.run(service.dispatch(method, target, headers or {}, data))
+
+
+# Form fields of an unmasked row, missing numbers as 0 since every field is required
+def form(row, **changes):
+    fields = {name: 0 if value is None else value for name, value in zip(FORM_FIELDS, row[1:])}
+    fields.update(changes)
+    return fields
+
+
+@pytest.mark.parametrize("method, target", [
+    ("GET", "/employees?masked=0"),
+    ("GET", "/employees/1?masked=0"),
+    ("GET", "/employees/sensitive"),
+    ("GET", "/employees/sensitive/probe"),
+    ("POST", "/employees"),
+    ("POST", "/employees/batch"),
+    ("PUT", "/employees/1"),
+    ("DELETE", "/employees/1"),
+])
+def test_sensitive_routes_need_credentials(service, method, target):
+    status, payload = dispatch(service, method, target, body={})
+    assert status == 401, payload
+    wrong = {"authorization": "Basic " + base64.b64encode(b"clerk:guess").decode("ascii")}
+    assert dispatch(service, method, target, wrong, body={})[0] == 401
+    assert dispatch(service, "GET", "/employees/1")[0] == 200  # Masked reads stay open
+
+
+def test_no_configured_credentials_refuses_sensitive_routes(sqlite_env, monkeypatch):
+    monkeypatch.delenv("SEN_USER", raising=False)
+    monkeypatch.delenv("SEN_PASSWORD", raising=False)
+    service = create_service(sqlite_env)
+    assert dispatch(service, "GET", "/employees/sensitive")[0] == 401
+    assert dispatch(service, "GET", "/employees/sensitive", AUTH)[0] == 401
+    assert dispatch(service, "DELETE", "/employees/1", AUTH)[0] == 401
+    assert dispatch(service, "GET", "/employees/1")[0] == 200
+
+
+def test_batch_updates_are_validated_again(service):
+    status, row = dispatch(service, "GET", "/employees/1?masked=0", AUTH)
+    assert status == 200
+    update = [1] + list(form(row, typical_hours="many").values())
+    status, payload = dispatch(service, "POST", "/employees/batch", AUTH, {"updates": [update]})
+    assert status == 400, payload
+    assert dispatch(service, "GET", "/employees/1?masked=0", AUTH)[1] == row
+
+
+# A read that started before a write is neither shared with reads after it nor cached
+def test_no_stale_read_after_write(service):
+    async def scenario():
+        original = service.repository.get
+        _, row = await service.dispatch("GET", "/employees/1?masked=0", AUTH, b"")
+        service._cache.clear()
+        release = threading.Event()
+        fetched = threading.Event()
+
+        def held_get(*args):
+            result = original(*args)
+            fetched.set()
+            release.wait(5)
+            return result
+
+        service.repository.get = held_get
+        before = asyncio.create_task(service.dispatch("GET", "/employees/1", {}, b""))
+        await asyncio.to_thread(fetched.wait, 5)
+        service.repository.get = original
+        body = json.dumps(form(row, job_title="AUDITOR")).encode("utf-8")
+        assert (await service.dispatch("PUT", "/employees/1", AUTH, body))[0] == 200
+        after = await service.dispatch("GET", "/employees/1", {}, b"")
+        release.set()
+        stale = await before
+        again = await service.dispatch("GET", "/employees/1", {}, b"")
+        return row, stale, after, again
+
+    row, stale, after, again = asyncio.run(scenario())
+    assert stale[1][2] == row[2] != "AUDITOR"
+    assert after[1][2] == "AUDITOR"
+    assert again[1][2] == "AUDITOR"
+    assert service.coalesced == 0
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_bad_content_length_is_rejected(service, length):
+    async def scenario():
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"POST /employees HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+    assert b"Content-Length" in response
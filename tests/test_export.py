@@ -0,0 +1,59 @@
+import csv
+import os
+
+import pytest
+
+from database import DatabaseConnectionError, connect_sqlite
+from export import ExportCancelled, build_export_query, export_employees
+from synthetic_data import seed_database
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "employees.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, 300)
+    connection.execute("UPDATE Current_Employee SET Department = NULL WHERE ID <= 5")
+    connection.commit()
+    connection.close()
+    return lambda: connect_sqlite(path)
+
+
+def test_export_writes_every_row(database, tmp_path):
+    path = str(tmp_path / "out.csv")
+    assert export_employees(database, path, arraysize=64) == 300
+    with open(path, newline="") as file:
+        assert len(list(csv.reader(file))) == 301
+    assert sorted(os.listdir(tmp_path)) == ["employees.db", "out.csv"]  # No partial file left behind
+
+
+def test_failed_export_keeps_the_existing_file(tmp_path):
+    path = tmp_path / "out.csv"
+    path.write_text("earlier export\n")
+
+    def unreachable():
+        raise DatabaseConnectionError("no server")
+
+    with pytest.raises(DatabaseConnectionError):
+        export_employees(unreachable, str(path))
+    assert path.read_text() == "earlier export\n"
+    assert sorted(os.listdir(tmp_path)) == ["out.csv"]
+
+
+def test_cancelled_export_keeps_the_existing_file(database, tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text("earlier export\n")
+    with pytest.raises(ExportCancelled):
+        export_employees(database, str(path), arraysize=50, cancelled=lambda: True)
+    assert path.read_text() == "earlier export\n"
+    assert sorted(os.listdir(tmp_path)) == ["employees.db", "out.jsonl"]
+
+
+def test_ticked_empty_facet_value_matches_null(database):
+    query, params = build_export_query(filters={"Department": ["FIRE", None]})
+    connection = database()
+    exported = {row[0] for row in connection.execute(query, params)}
+    expected = {row[0] for row in connection.execute(
+        "SELECT ID FROM Current_Employee WHERE Department = 'FIRE' OR Department IS NULL")}
+    connection.close()
+    assert exported == expected and {1, 2, 3, 4, 5} <= exported
@@ -0,0 +1,50 @@
+import random
+
+from facets import FacetIndex, bitmap_of, is_active, keys_of
+
+ROWS = [
+    (1, "A", "CLERK", "POLICE", "F", "SALARY"),
+    (2, "B", "CLERK", "POLICE", "P", "HOURLY"),
+    (3, "C", "CLERK", "FIRE", "F", "SALARY"),
+    (4, "D", "CLERK", None, "F", "HOURLY"),
+    (70, "E", "CLERK", "FIRE", "P", "HOURLY"),
+]
+
+
+def test_bitmaps_round_trip():
+    keys = sorted(random.Random(1).sample(range(100000), 500))
+    assert keys_of(bitmap_of(keys)) == keys
+    assert bitmap_of([]) == 0 and keys_of(0) == []
+
+
+def test_values_are_ored_within_a_column_and_anded_across_columns():
+    index = FacetIndex.build(ROWS)
+    assert keys_of(index.match({"Department": {"POLICE", "FIRE"}})) == [1, 2, 3, 70]
+    assert keys_of(index.match({"Department": {"POLICE", "FIRE"}, "Full_or_Part_Time": {"P"}})) == [2, 70]
+    assert keys_of(index.match({"Department": {None}})) == [4]
+    assert keys_of(index.match({"Department": set()})) == [1, 2, 3, 4, 70]
+    assert index.values("Department") == ["FIRE", "POLICE", None]
+    assert is_active({"Department": {"FIRE"}}) and not is_active({"Department": set()})
+
+
+def test_counts_leave_out_their_own_column():
+    index = FacetIndex.build(ROWS)
+    counts = index.counts({"Department": {"FIRE"}, "Full_or_Part_Time": {"F"}})
+    assert counts["Department"] == {"POLICE": 1, "FIRE": 1, None: 1}  # Rows with F
+    assert counts["Full_or_Part_Time"] == {"F": 1, "P": 1}  # Rows in FIRE
+    assert counts["Salary_or_Hourly"] == {"SALARY": 1, "HOURLY": 0}  # Rows in FIRE with F
+    assert index.counts({}, base=bitmap_of([1, 2]))["Department"] == {"POLICE": 2, "FIRE": 0, None: 0}
+
+
+def test_incremental_changes_match_a_rebuild():
+    index = FacetIndex()
+    for row in ROWS:
+        index.add(row)
+    index.add((2, "B", "CLERK", "WATER", "P", "HOURLY"))  # Replaces the earlier version
+    index.remove(4)
+    index.remove(99)  # Unknown keys are ignored
+    rebuilt = FacetIndex.build([ROWS[0], (2, "B", "CLERK", "WATER", "P", "HOURLY"), ROWS[2], ROWS[4]])
+    assert index.values("Department") == rebuilt.values("Department") == ["FIRE", "POLICE", "WATER"]
+    assert index.all == rebuilt.all
+    assert index.counts({}) == rebuilt.counts({})
+    assert len(index) == 4
@@ -0,0 +1,70 @@
+import pytest
+
+from database import MASKED_EMPLOYEE_COLUMNS, connect_sqlite
+from paged_view import KeysetPageSource, PageCache
+from sorting import sql_sort_expression
+from synthetic_data import seed_database
+
+
+@pytest.fixture(scope="module")
+def connect(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("paging") / "employees.db")
+    connection = connect_sqlite(path)
+    seed_database(connection, 500)
+    # Missing values sort with the NULL-folding expressions
+    connection.execute("UPDATE Current_Employee SET Department = NULL, Typical_Hours = NULL WHERE ID % 37 = 0")
+    connection.commit()
+    connection.close()
+    return lambda: connect_sqlite(path)
+
+
+def walk(source, direction, size):
+    rows, key = [], None
+    while True:
+        page = source.fetch(direction, key, size)
+        if not page:
+            return rows
+        rows = rows + page if direction == "after" else page + rows
+        key = source.key(page[-1] if direction == "after" else page[0])
+
+
+def expected_ids(connect, order_by):
+    terms = ", ".join([f"{expression}{' DESC' if descending else ''}" for expression, descending in order_by] + ["ID"])
+    connection = connect()
+    ids = [row[0] for row in connection.execute(f"SELECT ID FROM Current_Employee ORDER BY {terms}")]
+    connection.close()
+    return ids
+
+
+@pytest.mark.parametrize("order_by", [
+    [],
+    [(sql_sort_expression(3), False)],
+    [(sql_sort_expression(3), True)],
+    [(sql_sort_expression(6), True), (sql_sort_expression(2), False)],
+])
+def test_pages_walk_every_row_once_in_order(connect, order_by):
+    source = KeysetPageSource(connect, MASKED_EMPLOYEE_COLUMNS, "Current_Employee", dialect="sqlite",
+                              order_by=order_by)
+    expected = expected_ids(connect, order_by)
+    assert [row[0] for row in walk(source, "after", 37)] == expected
+    assert [row[0] for row in walk(source, "before", 41)] == expected  # From the end back to the start
+
+
+def test_page_before_a_key_ends_just_before_it(connect):
+    source = KeysetPageSource(connect, MASKED_EMPLOYEE_COLUMNS, "Current_Employee", dialect="sqlite",
+                              order_by=[(sql_sort_expression(3), False)])
+    first = source.fetch("after", None, 50)
+    second = source.fetch("after", source.key(first[-1]), 50)
+    assert source.fetch("before", source.key(second[0]), 50) == first
+    assert source.key(first[0])[-1] == first[0][0]  # The ID ends the keyset position
+
+
+def test_page_cache_evicts_the_least_recently_used():
+    cache = PageCache(capacity=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    assert cache.get("a") == [1]
+    cache.put("c", [3])
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ([1], [3])
+    assert (cache.hits, cache.misses, cache.evictions, len(cache)) == (3, 1, 1, 2)
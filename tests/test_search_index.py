@@ -0,0 +1,41 @@
+from search_index import SearchIndex
+
+ROWS = [
+    (1, "SMITH JOHN", "POLICE OFFICER", "POLICE"),
+    (2, "KOWALSKI ANNA", "CLERK", "FINANCE"),
+    (3, "SMITHSON MARY", "FIREFIGHTER", "FIRE"),
+]
+
+
+def test_search_matches_substrings_of_every_word():
+    index = SearchIndex.build(ROWS)
+    assert index.search("smith") == {1, 3}
+    assert index.search("smith fire") == {3}
+    assert index.search("ce") == {1, 2}  # Shorter than a trigram
+    assert index.search("nobody") == set()
+    assert index.search("") == {1, 2, 3}
+
+
+def test_row_with_the_same_text_in_two_fields_can_be_removed_and_changed():
+    index = SearchIndex.build(ROWS + [(4, "DOE JANE", "CLERK", "clerk")])
+    index.remove(4)
+    assert index.search("clerk") == {2}
+    assert len(index) == 3
+
+    index.add((5, "ROE JIM", "AUDITOR", "AUDITOR"))
+    index.add((5, "ROE JIM", "AUDITOR", "FINANCE"))  # Replaces the earlier version
+    assert index.search("auditor") == {5}
+    assert index.search("finance") == {2, 5}
+    index.add((5, "ROE JIM", "CLERK", "FINANCE"))
+    assert index.search("auditor") == set()
+    assert index.search("clerk") == {2, 5}
+
+
+def test_removing_the_last_row_drops_its_values():
+    index = SearchIndex.build(ROWS)
+    index.remove(2)
+    assert index.search("kowalski") == set()
+    assert "kowalski anna" not in index._value_ids
+    assert all(index._grams.values())
+    index.remove(2)  # Removing an unknown key is a no-op
+    assert len(index) == 2
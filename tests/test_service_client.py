@@ -0,0 +1,44 @@
+import socket
+import threading
+
+import pytest
+
+from database import DatabaseConnectionError
+from service_client import ServiceClient
+
+
+# Accepts connections, reads one request from each and hangs up without answering
+@pytest.fixture
+def dropping_server():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    requests = []
+
+    def serve():
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            with connection:
+                requests.append(connection.recv(65536).split(b" ", 1)[0])
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}", requests
+    listener.close()
+
+
+def test_reads_are_retried_once_on_a_new_connection(dropping_server):
+    url, requests = dropping_server
+    with pytest.raises(DatabaseConnectionError):
+        ServiceClient(url, timeout=5).get("/employees")
+    assert requests == [b"GET", b"GET"]
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+def test_changes_that_were_sent_are_not_repeated(dropping_server, method):
+    url, requests = dropping_server
+    with pytest.raises(DatabaseConnectionError):
+        ServiceClient(url, "clerk", "secret", timeout=5).request(method, "/employees/1", body={"name": "X"})
+    assert requests == [method.encode("ascii")]
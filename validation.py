@@ -0,0 +1,72 @@
+# Raised when a record fails validation. title and message are what the app shows in its warning dialog.
+class ValidationError(Exception):
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+# Check the fields of an employee record and parse the numeric ones.
+# Returns (typical_hours, annual_salary, hourly_rate).
+def check_employee_fields(name, job_title, department, full_or_part_time, salary_or_hourly,
+                          typical_hours, annual_salary, hourly_rate):
+    if not all([name, job_title, department, full_or_part_time, salary_or_hourly,
+                typical_hours, annual_salary, hourly_rate]):
+        raise ValidationError("Input Error", "All fields must be filled out.")
+
+    # Input length checks
+    if (len(name) > 50 or
+            len(job_title) > 50 or
+            len(department) > 100 or
+            len(full_or_part_time) > 50 or
+            len(salary_or_hourly) > 50):
+        raise ValidationError("Input Error", "One or more fields exceed the maximum length.")
+
+    # Validate numeric inputs
+    hours_str = typical_hours.strip()
+    annual_salary_str = annual_salary.strip()
+    hourly_rate_str = hourly_rate.strip()
+
+    if not hours_str:
+        raise ValidationError("Input Error", "Hours cannot be empty.")
+    if not annual_salary_str:
+        raise ValidationError("Input Error", "Annual Salary cannot be empty.")
+    if not hourly_rate_str:
+        raise ValidationError("Input Error", "Hourly Rate cannot be empty.")
+
+    try:
+        hours = int(hours_str)
+    except ValueError:
+        raise ValidationError("Data Type Error", "Please enter a valid integer value for Hours.")
+
+    try:
+        salary = float(annual_salary_str)
+    except ValueError:
+        raise ValidationError("Data Type Error", "Please enter a valid numeric value for Annual Salary.")
+
+    try:
+        rate = float(hourly_rate_str)
+    except ValueError:
+        raise ValidationError("Data Type Error", "Please enter a valid numeric value for Hourly Rate.")
+
+    return hours, salary, rate
+
+
+# Validate a new employee and normalise it the way it is stored: name reversed to
+# "LAST FIRST" and upper-cased, job title, department and full/part-time upper-cased.
+# Returns the parameters for the INSERT in Current_Employee column order.
+def prepare_new_employee(name, job_title, department, full_or_part_time, salary_or_hourly,
+                         typical_hours, annual_salary, hourly_rate):
+    hours, salary, rate = check_employee_fields(
+        name, job_title, department, full_or_part_time, salary_or_hourly,
+        typical_hours, annual_salary, hourly_rate)
+
+    # Reverse first name and last name and convert to uppercase
+    name_parts = name.strip().split()
+    if len(name_parts) < 2:
+        raise ValidationError("Input Error", "Please enter both first name and last name.")
+    reversed_name = " ".join(name_parts[::-1]).upper()
+
+    # Convert other fields to uppercase
+    return (reversed_name, job_title.strip().upper(), department.strip().upper(),
+            full_or_part_time.strip().upper(), salary_or_hourly, hours, salary, rate)